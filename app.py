@@ -1,180 +1,27 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import google.generativeai as genai
-from googleapiclient.discovery import build
-import pysrt
 import io
+import os
 import zipfile
+import tempfile
+import shutil
 import pandas as pd
 import json
 import re 
-import html 
-from collections import OrderedDict
-import time
-import copy
-import math
-import requests
-from pydub import AudioSegment
-from pydub.effects import speedup
+import uuid
+from translator_core import compression, gemini, jobs, pipelines, subtitles, youtube
+from translator_core.audio import AUDIO_EXPORT_FORMATS, encode_audio_file
+from translator_core.config import (DUB_DOWNLOAD_MAX_BYTES, ELEVENLABS_BASE_URL, JOB_UI_POLL_SECONDS, LANGUAGE_GROUP_SIZE, MAX_CONCURRENT_REQUESTS,
+                                    TARGET_LANGUAGES, VOICE_OPTIONS)
+from translator_core.metadata import localize_video_metadata, localize_videos, youtube_localizations
+from translator_core.metrics import metrics
+from translator_core.tts import ElevenLabsClient, default_voice_label, get_tts_cache
+
+# 번역/더빙 로직은 translator_core 패키지에 있고, 이 파일은 화면 구성만 담당
 
 # --- Streamlit UI 설정 (페이지 탭 이름 변경) ---
 st.set_page_config(page_title="허슬플레이 AI 번역 및 더빙 웹앱", layout="wide")
 
-# --- 전역 세션 상태 (이어받기 캐시) 초기화 ---
-if 'cache_multi_sbv' not in st.session_state: st.session_state.cache_multi_sbv = {}
-if 'cache_multi_srt' not in st.session_state: st.session_state.cache_multi_srt = {}
-if 'last_sbv_name' not in st.session_state: st.session_state.last_sbv_name = ""
-if 'last_srt_name' not in st.session_state: st.session_state.last_srt_name = ""
-if 'multi_sbv_zip' not in st.session_state: st.session_state.multi_sbv_zip = None
-if 'multi_srt_zip' not in st.session_state: st.session_state.multi_srt_zip = None
-
-# --- 지원 언어 목록 ---
-TARGET_LANGUAGES = OrderedDict({
-    "el": {"name": "그리스어", "code": "EL"},
-    "nl": {"name": "네덜란드어", "code": "NL"},
-    "no": {"name": "노르웨이어", "code": "NB"},
-    "da": {"name": "덴마크어", "code": "DA"},
-    "de": {"name": "독일어", "code": "DE"},
-    "ru": {"name": "러시아어", "code": "RU"},
-    "mr": {"name": "마라티어", "code": "MR"},
-    "ms": {"name": "말레이어", "code": "MS"},
-    "vi": {"name": "베트남어", "code": "VI"},
-    "bn": {"name": "벵골어", "code": "BN"},
-    "sv": {"name": "스웨덴어", "code": "SV"},
-    "es": {"name": "스페인어", "code": "ES"},
-    "sk": {"name": "슬로바키아어", "code": "SK"},
-    "ar": {"name": "아랍어", "code": "AR"},
-    "en-US": {"name": "영어 (미국)", "code": "EN-US"},
-    "en-IE": {"name": "영어 (아일랜드)", "code": "EN-GB"}, 
-    "en-GB": {"name": "영어 (영국)", "code": "EN-GB"},
-    "en-AU": {"name": "영어 (호주)", "code": "EN-AU"},   
-    "en-IN": {"name": "영어 (인도)", "code": "EN-GB"},   
-    "en-CA": {"name": "영어 (캐나다)", "code": "EN-CA"},
-    "ur": {"name": "우르두어", "code": "UR"},
-    "uk": {"name": "우크라이나어", "code": "UK"},
-    "it": {"name": "이탈리아어", "code": "IT"},
-    "id": {"name": "인도네시아어", "code": "ID"},
-    "ja": {"name": "일본어", "code": "JA"},
-    "zh-CN": {"name": "중국어(간체)", "code": "ZH"},
-    "zh-TW": {"name": "중국어(번체)", "code": "zh-TW"},
-    "cs": {"name": "체코어", "code": "CS"},
-    "ta": {"name": "타밀어", "code": "TA"},
-    "th": {"name": "태국어", "code": "TH"},
-    "te": {"name": "텔루구어", "code": "TE"},
-    "tr": {"name": "튀르키예어", "code": "TR"},
-    "pa": {"name": "펀잡어", "code": "PA"},
-    "pt": {"name": "포르투갈어", "code": "PT-PT"},
-    "pl": {"name": "폴란드어", "code": "PL"},
-    "fr": {"name": "프랑스어", "code": "FR"},
-    "fi": {"name": "핀란드어", "code": "FI"},
-    "fil": {"name": "필리핀어", "code": "FIL"},
-    "ko": {"name": "한국어", "code": "KO"},
-    "hu": {"name": "헝가리어", "code": "HU"},
-    "hi": {"name": "힌디어", "code": "HI"},
-})
-
-CHUNK_SIZE = 40
-
-# --- ElevenLabs Voice ID 목록 ---
-VOICE_OPTIONS = {
-    "한국어(세모과)": "ruSJRhA64v8HAqiqKXVw",
-    "영어(세모과)": "EkK5I93UQWFDigLMpZcX",
-    "덴마크어, 네덜란드어, 스웨덴어, 독일어(세모과)": "ygiXC2Oa1BiHksD3WkJZ",
-    "포르투갈어, 스페인어(세모과)": "4za2kOXGgUd57HRSQ1fn"
-}
-
-# --- 영어 압축 시스템 프롬프트 (마크다운 충돌 방지를 위해 백틱 대체) ---
-COMPRESSION_PROMPT = """
-### Role & Context
-You are the **Chief Script Editor** for the 3-million-subscriber industrial documentary channel 'All process of world'.
-Your mission is to optimize English subtitles for **Multi-Language Dubbing (German, French, etc.)**.
-
-Target languages (like German) naturally expand in length by ~30%. Therefore, you must slightly tighten the English text to create "breathing room" for translators.
-**HOWEVER**, you must strictly preserve the **documentary's narrative tone, descriptive richness, and audio density**.
-
-### **CORE GOAL: "Smart Dubbing Optimization" (더빙 최적화)**
-Do not strip the script to its bare bones. Instead, **"tighten the bolts."**
-Your goal is to reduce the character count by **10% to 20%** (Smart Trim), NOT 50% (Hard Cut).
-* **Avoid:** Creating "dead air" where the text becomes too short for the timestamp duration.
-* **Aim for:** A smooth, professional flow that retains the original meaning and imagery but uses fewer syllables.
-
-### **CRITICAL RULES (Strict Adherence)**
-
-**1. STRICT TIMELINE INTEGRITY**
-* **ONE-TO-ONE MAPPING:** Output the **EXACT SAME number of lines** as the input.
-* **NO DELETION:** Never delete a subtitle block.
-* **NO MERGING:** Keep original timestamps 100% intact.
-
-**2. DURATION AWARENESS (Prevent Dead Air)**
-* **Check the Duration:** Calculate the time difference (`End Time` - `Start Time`) for each line.
-* **If a segment is LONG (e.g., > 4 seconds):**
-    * **DO NOT SHORTEN AGGRESSIVELY.** The narrator needs enough text to fill the audio time naturally.
-    * **Keep Adjectives:** Retain words like "kiln-fired," "guarding," "colossal" to maintain atmosphere.
-* **If a segment is SHORT (e.g., < 2 seconds) and text is long:**
-    * **SHORTEN AGGRESSIVELY.** This is where you need to create space.
-
-**3. STRUCTURAL COMPRESSION (Priority Strategy)**
-Use this order to shorten text instead of deleting words randomly:
-* **Priority 1: Grammar Shift (A of B → B A)**
-    * *Ex:* "The frames of wooden houses" → "The wooden frames" (Saves syllables, keeps meaning).
-    * *Ex:* "Production of the factory" → "Factory production".
-* **Priority 2: Trim "Functional" Fillers Only**
-    * Remove: "basically," "actually," "in order to," "is designed to."
-    * *Ex:* "It is designed to be used for cutting" → "It cuts".
-* **Priority 3: Flavor Preservation**
-    * **KEEP:** Adjectives that describe texture, mood, or quality.
-    * **REMOVE:** Only if the sentence is *critically* too long for the timestamp.
-
-### **Output Rules**
-
-You must provide **TWO separate Code Blocks**.
-
-**[Output 1: Master Subtitle File (For Sync)]**
-* **Format:** Code Block (identifier: `srt` or `sbv`).
-* **Content:** The optimized English text with **EXACT** original timestamps.
-
-**[Output 2: Readable Script (For Review)]**
-* **Format:** Plaintext Code Block (identifier: `txt`).
-* **Content:** The optimized text merged into continuous sentences.
-
-### **Comparison Example (Calibration)**
-
-**[Input Raw]**
-'''srt
-115
-00:08:51,597 --> 00:08:57,436
-From kiln-fired bricks
-
-116
-00:08:57,436 --> 00:09:02,875
-to concrete walls guarding the earth…
-
-117
-00:09:02,875 --> 00:09:06,712
-…and the breathing frames of wooden houses.
-'''
-
-**[BAD Output (Over-Compressed - Do NOT do this)]**
-'''srt
-From bricks to concrete walls… …and wooden frames.
-'''
-
-**[GOOD Output (Target Standard)]**
-'''srt
-115
-00:08:51,597 --> 00:08:57,436
-From kiln-fired bricks
-
-116
-00:08:57,436 --> 00:09:02,875
-to concrete walls guarding the earth…
-
-117
-00:09:02,875 --> 00:09:06,712
-…and the breathing wooden frames.
-'''
-""".replace("'''", "`" * 3)
-
 # --- 유틸리티: 복사 버튼 생성 컴포넌트 ---
 def create_copy_button(text_to_copy, button_id):
     safe_id = re.sub(r'\W+', '_', button_id)
@@ -201,188 +48,44 @@ def create_copy_button(text_to_copy, button_id):
     """
     components.html(html_code, height=50)
 
-# --- 오디오 프로세싱 함수 ---
-def remove_silence(audio_segment, silence_thresh=-50.0):
-    if len(audio_segment) == 0: return audio_segment
-    start_trim = 0
-    end_trim = len(audio_segment)
-    for i in range(0, len(audio_segment), 10):
-        if audio_segment[i:i+10].dBFS > silence_thresh:
-            start_trim = i
-            break
-    for i in range(len(audio_segment)-10, 0, -10):
-        if audio_segment[i:i+10].dBFS > silence_thresh:
-            end_trim = i + 10
-            break
-    if start_trim >= end_trim: return audio_segment
-    return audio_segment[start_trim:end_trim]
-
-def match_target_duration(audio_segment, target_duration_ms):
-    if len(audio_segment) > 0:
-        audio_segment = remove_silence(audio_segment)
-    
-    current_duration_ms = len(audio_segment)
-    if current_duration_ms == 0:
-        return AudioSegment.silent(duration=int(target_duration_ms))
-        
-    if current_duration_ms > target_duration_ms:
-        speed_factor = current_duration_ms / target_duration_ms
-        try:
-            refined_audio = speedup(audio_segment, playback_speed=speed_factor)
-        except Exception:
-            refined_audio = audio_segment
-            
-        if len(refined_audio) > target_duration_ms:
-            refined_audio = refined_audio[:int(target_duration_ms)]
-    else:
-        refined_audio = audio_segment
-        
-    return refined_audio
-
-# --- 문장 병합(Sentence Merging) 로직 ---
-def merge_pysrt_items(subs):
-    merged = []
-    if not subs: return merged
-    current_seg = None
-    for sub in subs:
-        start_ms = sub.start.ordinal
-        end_ms = sub.end.ordinal
-        text = sub.text.strip().replace('\n', ' ')
-        
-        if current_seg is None:
-            current_seg = {'start_ms': start_ms, 'end_ms': end_ms, 'text': text}
-        else:
-            current_seg['text'] += " " + text
-            current_seg['end_ms'] = end_ms
-            
-        if re.search(r'[.?!’”"]\s*$', current_seg['text']) or current_seg['text'].endswith('...'):
-            merged.append(current_seg)
-            current_seg = None
-            
-    if current_seg is not None:
-        merged.append(current_seg)
-    return merged
-
-# --- SBV / SRT 파싱 함수 ---
+# --- Streamlit 캐시 래퍼 (같은 입력으로 다시 실행할 때 API 호출/파싱 생략) ---
 @st.cache_data(show_spinner=False)
 def parse_sbv(file_content):
-    subs = pysrt.SubRipFile()
-    lines = file_content.strip().replace('\r\n', '\n').split('\n\n')
-    for i, block in enumerate(lines):
-        if not block.strip(): continue
-        parts = block.split('\n', 1)
-        if len(parts) != 2: continue
-        time_match = re.match(r'(\d+):(\d+):(\d+)\.(\d+),(\d+):(\d+):(\d+)\.(\d+)', parts[0].strip())
-        if time_match:
-            start_h, start_m, start_s, start_ms, end_h, end_m, end_s, end_ms = map(int, time_match.groups())
-            sub = pysrt.SubRipItem()
-            sub.index = i + 1
-            sub.start.hours, sub.start.minutes, sub.start.seconds, sub.start.milliseconds = start_h, start_m, start_s, start_ms
-            sub.end.hours, sub.end.minutes, sub.end.seconds, sub.end.milliseconds = end_h, end_m, end_s, end_ms
-            sub.text = html.unescape(parts[1].strip())
-            subs.append(sub)
-    if not subs: return None, "SBV 파싱 오류: 유효한 시간/텍스트 블록을 찾을 수 없습니다."
-    return subs, None
-
-def to_sbv_format(subrip_file):
-    sbv_output = []
-    for sub in subrip_file:
-        start_time = f"{sub.start.hours:02d}:{sub.start.minutes:02d}:{sub.start.seconds:02d}.{sub.start.milliseconds:03d}"
-        end_time = f"{sub.end.hours:02d}:{sub.end.minutes:02d}:{sub.end.seconds:02d}.{sub.end.milliseconds:03d}"
-        sbv_output.extend([f"{start_time},{end_time}", html.unescape(sub.text.strip()), ""])
-    return "\n".join(sbv_output).strip()
+    return subtitles.load_subtitle(file_content, "sbv")
 
 @st.cache_data(show_spinner=False)
 def parse_srt_native(file_content):
-    try: return pysrt.from_string(file_content), None
-    except Exception as e: return None, f"SRT 파싱 오류: {str(e)}"
-
-def to_srt_format_native(subrip_file):
-    for sub in subrip_file:
-        sub.text = sub.text.strip()
-    return "\n\n".join(str(sub).strip() for sub in subrip_file).strip()
+    return subtitles.load_subtitle(file_content, "srt")
 
 @st.cache_data(show_spinner=False)
 def get_video_details(api_key, video_id):
-    try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
-        request = youtube.videos().list(part="snippet", id=video_id)
-        response = request.execute()
-        if not response.get('items'): return None, "YouTube API 오류: 해당 ID의 영상을 찾을 수 없습니다."
-        return response['items'][0]['snippet'], None
-    except Exception as e:
-        return None, f"YouTube API 오류: {str(e)}"
-
-# --- Gemini API 번역 로직 (제목 번역 및 자막 번역 분리) ---
-@st.cache_data(show_spinner=False)
-def translate_gemini(text_data, target_lang_name, is_title=False):
-    is_list = isinstance(text_data, list)
-    
-    if is_title:
-        director_guidelines = """
-        ROLE: You are an Expert Title Translator for high-end industrial, manufacturing, and cultural documentaries (e.g., BBC, National Geographic).
-        
-        CRITICAL TITLE TRANSLATION RULES:
-        1. Contextual Analysis: Identify the specific industry/topic. ALWAYS prioritize authentic 'Industry Jargon' over literal words (e.g., instead of literally translating 'massive', use industry-appropriate nuances like 'colossal scale' or 'gigantic process').
-        2. Meaning-Based & No Literal Translation: Translate the *core purpose* and *context*, not the dictionary definition (e.g., 'Junkyard' translates to the professional equivalent of 'Car Dismantling Facility' in the target language). Ensure zero "Translation-ese".
-        3. Amplify Adjectives: Replace bland adjectives with the most powerful, impactful expressions available in the target language to highlight scale, speed, or rarity.
-        4. Headline Impact & Conciseness: Eliminate unnecessary conjunctions and prepositions. Deliver a concise, striking headline.
-        5. Tone of Formal Expertise: Avoid cheap clickbait. Maintain a tone of professional awe and trustworthiness, exactly as a major documentary broadcaster would format a title in the target country.
-        """
-    else:
-        director_guidelines = """
-        ROLE: You are an Expert Script Translator for professional industrial and craftsmanship documentaries (similar to the style of "How It's Made").
-        
-        CRITICAL TRANSLATION RULES:
-        1. Factual & Professional: Translate with accurate, professional terminology. STRICTLY AVOID overly dramatic, poetic, or flowery language (e.g., do not use words like "Sacred Ritual" or "Alchemy"). Maintain the exact original meaning of the text without exaggeration.
-        2. Natural Documentary Tone: Ensure the English sounds completely natural for a native-speaking audience watching a factual documentary. Use clear subject-verb structures, prefer active voice, and avoid convoluted relative clauses.
-        3. NO Special Characters: STRICTLY PROHIBITED to use slashes (/), brackets ([ ]), or ellipses (...) to indicate pauses, pacing, or formatting. Use only standard, minimal grammatical punctuation (like periods and necessary commas).
-        4. Technical Accuracy: Use correct industry terms naturally within the context (e.g., slip, bisque firing, casting, parting line). Translate '대표' as 'Founder' or 'Head' rather than a sterile 'CEO' in the context of craftsmanship, but keep the overall tone grounded and factual.
-        """
-    
-    if is_list:
-        json_payload = json.dumps(text_data, ensure_ascii=False)
-        prompt = f"""{director_guidelines}
-        TASK: Translate the following JSON array of strings into {target_lang_name} applying the CRITICAL TRANSLATION RULES.
-        STRICT FORMATTING RULES:
-        1. Return ONLY a valid JSON array of strings. No explanations, no markdown.
-        2. The output array MUST have exactly {len(text_data)} items. Do not merge or split the array items themselves.
-        3. Do NOT translate HTML tags.
-        Input JSON:
-        {json_payload}"""
-    else:
-        prompt = f"""{director_guidelines}
-        TASK: Translate the following text into {target_lang_name} applying the CRITICAL TRANSLATION RULES.
-        STRICT FORMATTING RULES:
-        1. Preserve ALL original line breaks (newlines), empty lines, and formatting EXACTLY as they are. Do NOT combine separate lines.
-        2. Do NOT translate timestamps (e.g., 00:00) or email addresses.
-        3. Return ONLY the translated text without any markdown wrappers.
-        Input text:
-        {text_data}"""
-
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            response = gemini_model.generate_content(prompt)
-            res_text = response.text.strip()
-            if is_list:
-                start_idx = res_text.find('[')
-                end_idx = res_text.rfind(']')
-                if start_idx != -1 and end_idx != -1:
-                    res_text = res_text[start_idx:end_idx+1]
-                else:
-                    raise Exception("JSON 배열 기호를 찾을 수 없습니다.")
-                translated_list = json.loads(res_text)
-                if len(translated_list) != len(text_data):
-                    raise Exception("배열 길이 불일치")
-                return translated_list, None
-            else:
-                return res_text, None
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt) 
-                continue
-            return None, f"Gemini 번역 실패: {str(e)}"
+    return youtube.get_video_details(api_key, video_id)
+
+# 다국어 번역 작업자는 서버 프로세스당 하나만 실행 (세션이 끊겨도 작업은 계속 진행)
+@st.cache_resource(show_spinner=False)
+def get_job_worker():
+    worker = jobs.JobWorker(jobs.get_job_store())
+    worker.start()
+    return worker
+
+# --- 실행 지표 요약: 구간별 소요 시간, Gemini 토큰, ElevenLabs 글자 수, 예상 비용 ---
+def show_run_metrics(summary, key):
+    if not summary: return
+    c, cost = summary["counters"], summary["cost"]
+    with st.expander(f"📊 실행 지표 ({summary['elapsed_s']:.1f}초, 예상 비용 ${cost['total_usd']:.4f})"):
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Gemini 요청", f"{c.get('gemini.requests', 0)}회", f"재시도 {c.get('gemini.retries', 0)}회", delta_color="off")
+        m2.metric("입력/출력 토큰", f"{c.get('gemini.prompt_tokens', 0):,} / {c.get('gemini.output_tokens', 0):,}")
+        m3.metric("ElevenLabs 글자 수", f"{c.get('elevenlabs.characters', 0):,}자", f"캐시 {c.get('tts_cache.hit_characters', 0):,}자", delta_color="off")
+        m4.metric("예상 비용 (USD)", f"${cost['total_usd']:.4f}", f"Gemini ${cost['gemini_usd']:.4f} / ElevenLabs ${cost['elevenlabs_usd']:.4f}", delta_color="off")
+        if summary["spans"]: st.dataframe(pd.DataFrame(summary["spans"]), hide_index=True)
+        st.download_button("📥 지표 JSON 다운로드", json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8'), f"metrics_{key}.json", "application/json", key=f"dl_metrics_{key}")
+
+# --- 디스크의 결과 파일 다운로드: 화면을 그릴 때는 읽지 않고 버튼을 누를 때만 읽음 (누르면 Streamlit이 파일 전체를 메모리에 올림) ---
+def file_download_button(label, path, file_name, mime, key):
+    def read():
+        with open(path, "rb") as f: return f.read()
+    st.download_button(label, read, file_name, mime, key=key, on_click="ignore")
 
 def to_text_docx_substitute(data_list, original_desc_input, video_id):
     output = io.StringIO()
@@ -405,10 +108,12 @@ st.title("허슬플레이 AI 번역 및 더빙 웹앱 v.260403")
 try:
     YOUTUBE_API_KEY = st.secrets["YOUTUBE_API_KEY"] 
     GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-    youtube_client = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    gemini.configure(GEMINI_API_KEY)
     st.success("✅ API 키 로드 완료. (Gemini API)")
+    # Gemini 호출은 서버 프로세스 전체가 하나의 속도 제한기를 공유하고, 대기 중인 요청은 세션별로 번갈아 처리됨
+    # (같은 프롬프트의 요청이 다른 세션에서 진행 중이면 새로 보내지 않고 그 응답을 함께 받음)
+    if 'request_client' not in st.session_state: st.session_state.request_client = f"session:{uuid.uuid4().hex[:8]}"
+    gemini.set_request_client(st.session_state.request_client)
 except KeyError:
     st.error("❌ 'Secrets'에 YOUTUBE_API_KEY 또는 GEMINI_API_KEY가 없습니다.")
     st.stop()
@@ -419,16 +124,6 @@ except KeyError:
 # ==========================================================
 st.header("영상 제목 및 설명란 번역")
 
-def extract_video_id(url_or_id):
-    url_or_id = url_or_id.strip()
-    if len(url_or_id) == 11 and not url_or_id.startswith("http"): return url_or_id
-    pattern = r'(?:v=|\/shorts\/|\/embed\/|youtu\.be\/)([a-zA-Z0-9_-]{11})'
-    match = re.search(pattern, url_or_id)
-    if match: return match.group(1)
-    fallback = r'(?:\/)([a-zA-Z0-9_-]{11})(?:[?&/]|$)'
-    match_fb = re.search(fallback, url_or_id)
-    return match_fb.group(1) if match_fb else url_or_id
-
 video_id_input_raw = st.text_input("YouTube 동영상 URL 또는 동영상 ID 입력")
 
 if 'video_details' not in st.session_state: st.session_state.video_details = None
@@ -437,7 +132,7 @@ if 'clean_id' not in st.session_state: st.session_state.clean_id = ""
 
 if st.button("1. 영상 정보 가져오기"):
     if video_id_input_raw:
-        video_id = extract_video_id(video_id_input_raw)
+        video_id = youtube.extract_video_id(video_id_input_raw)
         st.session_state.clean_id = video_id
         with st.spinner("가져오는 중..."):
             snippet, error = get_video_details(YOUTUBE_API_KEY, video_id)
@@ -458,38 +153,24 @@ if st.session_state.video_details:
     if st.button("2. 전체 언어 번역 실행"):
         st.session_state.translation_results = []
         progress_bar = st.progress(0, text="전체 번역 진행 중...")
-        for i, (ui_key, lang_data) in enumerate(TARGET_LANGUAGES.items()):
-            lang_name = lang_data["name"]
-            progress_bar.progress((i + 1) / len(TARGET_LANGUAGES), text=f"번역 중: {lang_name}")
-            try:
-                # 1. 영어인 경우 API 호출 없이 원본 그대로 복사 (비용/시간 절약)
-                if lang_name.startswith("영어"):
-                    title_text, title_err = snippet['title'], None
-                    desc_text, desc_err = original_desc_input, None
-                else:
-                    title_text, title_err = translate_gemini(snippet['title'], lang_name, is_title=True)
-                    desc_text, desc_err = translate_gemini(original_desc_input, lang_name, is_title=False)
-                    time.sleep(1.5) 
-                
-                # 2. 제목에 포함된 줄바꿈 기호를 띄어쓰기로 강제 치환
-                if title_text:
-                    title_text = title_text.replace('\n', ' ').replace('\r', '').strip()
-
-                status = "실패" if (title_err or desc_err) else "성공"
-                st.session_state.translation_results.append({
-                    "lang_name": lang_name, "ui_key": ui_key, "api": "Gemini", "status": status,
-                    "title": title_text if status=="성공" else f"오류: {title_err}",
-                    "desc": desc_text if status=="성공" else f"오류: {desc_err}"
-                })
-            except Exception as e:
-                st.session_state.translation_results.append({
-                    "lang_name": lang_name, "ui_key": ui_key, "api": "Gemini", "status": "실패",
-                    "title": f"시스템 오류: {str(e)}", "desc": f"시스템 오류: {str(e)}"
-                })
+        results = st.session_state.translation_results
+        languages = [(uk, ld["name"]) for uk, ld in TARGET_LANGUAGES.items()]
+
+        # 영어는 API 호출 없이 원본 그대로 복사, 제목은 전체 언어를 한 번에, 설명은 언어 그룹별로 동시에 요청
+        # 완료되는 언어부터 translation_results에 바로 쌓임
+        def on_result(result):
+            results.append(result)
+            progress_bar.progress(len(results) / len(languages), text=f"번역 완료: {len(results)}/{len(languages)} 언어 ({result['lang_name']} {result['status']})")
+
+        with metrics.run() as run: localize_video_metadata(snippet['title'], original_desc_input, languages, on_result)
+        st.session_state.translation_metrics = run.summary()
+        order = {uk: i for i, uk in enumerate(TARGET_LANGUAGES)}
+        results.sort(key=lambda r: order[r["ui_key"]])
         st.success("모든 언어 번역 완료! (줄바꿈 포맷 완벽 보존)")
         progress_bar.empty()
 
     if st.session_state.translation_results:
+        show_run_metrics(st.session_state.get('translation_metrics'), "metadata")
         st.subheader("번역 결과 검수 및 다운로드")
         excel_data_list = []
         for result_data in st.session_state.translation_results:
@@ -518,12 +199,8 @@ if st.session_state.video_details:
             st.markdown("---")
             st.subheader("🚀 YouTube 일괄 업로드 (JSON)")
             if st.button("🚀 JSON 데이터 생성"):
-                localizations = {}
-                for res in excel_data_list: 
-                    if res['Status'] == '성공':
-                        api_lang_code = 'tl' if res['UI_Key'] == 'fil' else res['UI_Key']
-                        localizations[api_lang_code] = {"title": res['Title'], "description": res['Description']}
-                json_body = json.dumps({"id": st.session_state.clean_id, "localizations": localizations}, indent=2, ensure_ascii=False)
+                edited = [{"ui_key": r['UI_Key'], "status": r['Status'], "title": r['Title'], "desc": r['Description']} for r in excel_data_list]
+                json_body = json.dumps(youtube_localizations(st.session_state.clean_id, edited), indent=2, ensure_ascii=False)
                 st.code(json_body, language="json")
                 st.info("💡 위 코드 블록 우측 상단의 '복사' 아이콘을 클릭하여 전체 코드를 복사하세요.")
                 
@@ -539,6 +216,35 @@ if st.session_state.video_details:
                 5. 하단의 파란색 **[Execute]** 버튼을 클릭하면 수십 개국 다국어 데이터가 즉시 덮어씌워집니다!
                 """)
 
+# --- 여러 영상 일괄 현지화: 영상 정보는 50개씩 한 번에 조회하고, 영상마다 전체 언어 JSON을 생성 ---
+with st.expander("📚 여러 영상 일괄 번역 (URL/ID 여러 개)"):
+    batch_input = st.text_area("YouTube 동영상 URL 또는 ID (줄바꿈/쉼표로 구분)", height=150, key="batch_video_ids")
+    if st.button("🚀 일괄 번역 및 JSON 생성") and batch_input.strip():
+        video_ids = youtube.parse_video_ids(batch_input)
+        try:
+            with st.spinner(f"{len(video_ids)}개 영상 정보 가져오는 중..."):
+                snippets = youtube.fetch_video_snippets(youtube.get_youtube_client(YOUTUBE_API_KEY), video_ids)
+        except Exception as e:
+            st.error(f"YouTube API 오류: {str(e)}"); snippets = {}
+        missing = [v for v in video_ids if v not in snippets]
+        if missing: st.warning(f"찾을 수 없는 영상 {len(missing)}개: {', '.join(missing)}")
+        if snippets:
+            languages = [(uk, ld["name"]) for uk, ld in TARGET_LANGUAGES.items()]
+            progress_bar = st.progress(0, text="일괄 번역 진행 중...")
+            done = []
+            def on_video_done(video_id, body, results):
+                done.append(video_id)
+                failed = sum(r["status"] != "성공" for r in results)
+                progress_bar.progress(len(done) / len(snippets), text=f"영상 완료: {len(done)}/{len(snippets)} ({video_id}, 실패 {failed}개 언어)")
+            with metrics.run() as run: bodies = localize_videos({v: snippets[v] for v in video_ids if v in snippets}, languages, on_video_done)
+            st.session_state.batch_localizations = json.dumps(bodies, indent=2, ensure_ascii=False)
+            st.session_state.batch_metrics = run.summary()
+            progress_bar.empty()
+    if st.session_state.get("batch_localizations"):
+        show_run_metrics(st.session_state.get('batch_metrics'), "batch_videos")
+        st.code(st.session_state.batch_localizations, language="json")
+        st.download_button("📥 전체 영상 JSON 다운로드", st.session_state.batch_localizations.encode('utf-8'), "localizations.json", mime="application/json")
+
 
 # ==========================================================
 # Task 2: 영어 자막 번역
@@ -556,17 +262,14 @@ with c1:
             if err: st.error(err)
             else:
                 status_msg = st.empty()
-                texts, trans = [s.text for s in subs_ko], []
-                total_chunks = math.ceil(len(texts) / CHUNK_SIZE)
-                for chunk_idx, i in enumerate(range(0, len(texts), CHUNK_SIZE)):
-                    status_msg.info(f"⏳ 영어 번역 진행 중... (조각 {chunk_idx + 1}/{total_chunks})")
-                    chunk, trans_err = translate_gemini(texts[i:i+CHUNK_SIZE], "English (US)")
-                    if trans_err: raise Exception(trans_err)
-                    trans.extend(chunk); time.sleep(1.5) 
+                result = {}
+                def on_progress(done, total): status_msg.info(f"⏳ 영어 번역 진행 중... ({done}/{total}줄, 번역 메모리에 있는 줄은 생략)")
+                def on_file_done(lang_name, data, failed_chunks): result.update(data=data, failed=failed_chunks)
+                with metrics.run() as run: pipelines.translate_subtitle_file(subs_ko, "sbv", [("en-US", "English (US)")], on_file_done, on_progress=on_progress)
+                show_run_metrics(run.summary(), "en_sbv")
+                if result['failed']: raise Exception(f"Gemini 번역 실패: {result['failed']}개 조각 번역에 실패했습니다. 다시 시도하면 완료된 줄은 번역 메모리에서 이어받습니다.")
                 status_msg.empty()
-                ts = copy.deepcopy(subs_ko)
-                for j, s in enumerate(ts): s.text = trans[j].strip()
-                st.download_button("✅ 영어 SBV 다운로드", to_sbv_format(ts).encode('utf-8'), "영어.sbv")
+                st.download_button("✅ 영어 SBV 다운로드", result['data'], "영어.sbv")
         except Exception as e: st.error(str(e))
 
 with c2:
@@ -577,17 +280,14 @@ with c2:
             if err: st.error(err)
             else:
                 status_msg = st.empty()
-                texts, trans = [s.text for s in subs_ko], []
-                total_chunks = math.ceil(len(texts) / CHUNK_SIZE)
-                for chunk_idx, i in enumerate(range(0, len(texts), CHUNK_SIZE)):
-                    status_msg.info(f"⏳ 영어 번역 진행 중... (조각 {chunk_idx + 1}/{total_chunks})")
-                    chunk, trans_err = translate_gemini(texts[i:i+CHUNK_SIZE], "English (US)")
-                    if trans_err: raise Exception(trans_err)
-                    trans.extend(chunk); time.sleep(1.5)
+                result = {}
+                def on_progress(done, total): status_msg.info(f"⏳ 영어 번역 진행 중... ({done}/{total}줄, 번역 메모리에 있는 줄은 생략)")
+                def on_file_done(lang_name, data, failed_chunks): result.update(data=data, failed=failed_chunks)
+                with metrics.run() as run: pipelines.translate_subtitle_file(subs_ko, "srt", [("en-US", "English (US)")], on_file_done, on_progress=on_progress)
+                show_run_metrics(run.summary(), "en_srt")
+                if result['failed']: raise Exception(f"Gemini 번역 실패: {result['failed']}개 조각 번역에 실패했습니다. 다시 시도하면 완료된 줄은 번역 메모리에서 이어받습니다.")
                 status_msg.empty()
-                ts = copy.deepcopy(subs_ko)
-                for j, s in enumerate(ts): s.text = trans[j].strip()
-                st.download_button("✅ 영어 SRT 다운로드", to_srt_format_native(ts).encode('utf-8'), "영어.srt")
+                st.download_button("✅ 영어 SRT 다운로드", result['data'], "영어.srt")
         except Exception as e: st.error(str(e))
 
 
@@ -603,21 +303,16 @@ if up_compress_file and st.button("🚀 영어 자막 압축 시작"):
     content = up_compress_file.getvalue().decode("utf-8")
     ext = up_compress_file.name.split('.')[-1].lower()
     
-    with st.spinner("AI가 자막을 분석하고 최적화하는 중입니다... (약 1~2분 소요)"):
+    with st.spinner("AI가 자막을 구간별로 나눠 동시에 최적화하는 중입니다..."):
         try:
-            bt = "`" * 3
-            prompt = COMPRESSION_PROMPT + f"\n\n[Input Raw]\n{bt}{ext}\n{content}\n{bt}"
-            
-            response = gemini_model.generate_content(prompt)
-            res_text = response.text
-            
-            srt_sbv_match = re.search(bt + r'(?:srt|sbv)\n(.*?)\n' + bt, res_text, re.DOTALL | re.IGNORECASE)
-            txt_match = re.search(bt + r'txt\n(.*?)\n' + bt, res_text, re.DOTALL | re.IGNORECASE)
-            
-            compressed_sub = srt_sbv_match.group(1).strip() if srt_sbv_match else "⚠️ 오류: 자막 코드 블록 파싱 실패. 원본 응답을 확인하세요.\n\n" + res_text
-            readable_script = txt_match.group(1).strip() if txt_match else "⚠️ 오류: 스크립트 텍스트 블록 파싱 실패."
-            
-            st.success("✅ 영어 자막 압축 및 읽기용 스크립트 생성이 완료되었습니다.")
+            progress_bar = st.progress(0, text="압축 진행 중...")
+            def on_progress(done, total): progress_bar.progress(done / total, text=f"압축 진행 중... ({done}/{total} 구간)")
+            with metrics.run() as run: compressed_sub, readable_script, failed_lines = compression.compress_subtitle(content, ext, on_progress=on_progress)
+            progress_bar.empty()
+            show_run_metrics(run.summary(), "compress")
+
+            if failed_lines: st.warning(f"⚠️ {failed_lines}줄은 압축에 실패해 원문 그대로 두었습니다. (자막 개수와 시각은 원본과 동일)")
+            else: st.success("✅ 영어 자막 압축 및 읽기용 스크립트 생성이 완료되었습니다.")
             
             c1, c2 = st.columns(2)
             with c1:
@@ -638,104 +333,70 @@ if up_compress_file and st.button("🚀 영어 자막 압축 시작"):
 # ==========================================================
 st.markdown("---")
 st.header("다국어 번역")
+max_workers = st.number_input("동시 번역 요청 수", min_value=1, max_value=16, value=MAX_CONCURRENT_REQUESTS, help="(언어, 조각) 단위로 동시에 처리할 Gemini 요청 수입니다. 호출 속도는 분당 요청 한도로 제한됩니다.")
+
+job_store = jobs.get_job_store()
+get_job_worker()
+
+# 언어별 파일은 작업자가 완료 시점에 미리 압축해 두므로 여기서는 이어 붙이기만 함
+# 저장된 결과(output_version)가 같으면 다시 만들지 않으므로 화면을 다시 그려도 추가 비용이 없음 (실패 언어를 재시도해 덮어쓰면 새로 만듦)
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_job_zip(job_id, output_version):
+    return job_store.build_archive(job_id)
+
+# 작업 상태를 주기적으로 다시 읽어 표시 (작업이 끝나면 전체 화면을 한 번 다시 그려 폴링 중단)
+def show_translation_job(job_id, fmt):
+    job = job_store.get(job_id)
+    if job is None: st.warning("번역 작업을 찾을 수 없습니다. 다시 시작해 주세요."); return
+    polling = job['status'] in jobs.ACTIVE_STATUSES
+
+    @st.fragment(run_every=JOB_UI_POLL_SECONDS if polling else None)
+    def panel():
+        job = job_store.get(job_id)
+        if polling and job['status'] not in jobs.ACTIVE_STATUSES: st.rerun()
+        total, finished = len(job['targets']), job['finished_langs']
+        st.caption(f"작업: {job['source_name']} ({job_id[:8]})")
+        if job['status'] == "queued": st.info("⏳ 대기 중... (앞선 작업이 끝나면 시작됩니다)")
+        elif job['status'] == "running":
+            st.progress(len(finished) / total, text=f"전체 진행률: {len(finished)}/{total} 언어 (이번 실행 {job['done_lines']}/{job['total_lines']}줄, 번역 메모리에 있는 줄은 생략)")
+        elif job['status'] == "done": st.success("🎉 다국어 번역 완료! 아래 버튼을 눌러 다운로드하세요.")
+        elif job['status'] == "failed": st.error(f"번역 작업 실패: {job['error']}")
+        else: st.warning("번역 작업이 취소되었습니다.")
+
+        if polling and st.button("⏹️ 번역 중단", key=f"cancel_{fmt}_job"): job_store.cancel(job_id); st.rerun()
+        if job['status'] in ("failed", "cancelled") and st.button("🔁 이어서 다시 실행", key=f"retry_{fmt}_job"):
+            job_store.submit(job['source_name'], fmt, job['content'], job['targets'], job['max_workers'], source_lang=job['source_lang']); st.rerun()
+
+        langs = tuple(job['output_langs'])
+        if job['status'] == "done":
+            st.download_button(f"✅ 다국어 {fmt.upper()} 다운로드 (ZIP)", build_job_zip(job_id, job['output_version']), f"all_{fmt}.zip", "application/zip", key=f"dl_multi_{fmt}")
+        elif langs:
+            st.download_button(f"⚠️ 중간 저장본 다운로드 ({len(langs)}개 언어)", build_job_zip(job_id, job['output_version']), f"partial_{fmt}.zip", "application/zip", key=f"dl_partial_{fmt}")
+        # 지표는 작업자가 실행을 마칠 때 저장됨 (다시 실행한 작업은 마지막 실행 기준)
+        if not polling: show_run_metrics(job['metrics'], f"job_{fmt}")
+    panel()
+
+# 작업 ID는 주소(query string)에 기록하므로 새로고침하거나 서버가 재시작되어도 같은 작업에 다시 연결됨
+def multi_translation_column(fmt, parse):
+    up_file = st.file_uploader(f"영어 {fmt.upper()} ▶ 다국어 번역", type=[fmt])
+    if up_file and st.button(f"{fmt.upper()} 다국어 번역 시작 (중단되어도 다시 누르면 이어서 진행)"):
+        content = up_file.getvalue().decode("utf-8")
+        subs, err = parse(content)
+        if err: st.error(err)
+        else:
+            targets = [(uk, ld['name']) for uk, ld in TARGET_LANGUAGES.items()]
+            # 영어 자막이 원문이므로 영어 변형(미국/영국/호주 등)은 번역 없이 원문에서 만듦
+            st.query_params[f"{fmt}_job"] = job_store.submit(up_file.name, fmt, content, targets, max_workers, source_lang="EN")
+            st.info(f"⏳ {len(targets)}개 언어 번역 작업을 등록했습니다. (요청당 {LANGUAGE_GROUP_SIZE}개 언어, 동시 요청 {max_workers}개)")
+    if f"{fmt}_job" in st.query_params: show_translation_job(st.query_params[f"{fmt}_job"], fmt)
 
 c1, c2 = st.columns(2)
 
 with c1:
-    up_en_sbv = st.file_uploader("영어 SBV ▶ 다국어 번역", type=['sbv'])
-    if up_en_sbv:
-        if st.session_state.last_sbv_name != up_en_sbv.name:
-            st.session_state.cache_multi_sbv = {}; st.session_state.multi_sbv_zip = None; st.session_state.last_sbv_name = up_en_sbv.name
-        if st.button("SBV 다국어 번역 시작 (중단 시 다시 누르면 이어서 진행)"):
-            try:
-                subs, err = parse_sbv(up_en_sbv.getvalue().decode("utf-8"))
-                if err: st.error(err)
-                else:
-                    status_msg = st.empty()
-                    texts = [s.text for s in subs]
-                    total_chunks = math.ceil(len(texts) / CHUNK_SIZE)
-                    prog = st.progress(len(st.session_state.cache_multi_sbv) / len(TARGET_LANGUAGES))
-                    for i, (uk, ld) in enumerate(TARGET_LANGUAGES.items()):
-                        lang_name = ld['name']
-                        if lang_name in st.session_state.cache_multi_sbv:
-                            prog.progress((i+1)/len(TARGET_LANGUAGES), text=f"전체 진행률: {i+1}/{len(TARGET_LANGUAGES)} (패스: {lang_name} 완료됨)"); continue
-                        prog.progress((i+1)/len(TARGET_LANGUAGES), text=f"전체 진행률: {i+1}/{len(TARGET_LANGUAGES)} 언어 (현재: {lang_name})")
-                        trans = []
-                        try:
-                            for chunk_idx, j in enumerate(range(0, len(texts), CHUNK_SIZE)):
-                                status_msg.info(f"⏳ {lang_name} 번역 중... (조각 {chunk_idx + 1}/{total_chunks})")
-                                chunk, e = translate_gemini(texts[j:j+CHUNK_SIZE], lang_name)
-                                if e: trans.extend(["오류"]*len(texts[j:j+CHUNK_SIZE])); st.toast(f"{lang_name} 일부 구간 오류 발생", icon="⚠️")
-                                else: trans.extend(chunk)
-                                time.sleep(1.5)
-                            ts = copy.deepcopy(subs)
-                            for k, s in enumerate(ts): s.text = trans[k].strip() if k < len(trans) else s.text.strip()
-                            st.session_state.cache_multi_sbv[lang_name] = to_sbv_format(ts).encode('utf-8')
-                        except Exception as lang_err: st.warning(f"{lang_name} 예외 발생: {str(lang_err)}"); continue
-                    
-                    status_msg.info("📦 결과물 압축 파일을 생성하고 있습니다...")
-                    zb = io.BytesIO()
-                    with zipfile.ZipFile(zb, "w", zipfile.ZIP_DEFLATED, False) as zf:
-                        for lname, lcontent in st.session_state.cache_multi_sbv.items(): zf.writestr(f"{lname}.sbv", lcontent)
-                    status_msg.empty(); prog.empty()
-                    st.session_state.multi_sbv_zip = zb.getvalue()
-                    st.success("🎉 다국어 번역 완료! 아래 버튼을 눌러 다운로드하세요.")
-            except Exception as e: st.error(str(e))
-        if st.session_state.multi_sbv_zip:
-            st.download_button("✅ 다국어 SBV 다운로드 (ZIP)", st.session_state.multi_sbv_zip, "all_sbv.zip", "application/zip", key="dl_multi_sbv")
-        elif st.session_state.cache_multi_sbv:
-            zb_temp = io.BytesIO()
-            with zipfile.ZipFile(zb_temp, "w", zipfile.ZIP_DEFLATED, False) as zf:
-                for lname, lcontent in st.session_state.cache_multi_sbv.items(): zf.writestr(f"{lname}.sbv", lcontent)
-            st.download_button(f"⚠️ 중간 저장본 다운로드 ({len(st.session_state.cache_multi_sbv)}개 언어)", zb_temp.getvalue(), "partial_sbv.zip", "application/zip", key="dl_partial_sbv")
+    multi_translation_column("sbv", parse_sbv)
 
 with c2:
-    up_en_srt = st.file_uploader("영어 SRT ▶ 다국어 번역", type=['srt'])
-    if up_en_srt:
-        if st.session_state.last_srt_name != up_en_srt.name:
-            st.session_state.cache_multi_srt = {}; st.session_state.multi_srt_zip = None; st.session_state.last_srt_name = up_en_srt.name
-        if st.button("SRT 다국어 번역 시작 (중단 시 다시 누르면 이어서 진행)"):
-            try:
-                subs, err = parse_srt_native(up_en_srt.getvalue().decode("utf-8"))
-                if err: st.error(err)
-                else:
-                    status_msg = st.empty()
-                    texts = [s.text for s in subs]
-                    total_chunks = math.ceil(len(texts) / CHUNK_SIZE)
-                    prog = st.progress(len(st.session_state.cache_multi_srt) / len(TARGET_LANGUAGES))
-                    for i, (uk, ld) in enumerate(TARGET_LANGUAGES.items()):
-                        lang_name = ld['name']
-                        if lang_name in st.session_state.cache_multi_srt:
-                            prog.progress((i+1)/len(TARGET_LANGUAGES), text=f"전체 진행률: {i+1}/{len(TARGET_LANGUAGES)} (패스: {lang_name} 완료됨)"); continue
-                        prog.progress((i+1)/len(TARGET_LANGUAGES), text=f"전체 진행률: {i+1}/{len(TARGET_LANGUAGES)} 언어 (현재: {lang_name})")
-                        trans = []
-                        try:
-                            for chunk_idx, j in enumerate(range(0, len(texts), CHUNK_SIZE)):
-                                status_msg.info(f"⏳ {lang_name} 번역 중... (조각 {chunk_idx + 1}/{total_chunks})")
-                                chunk, e = translate_gemini(texts[j:j+CHUNK_SIZE], lang_name)
-                                if e: trans.extend(["오류"]*len(texts[j:j+CHUNK_SIZE])); st.toast(f"{lang_name} 일부 구간 오류 발생", icon="⚠️")
-                                else: trans.extend(chunk)
-                                time.sleep(1.5) 
-                            ts = copy.deepcopy(subs)
-                            for k, s in enumerate(ts): s.text = trans[k].strip() if k < len(trans) else s.text.strip()
-                            st.session_state.cache_multi_srt[lang_name] = to_srt_format_native(ts).encode('utf-8')
-                        except Exception as lang_err: st.warning(f"{lang_name} 예외 발생: {str(lang_err)}"); continue
-                    
-                    status_msg.info("📦 결과물 압축 파일을 생성하고 있습니다...")
-                    zb = io.BytesIO()
-                    with zipfile.ZipFile(zb, "w", zipfile.ZIP_DEFLATED, False) as zf:
-                        for lname, lcontent in st.session_state.cache_multi_srt.items(): zf.writestr(f"{lname}.srt", lcontent)
-                    status_msg.empty(); prog.empty()
-                    st.session_state.multi_srt_zip = zb.getvalue()
-                    st.success("🎉 다국어 번역 완료! 아래 버튼을 눌러 다운로드하세요.")
-            except Exception as e: st.error(str(e))
-        if st.session_state.multi_srt_zip:
-            st.download_button("✅ 다국어 SRT 다운로드 (ZIP)", st.session_state.multi_srt_zip, "all_srt.zip", "application/zip", key="dl_multi_srt")
-        elif st.session_state.cache_multi_srt:
-            zb_temp = io.BytesIO()
-            with zipfile.ZipFile(zb_temp, "w", zipfile.ZIP_DEFLATED, False) as zf:
-                for lname, lcontent in st.session_state.cache_multi_srt.items(): zf.writestr(f"{lname}.srt", lcontent)
-            st.download_button(f"⚠️ 중간 저장본 다운로드 ({len(st.session_state.cache_multi_srt)}개 언어)", zb_temp.getvalue(), "partial_srt.zip", "application/zip", key="dl_partial_srt")
+    multi_translation_column("srt", parse_srt_native)
 
 
 # ==========================================================
@@ -745,11 +406,13 @@ st.markdown("---")
 st.header("AI 더빙 생성 (ElevenLabs)")
 
 elevenlabs_api_key = st.secrets.get("ELEVENLABS_API_KEY", "")
+elevenlabs_base_url = st.secrets.get("ELEVENLABS_BASE_URL", ELEVENLABS_BASE_URL)
 
 c1, c2 = st.columns([1, 2])
 with c1:
     selected_voice_label = st.selectbox("🎙️ AI 성우 (Voice ID) 선택", list(VOICE_OPTIONS.keys()))
     selected_voice_id = VOICE_OPTIONS[selected_voice_label]
+    dub_format = st.radio("💾 출력 형식", list(AUDIO_EXPORT_FORMATS.keys()), horizontal=True, help="FLAC/MP3는 완성된 WAV를 한 번에 변환합니다.")
 
     if not elevenlabs_api_key:
         elevenlabs_api_key = st.text_input("🔑 ElevenLabs API Key 입력", type="password")
@@ -757,7 +420,7 @@ with c1:
 
 with c2:
     up_dub_srt = st.file_uploader("더빙할 SRT 파일 업로드 (1개 한정)", type=['srt'], key='dub_srt')
-    if up_dub_srt and st.button("🚀 AI 더빙 오디오 생성 시작 (WAV)"):
+    if up_dub_srt and st.button("🚀 AI 더빙 오디오 생성 시작"):
         if not elevenlabs_api_key:
             st.error("ElevenLabs API Key를 입력해주십시오.")
             st.stop()
@@ -766,50 +429,108 @@ with c2:
             subs, err = parse_srt_native(up_dub_srt.getvalue().decode("utf-8"))
             if err: raise Exception(err)
             
-            merged_segments = merge_pysrt_items(subs)
-            if not merged_segments:
-                raise Exception("SRT에서 유효한 텍스트를 찾을 수 없습니다.")
-
-            total_duration_ms = merged_segments[-1]['end_ms'] + 5000 
-            final_audio = AudioSegment.silent(duration=total_duration_ms)
+            # 이전 실행의 임시 결과 파일 정리 후, 타임라인을 임시 WAV 파일 위에 직접 믹싱
+            for old_path in st.session_state.get('dub_output_files', []):
+                if os.path.exists(old_path): os.remove(old_path)
+            fd, wav_path = tempfile.mkstemp(prefix="dub_", suffix=".wav"); os.close(fd)
+            st.session_state.dub_output_files = [wav_path]
             
             status_msg = st.empty()
             prog = st.progress(0)
             
-            for i, seg in enumerate(merged_segments):
-                status_msg.info(f"⏳ 더빙 음성 생성 및 동기화 중... ({i+1}/{len(merged_segments)})")
-                
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{selected_voice_id}"
-                headers = {
-                    "xi-api-key": elevenlabs_api_key,
-                    "Content-Type": "application/json"
-                }
-                data = {
-                    "text": seg['text'],
-                    "model_id": "eleven_multilingual_v2",
-                }
-                
-                res = requests.post(url, json=data, headers=headers)
-                if res.status_code == 200:
-                    seg_audio = AudioSegment.from_file(io.BytesIO(res.content), format="mp3")
-                    seg_audio = remove_silence(seg_audio)
-                    
-                    target_duration = seg['end_ms'] - seg['start_ms']
-                    seg_audio = match_target_duration(seg_audio, target_duration)
-                    final_audio = final_audio.overlay(seg_audio, position=seg['start_ms'])
-                else:
-                    st.warning(f"API 호출 실패 (구간 {i+1}): {res.text}")
-                    
-                prog.progress((i+1)/len(merged_segments))
-                
-            status_msg.success("🎉 AI 더빙 오디오(WAV) 생성 및 싱크 조절이 완료되었습니다!")
+            def on_segment(done, total, i, tts_err):
+                status_msg.info(f"⏳ 더빙 음성 생성 및 동기화 중... ({done}/{total})")
+                if tts_err: st.warning(f"API 호출 실패 (구간 {i+1}): {tts_err}")
+                prog.progress(done / total)
+
+            client = ElevenLabsClient(elevenlabs_api_key, base_url=elevenlabs_base_url)
+            with metrics.run() as run:
+                pipelines.dub_subtitle(subs, client, selected_voice_id, wav_path, cache=get_tts_cache(), on_segment=on_segment)
+                if dub_format == "WAV" and os.path.getsize(wav_path) > DUB_DOWNLOAD_MAX_BYTES:
+                    dub_format = "FLAC"; st.info(f"WAV 결과가 {DUB_DOWNLOAD_MAX_BYTES // 1024 ** 2}MB를 넘어 무손실 FLAC으로 변환해 제공합니다.")
+                out_path = encode_audio_file(wav_path, dub_format)
+            if out_path != wav_path: st.session_state.dub_output_files.append(out_path)
+            status_msg.success(f"🎉 AI 더빙 오디오({dub_format}) 생성 및 싱크 조절이 완료되었습니다!")
             prog.empty()
             
-            wav_io = io.BytesIO()
-            final_audio.export(wav_io, format="wav")
-            wav_name = up_dub_srt.name.replace('.srt', '_dubbed.wav')
+            ext, mime, _ = AUDIO_EXPORT_FORMATS[dub_format]
+            out_name = up_dub_srt.name.replace('.srt', f'_dubbed.{ext}')
             
-            st.download_button("✅ 최종 더빙 오디오 다운로드 (WAV)", wav_io.getvalue(), wav_name, "audio/wav")
+            file_download_button(f"✅ 최종 더빙 오디오 다운로드 ({dub_format})", out_path, out_name, mime, key="dl_dub")
+            show_run_metrics(run.summary(), "dub")
             
         except Exception as e:
             st.error(f"오류 발생: {str(e)}")
+
+
+# ----------------------------------------------------------
+# 다국어 일괄 더빙: 음성 합성은 스레드로 동시에, 무음 제거/시간 압축/믹싱은 프로세스 풀에서 언어별로 병렬 처리
+# ----------------------------------------------------------
+st.subheader("다국어 일괄 더빙 (ZIP)")
+batch_source = st.radio("자막 소스", ["다국어 번역 작업 결과 (SRT)", "다국어 SRT ZIP 업로드"], horizontal=True, key='dub_batch_source')
+if batch_source == "다국어 번역 작업 결과 (SRT)":
+    srt_sources = job_store.outputs(st.query_params["srt_job"]) if "srt_job" in st.query_params else {}
+    if not srt_sources: st.caption("먼저 '다국어 번역'에서 SRT 다국어 번역을 실행하거나 ZIP을 업로드하세요.")
+else:
+    up_dub_zip = st.file_uploader("다국어 번역 SRT ZIP 업로드", type=['zip'], key='dub_zip')
+    srt_sources = subtitles.load_srt_zip(up_dub_zip.getvalue()) if up_dub_zip else {}
+
+if srt_sources:
+    batch_langs = st.multiselect("더빙할 언어", list(srt_sources), default=list(srt_sources), key='dub_batch_langs')
+    voice_labels = list(VOICE_OPTIONS.keys())
+    with st.expander("🎙️ 언어별 AI 성우 지정"):
+        batch_voices = {ln: VOICE_OPTIONS[st.selectbox(ln, voice_labels, index=voice_labels.index(default_voice_label(ln)), key=f"dub_voice_{ln}")] for ln in batch_langs}
+
+    if batch_langs and st.button("🚀 다국어 일괄 더빙 시작 (WAV ZIP)"):
+        if not elevenlabs_api_key:
+            st.error("ElevenLabs API Key를 입력해주십시오.")
+            st.stop()
+        try:
+            if st.session_state.get('dub_batch_dir'): shutil.rmtree(st.session_state.dub_batch_dir, ignore_errors=True)
+            workdir = tempfile.mkdtemp(prefix="dub_batch_")
+            st.session_state.dub_batch_dir = workdir
+
+            client = ElevenLabsClient(elevenlabs_api_key, base_url=elevenlabs_base_url)
+            prog = st.progress(0, text=f"완료: 0/{len(batch_langs)} 언어")
+            status_box = st.empty()
+            lang_status = {ln: "대기 중" for ln in batch_langs}
+
+            def on_status(ln, state):
+                lang_status[ln] = state
+                finished = [v for v in lang_status.values() if v.startswith(("✅", "❌"))]
+                prog.progress(len(finished) / len(batch_langs), text=f"완료: {sum(1 for v in finished if v.startswith('✅'))}/{len(batch_langs)} 언어")
+                status_box.markdown("\n".join(f"- **{ln}**: {state}" for ln, state in lang_status.items()))
+
+            sources = {ln: srt_sources[ln].decode("utf-8") for ln in batch_langs}
+            with metrics.run() as run:
+                rendered = pipelines.dub_languages(sources, {ln: batch_voices[ln] for ln in batch_langs}, client, workdir, cache=get_tts_cache(), on_status=on_status)
+                if not rendered: raise Exception("더빙에 성공한 언어가 없습니다.")
+                # 묶은 WAV가 다운로드 한도를 넘으면 언어별로 무손실 FLAC으로 변환해 묶음
+                batch_format = "FLAC" if sum(os.path.getsize(p) for p in rendered.values()) > DUB_DOWNLOAD_MAX_BYTES else "WAV"
+                ext = AUDIO_EXPORT_FORMATS[batch_format][0]
+                zip_path = os.path.join(workdir, f"dubbed_{ext}.zip")
+                # WAV/FLAC은 거의 압축되지 않으므로 ZIP_STORED로 파일을 그대로 묶음
+                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+                    for ln, wav_path in rendered.items():
+                        out_path = encode_audio_file(wav_path, batch_format)
+                        zf.write(out_path, f"{ln}.{ext}"); os.remove(wav_path)
+                        if out_path != wav_path: os.remove(out_path)
+            prog.empty()
+            st.success(f"🎉 {len(rendered)}개 언어 더빙이 완료되었습니다!")
+            if batch_format != "WAV": st.info(f"WAV 결과가 {DUB_DOWNLOAD_MAX_BYTES // 1024 ** 2}MB를 넘어 무손실 FLAC으로 변환해 묶었습니다.")
+            file_download_button(f"✅ 다국어 더빙 오디오 다운로드 (ZIP, {batch_format})", zip_path, os.path.basename(zip_path), "application/zip", key="dl_dub_batch")
+            show_run_metrics(run.summary(), "dub_batch")
+        except Exception as e:
+            st.error(f"오류 발생: {str(e)}")
+
+
+# ----------------------------------------------------------
+# 서버 프로세스 전체 누적 지표 (모든 세션과 번역 작업자 포함, 서버가 재시작되면 초기화)
+# ----------------------------------------------------------
+st.markdown("---")
+with st.expander("📈 서버 누적 지표 내보내기"):
+    process_summary = metrics.summary()
+    st.caption(f"집계 시간 {process_summary['elapsed_s'] / 60:.0f}분, 예상 비용 ${process_summary['cost']['total_usd']:.4f}")
+    c1, c2 = st.columns(2)
+    c1.download_button("📥 JSON 로그", metrics.to_json().encode('utf-8'), "metrics.json", "application/json", key="dl_metrics_process_json")
+    c2.download_button("📥 Prometheus 텍스트", metrics.prometheus().encode('utf-8'), "metrics.prom", "text/plain", key="dl_metrics_process_prom")
@@ -0,0 +1,25 @@
+import pytest
+from translator_core import cli, pipelines, subtitles
+
+
+def test_translate_subs_requires_source_language(capsys):
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(["translate-subs", "in", "out"])
+    assert "--source" in capsys.readouterr().err
+    assert cli.build_parser().parse_args(["translate-subs", "in", "out", "--source", "en-US"]).source == "EN"
+
+
+# 원문이 한국어면 영어 대상 언어도 원문을 복사하지 않고 번역해야 함
+def test_korean_source_translates_english_targets(monkeypatch):
+    subs, _ = subtitles.load_subtitle("1\n00:00:01,000 --> 00:00:02,000\n안녕하세요\n", "srt")
+    requested, files = [], {}
+
+    def fake_translate(texts, targets, on_language_done, **kwargs):
+        requested.extend(targets)
+        for _, name in targets: on_language_done(name, [f"{name}: hello"] * len(texts), 0)
+    monkeypatch.setattr(pipelines, "translate_languages_concurrently", fake_translate)
+    targets = [("en-US", "영어 (미국)"), ("en-GB", "영어 (영국)"), ("de", "독일어")]
+    pipelines.translate_subtitle_file(subs, "srt", targets, lambda name, data, failed: files.__setitem__(name, data.decode("utf-8")), source_lang="KO")
+    assert [key for key, _ in requested] == ["en-US", "de"]
+    assert sorted(files) == sorted(name for _, name in targets)
+    assert all("안녕하세요" not in data for data in files.values())
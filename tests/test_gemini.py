@@ -0,0 +1,83 @@
+import json
+import pytest
+from translator_core import gemini
+from translator_core.config import TITLE_GUIDELINES
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text, self.usage_metadata = text, None
+
+
+# 프롬프트의 입력 배열을 "키:원문"으로 돌려주는 가짜 모델 (cut으로 응답 끝을 바꿔 끊긴 스트림을 흉내 냄)
+class FakeModel:
+    def __init__(self, cut=None):
+        self.cut, self.prompts = cut, []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        texts = json.loads(prompt[prompt.rindex("Input JSON:") + 11:].strip())
+        body = json.dumps({"de": [f"de:{t}" for t in texts]})
+        response = FakeResponse(self.cut(body) if self.cut else body)
+        return [response] if stream else response
+
+
+@pytest.fixture
+def model(monkeypatch):
+    def install(fake):
+        monkeypatch.setattr(gemini, "_model", fake)
+        monkeypatch.setattr(gemini, "gemini_limiter", gemini.RateLimiter(10**9))
+        monkeypatch.setattr(gemini, "retry_backoff", lambda attempt: None)
+        return fake
+    return install
+
+
+def test_streamed_title_list_uses_title_guidelines(model):
+    fake = model(FakeModel())
+    results, errors = gemini.translate_gemini_multi(["a", "b"], (("de", "독일어"),), is_title=True)
+    assert results == {"de": ["de:a", "de:b"]} and not errors
+    assert fake.prompts[0].startswith(TITLE_GUIDELINES)
+
+
+# 모든 줄을 받은 뒤 배열이 닫히기 전에 끊기면 빈 뒷부분을 다시 요청하지 않아야 함
+def test_stream_cut_after_last_item_needs_no_tail_request(model):
+    fake = model(FakeModel(cut=lambda body: body[:body.rindex("]")] + ", "))
+    results, errors = gemini.translate_gemini_multi(["a", "b", "c"], (("de", "독일어"),))
+    assert results == {"de": ["de:a", "de:b", "de:c"]} and not errors
+    assert len(fake.prompts) == 1
+
+
+def test_single_line_split_into_items_is_joined(model):
+    model(FakeModel(cut=lambda body: json.dumps({"de": ["one", "two"]})))
+    assert gemini.translate_gemini_multi(["x"], (("de", "독일어"),)) == ({"de": ["one two"]}, {})
+
+
+# 앞선 시도가 실패한 언어가 다음 시도에서 끊기고 뒷부분 요청이 성공하면 오류 없이 결과만 남아야 함
+def test_error_cleared_after_truncated_stream_and_tail(model):
+    cuts = [None, lambda body: body[:body.index('"de:c"')]]
+
+    class ScriptedModel(FakeModel):
+        def generate_content(self, prompt, stream=False):
+            if len(self.prompts) == 0:
+                self.prompts.append(prompt); raise RuntimeError("boom")
+            self.cut = cuts[len(self.prompts)] if len(self.prompts) < len(cuts) else None
+            return super().generate_content(prompt, stream)
+
+    fake = model(ScriptedModel())
+    results, errors = gemini.translate_gemini_multi(["a", "b", "c"], (("de", "독일어"),))
+    assert results == {"de": ["de:a", "de:b", "de:c"]} and errors == {}
+    assert len(fake.prompts) == 3
+
+
+# null/숫자 항목은 문자열로 바꾸지 않고 그 줄만 실패로 남겨야 함 (on_item으로 내보내거나 번역 메모리에 저장하지 않음)
+@pytest.mark.parametrize("stream", [True, False])
+def test_non_string_items_fail_only_their_lines(model, monkeypatch, tmp_path, stream):
+    monkeypatch.setattr(gemini, "GEMINI_STREAM_RESPONSES", stream)
+    model(FakeModel(cut=lambda body: body.replace('"de:b"', "null").replace('"de:d"', "4")))
+    tm = gemini.TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    items = []
+    results, errors, _ = gemini.translate_chunk_with_memory(tm, ["a", "b", "c", "d"], (("de", "독일어"),), lambda k, i, v: items.append((i, v)))
+    assert results == {"de": ["de:a", None, "de:c", None]}
+    assert errors["de"].endswith(gemini.INVALID_ITEM)
+    assert all(isinstance(v, str) for _, v in items)
+    assert tm.lookup(["a", "b", "c", "d"], "독일어", gemini.SUBTITLE_PROMPT_HASH) == {"a": "de:a", "c": "de:c"}
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+import time
+from translator_core import jobs
+
+
+# 같은 DB를 여는 두 작업자 프로세스(연결 두 개)가 동시에 claim해도 작업은 한쪽에만 배정되어야 함
+def test_two_connections_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    stores = [jobs.JobStore(path), jobs.JobStore(path)]
+    for round_no in range(50):
+        job_id = stores[0].submit(f"a{round_no}.srt", "srt", f"content {round_no}", [("de", "독일어")], source_lang="EN")
+        barrier, claimed = threading.Barrier(2), [None, None]
+
+        def claim(i):
+            barrier.wait()
+            claimed[i] = stores[i].claim(f"worker-{i}")
+
+        threads = [threading.Thread(target=claim, args=(i,)) for i in range(2)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        winners = [c for c in claimed if c is not None]
+        assert len(winners) == 1 and winners[0]["id"] == job_id
+        assert stores[0].get(job_id)["worker_id"] == winners[0]["worker_id"]
+        stores[0].finish(job_id, winners[0]["worker_id"], "done")
+
+
+def test_submit_keeps_source_language(tmp_path):
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.submit("a.srt", "srt", "content", [("de", "독일어")], source_lang="EN")
+    assert store.get(job_id)["source_lang"] == "EN"
+    assert store.submit("a.srt", "srt", "content", [("de", "독일어")]) != job_id
+
+
+# 실패한 마지막 언어를 재시도해 덮어써도 언어 목록은 같으므로, ZIP 캐시 키(output_version)는 달라져야 함
+def test_output_version_changes_when_output_is_rewritten(tmp_path):
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.submit("a.srt", "srt", "content", [("de", "독일어"), ("fr", "프랑스어")], source_lang="EN")
+    store.save_output(job_id, "독일어", "독일어.srt", b"ok", 0)
+    store.save_output(job_id, "프랑스어", "프랑스어.srt", "오류".encode("utf-8"), 1)
+    before = store.get(job_id)
+    store.save_output(job_id, "프랑스어", "프랑스어.srt", b"fixed", 0)
+    after = store.get(job_id)
+    assert before["output_langs"] == after["output_langs"]
+    assert before["output_version"] != after["output_version"]
+
+
+# 대기열 확인이나 지표 저장에서 DB 오류가 나도 작업자 스레드는 살아서 다음 작업을 처리해야 함
+def test_worker_survives_database_errors(tmp_path, monkeypatch):
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.submit("a.srt", "srt", "content", [("de", "독일어")], source_lang="EN")
+    failures = {"claim": 2, "save_metrics": 1}
+
+    def flaky(name):
+        original = getattr(store, name)
+
+        def call(*args, **kwargs):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return original(*args, **kwargs)
+        monkeypatch.setattr(store, name, call)
+
+    for name in failures: flaky(name)
+    worker = jobs.JobWorker(store, poll_interval=0.01)
+    monkeypatch.setattr(worker, "run_translate", lambda job: 0)
+    worker.start()
+    try:
+        deadline = time.time() + 5
+        while store.get(job_id)["status"] != "done" and time.time() < deadline: time.sleep(0.01)
+        assert store.get(job_id)["status"] == "done" and worker.is_alive()
+        assert failures == {"claim": 0, "save_metrics": 0}
+    finally:
+        worker.stop(); worker.join(5)
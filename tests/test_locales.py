@@ -0,0 +1,47 @@
+from translator_core import locales, pipelines, subtitles
+
+
+def test_er_to_re_with_suffixes():
+    assert locales.localize_spelling("centered theaters fibers centering", "EN-GB") == "centred theatres fibres centring"
+    assert locales.localize_spelling("Fibered cables.", "EN-GB") == "Fibred cables."
+
+
+def test_protected_spans_are_unchanged():
+    text = 'The color #colorful #color <font color="red">gray</font> https://ex.com/color-center a@color.com'
+    assert locales.localize_spelling(text, "EN-GB") == 'The colour #colorful #color <font color="red">grey</font> https://ex.com/color-center a@color.com'
+
+
+def test_proper_nouns_mid_sentence_are_unchanged():
+    assert locales.localize_spelling("We met at World Trade Center. Color matters", "EN-AU") == "We met at World Trade Center. Colour matters"
+
+
+def test_canadian_keeps_ize_and_us_has_no_rules():
+    assert locales.localize_spelling("organize the color", "EN-CA") == "organize the colour"
+    assert locales.localize_spelling("organize the color", "EN-US") == "organize the color"
+
+
+def test_variant_classes_translate_english_once():
+    targets = [("de", "독일어"), ("en-GB", "영어 (영국)"), ("en-US", "영어 (미국)"), ("en-IE", "영어 (아일랜드)")]
+    classes = locales.variant_classes(targets)
+    assert [rep for rep, _ in classes] == [("de", "독일어"), ("en-US", "영어 (미국)")]
+    assert [name for _, name, _ in classes[1][1]] == ["영어 (영국)", "영어 (아일랜드)"]
+
+
+# 미국 영어가 대상에 없어도 영국/캐나다는 미국식 번역 하나에서 만들어져야 함 (영국식에서 캐나다식을 만들면 -ise가 남음)
+def test_variants_without_us_target_derive_from_us_base(monkeypatch):
+    targets = [("en-GB", "영어 (영국)"), ("en-CA", "영어 (캐나다)")]
+    classes = locales.variant_classes(targets)
+    assert [rep for rep, _ in classes] == [("en-US", "영어 (미국)")]
+    assert [key for key, _, _ in classes[0][1]] == ["en-GB", "en-CA"]
+
+    subs, _ = subtitles.load_subtitle("1\n00:00:01,000 --> 00:00:02,000\n원문\n", "srt")
+    requested, files = [], {}
+
+    def fake_translate(texts, targets, on_language_done, **kwargs):
+        requested.extend(targets)
+        for _, name in targets: on_language_done(name, ["Organize the color"] * len(texts), 0)
+    monkeypatch.setattr(pipelines, "translate_languages_concurrently", fake_translate)
+    pipelines.translate_subtitle_file(subs, "srt", targets, lambda name, data, failed: files.__setitem__(name, data.decode("utf-8")), source_lang="KO")
+    assert requested == [("en-US", "영어 (미국)")]
+    assert sorted(files) == ["영어 (영국)", "영어 (캐나다)"]
+    assert "Organise the colour" in files["영어 (영국)"] and "Organize the colour" in files["영어 (캐나다)"]
@@ -0,0 +1,32 @@
+import json
+from translator_core import gemini, metadata
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text, self.usage_metadata = text, None
+
+
+# 문단마다 챕터 시간은 그대로 두고 나머지 글자만 대문자로 바꾸는 가짜 모델
+class ChapterModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        texts = json.loads(prompt[prompt.rindex("Input JSON:") + 11:].strip())
+        response = FakeResponse(json.dumps({"de": [t.upper() for t in texts]}))
+        return [response] if stream else response
+
+
+# 설명란의 YouTube 챕터 줄(00:00 Intro)은 시간 보존 규칙이 담긴 지침으로 번역되어야 함
+def test_description_chapters_use_timestamp_rule(tmp_path, monkeypatch):
+    fake = ChapterModel()
+    monkeypatch.setattr(gemini, "_model", fake)
+    monkeypatch.setattr(gemini, "gemini_limiter", gemini.RateLimiter(10**9))
+    description = "Watch the whole process.\n\n00:00 Intro\n01:30 Casting\n1:02:30 Firing"
+    translated, errors = metadata.translate_description(description, (("de", "독일어"),), tm=gemini.TranslationMemory(str(tmp_path / "tm.sqlite3")))
+    assert not errors
+    assert translated["de"] == "WATCH THE WHOLE PROCESS.\n\n00:00 INTRO\n01:30 CASTING\n1:02:30 FIRING"
+    assert len(fake.prompts) == 1 and "Do NOT translate or change timestamps" in fake.prompts[0]
+    assert "00:00 Intro\n01:30 Casting" in fake.prompts[0].replace("\\n", "\n")
@@ -0,0 +1,37 @@
+import threading
+from translator_core import gemini
+from translator_core.metrics import Metrics
+
+
+# 동시에 도는 두 실행은 서로의 값을 받지 않고, 전체 지표에는 둘 다 쌓여야 함
+def test_runs_in_other_threads_are_not_mixed():
+    metrics = Metrics()
+    barrier, summaries = threading.Barrier(2), {}
+
+    def run(name, value):
+        with metrics.run() as recorder:
+            barrier.wait()
+            metrics.count("gemini.prompt_tokens", value)
+            with metrics.span(name): pass
+            barrier.wait()
+        summaries[name] = recorder.snapshot()
+
+    threads = [threading.Thread(target=run, args=args) for args in (("a", 1), ("b", 10))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert summaries["a"]["counters"] == {"gemini.prompt_tokens": 1} and list(summaries["a"]["spans"]) == ["a"]
+    assert summaries["b"]["counters"] == {"gemini.prompt_tokens": 10} and list(summaries["b"]["spans"]) == ["b"]
+    assert metrics.snapshot()["counters"] == {"gemini.prompt_tokens": 11}
+
+
+# 요청 작업자 스레드 풀에서 기록한 값은 풀을 만든 쪽의 실행(바깥 실행 포함)에 들어가야 함
+def test_request_pool_workers_record_into_callers_run():
+    metrics = gemini.metrics
+    with metrics.run() as outer:
+        with metrics.run() as inner:
+            pool = gemini.request_pool(4)
+            for f in [pool.submit(metrics.count, "test.pool_items") for _ in range(8)]: f.result()
+            pool.shutdown()
+    assert inner.counters == {"test.pool_items": 8} and outer.counters == {"test.pool_items": 8}
+    with metrics.run() as later: metrics.count("test.other")
+    assert later.counters == {"test.other": 1}
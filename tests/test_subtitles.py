@@ -0,0 +1,33 @@
+from translator_core import subtitles
+
+
+# 본문이 없는 자막이 다음 자막의 번호/시간 줄을 본문으로 삼키지 않아야 함
+def test_srt_empty_cue_keeps_next_cue():
+    content = ("1\n00:00:01,000 --> 00:00:02,000\n\n"
+               "2\n00:00:03,000 --> 00:00:04,000\nHello\n\n"
+               "3\n00:00:05,000 --> 00:00:06,000\nWorld\nsecond line\n")
+    table = subtitles.parse_srt(content)
+    assert table.texts == ["", "Hello", "World\nsecond line"]
+    assert list(table.start_ms) == [1000, 3000, 5000]
+    assert list(table.end_ms) == [2000, 4000, 6000]
+
+
+def test_srt_empty_cue_without_blank_line():
+    table = subtitles.parse_srt("1\n00:00:01,000 --> 00:00:02,000\n2\n00:00:03,000 --> 00:00:04,000\nHello\n")
+    assert table.texts == ["", "Hello"]
+    assert list(table.start_ms) == [1000, 3000]
+
+
+def test_sbv_empty_cue_is_skipped_without_losing_next_cue():
+    content = ("0:00:01.000,0:00:02.000\n\n"
+               "0:00:03.000,0:00:04.000\nHello &amp; bye\n\n"
+               "0:00:05.000,0:00:06.000\nWorld")
+    table = subtitles.parse_sbv(content)
+    assert table.texts == ["Hello & bye", "World"]
+    assert list(table.start_ms) == [3000, 5000]
+
+
+def test_sbv_empty_cue_followed_directly_by_timing_line():
+    table = subtitles.parse_sbv("0:00:01.000,0:00:02.000\n0:00:03.000,0:00:04.000\nHi")
+    assert table.texts == ["Hi"]
+    assert list(table.start_ms) == [3000]
@@ -0,0 +1,49 @@
+import threading
+from translator_core import tts
+
+
+# 같은 키를 다시 저장해도 total_bytes는 디스크의 실제 크기와 같아야 함
+def test_put_overwrite_does_not_double_count(tmp_path):
+    cache = tts.TTSAudioCache(str(tmp_path), max_bytes=10 ** 6)
+    cache.put("voice", "model", "hello", b"x" * 100)
+    cache.put("voice", "model", "hello", b"y" * 60)
+    assert cache.total_bytes == 60
+    assert cache.get("voice", "model", "hello") == b"y" * 60
+    assert tts.TTSAudioCache(str(tmp_path)).total_bytes == 60
+
+
+def _client(calls):
+    client = tts.ElevenLabsClient("key", max_concurrency=4)
+    lock = threading.Lock()
+
+    def synthesize(text, voice_id, model_id=None):
+        with lock: calls.append(text)
+        return text.encode("utf-8"), None
+    client.synthesize = synthesize
+    return client
+
+
+# 한 번의 실행에서 같은 텍스트는 한 번만 합성되고, 결과는 모든 구간에 전달되어야 함
+def test_synthesize_many_deduplicates_identical_texts(tmp_path):
+    texts = ["네", "안녕하세요", "네", "감사합니다", "네", "안녕하세요"]
+    for cache in (None, tts.TTSAudioCache(str(tmp_path))):
+        calls = []
+        results = {i: (audio, err) for i, audio, err in _client(calls).synthesize_many(texts, "voice", cache=cache)}
+        assert sorted(calls) == sorted(set(texts))
+        assert results == {i: (text.encode("utf-8"), None) for i, text in enumerate(texts)}
+
+
+class FakeHTTPResponse:
+    def __init__(self, status_code, headers=None, content=b""):
+        self.status_code, self.headers, self.content, self.text = status_code, headers or {}, content, ""
+
+
+# Retry-After: 0이면 지수 대기 없이 바로 다시 시도해야 함
+def test_retry_after_zero_retries_immediately(monkeypatch):
+    client = tts.ElevenLabsClient("key")
+    responses = [FakeHTTPResponse(429, {"Retry-After": "0"}), FakeHTTPResponse(429), FakeHTTPResponse(200, content=b"mp3")]
+    monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: responses.pop(0))
+    sleeps = []
+    monkeypatch.setattr(tts.time, "sleep", sleeps.append)
+    assert client.synthesize("hello", "voice") == (b"mp3", None)
+    assert sleeps == [0, 2]
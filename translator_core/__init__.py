@@ -0,0 +1,9 @@
+"""자막 번역과 AI 더빙 핵심 패키지 (웹앱 app.py와 명령행 도구 cli.py가 함께 사용)."""
+import importlib
+
+# 하위 모듈은 처음 접근할 때 임포트되므로 번역만 하는 작업은 numpy/pydub 등 오디오 의존성을 읽지 않음
+_SUBMODULES = ("archive", "audio", "bench", "cli", "compression", "config", "gemini", "jobs", "locales", "metadata", "metrics", "pipelines", "subtitles", "tts", "youtube")
+
+def __getattr__(name):
+    if name in _SUBMODULES: return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,5 @@
+"""python -m translator_core 실행 진입점 (cli.main으로 전달)."""
+import sys
+from .cli import main
+
+sys.exit(main())
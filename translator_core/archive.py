@@ -0,0 +1,47 @@
+"""ZIP 멤버를 하나씩 압축해 스트리밍 또는 한 번에 아카이브로 조립."""
+import struct
+import time
+import zlib
+from zipfile import ZIP_DEFLATED
+from .metrics import metrics
+
+# 언어별 파일은 완료되는 시점에 한 번만 압축해 "로컬 헤더 + 압축 데이터" 블록으로 보관하고,
+# 최종/중간 ZIP은 보관된 블록을 이어 붙인 뒤 중앙 디렉터리만 새로 써서 만듦 (다시 압축하지 않음)
+# ZIP64는 지원하지 않음 (자막 파일 묶음은 4GB 한도에 한참 못 미침)
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+
+def _dos_time(timestamp):
+    t = time.localtime(timestamp)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+# 파일 하나를 ZIP 로컬 항목(헤더 + deflate 데이터) 바이트로 변환
+def zip_member(name, data, level=zlib.Z_DEFAULT_COMPRESSION, timestamp=None):
+    name_bytes = name.encode('utf-8')
+    flags = 0x800 if not name.isascii() else 0  # 파일 이름이 UTF-8임을 표시 (한글 언어 이름)
+    with metrics.span("archive.compress"):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+    dos_time, dos_date = _dos_time(timestamp or time.time())
+    header = _LOCAL_HEADER.pack(b"PK\x03\x04", 20, flags, ZIP_DEFLATED, dos_time, dos_date,
+                                zlib.crc32(data), len(compressed), len(data), len(name_bytes), 0)
+    return header + name_bytes + compressed
+
+# 로컬 항목들을 이어 붙이고 중앙 디렉터리를 덧붙여 ZIP 바이트 조각을 순서대로 내보냄 (응답으로 바로 흘려보낼 수 있음)
+def iter_zip(members):
+    central, offset = [], 0
+    for member in members:
+        _, version, flags, method, dos_time, dos_date, crc, csize, usize, name_len, _ = _LOCAL_HEADER.unpack_from(member)
+        name = member[_LOCAL_HEADER.size:_LOCAL_HEADER.size + name_len]
+        central.append(_CENTRAL_HEADER.pack(b"PK\x01\x02", 20, version, flags, method, dos_time, dos_date,
+                                            crc, csize, usize, name_len, 0, 0, 0, 0, 0, offset) + name)
+        yield member
+        offset += len(member)
+    directory = b"".join(central)
+    yield directory
+    yield _END_RECORD.pack(b"PK\x05\x06", 0, 0, len(central), len(central), len(directory), offset, 0)
+
+def build_zip(members):
+    with metrics.span("archive.build"): return b"".join(iter_zip(members))
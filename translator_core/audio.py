@@ -0,0 +1,200 @@
+"""더빙 오디오 처리: 무음 제거, 길이 맞추기, 타임라인 믹싱, 출력 형식 변환."""
+import io
+import os
+import struct
+import subprocess
+import wave
+import numpy as np
+from pydub import AudioSegment
+from .metrics import metrics
+
+# 다국어 일괄 더빙의 프로세스 풀 작업자에서도 임포트함
+
+# --- 더빙 타임라인 출력 형식 (ElevenLabs 기본 mp3_44100 모노와 동일) ---
+DUB_FRAME_RATE = 44100
+DUB_CHANNELS = 1
+
+# --- 오디오 프로세싱 함수 ---
+# raw 바이트를 복사 없이 (프레임, 채널) 형태의 NumPy 배열로 해석
+def audio_samples(audio_segment):
+    if audio_segment.sample_width in (1, 2, 4):
+        dtype = {1: np.int8, 2: np.int16, 4: np.int32}[audio_segment.sample_width]
+        samples = np.frombuffer(audio_segment.raw_data, dtype=dtype)
+    else:
+        samples = np.asarray(audio_segment.get_array_of_samples())
+    return samples.reshape(-1, audio_segment.channels)
+
+# 10ms 창 단위 RMS를 벡터 연산으로 계산해 앞/뒤 무음 경계(ms)를 반환 (기존 -50 dBFS 기준 유지)
+# 양 끝에서부터 창 묶음을 두 배씩 넓혀 가며 검사하므로 작업량은 무음 길이에 비례함
+def silence_bounds(audio_segment, silence_thresh=-50.0, step_ms=10):
+    length_ms = len(audio_segment)
+    if length_ms == 0: return 0, 0
+    channels = audio_segment.channels
+    flat = audio_samples(audio_segment).reshape(-1)
+    frame_count = len(flat) // channels
+    frames_per_ms = audio_segment.frame_rate / 1000.0
+    # dBFS > thresh  <=>  평균 제곱 > (최대 진폭 * 10^(thresh/20))^2
+    limit = (audio_segment.max_possible_amplitude * 10 ** (silence_thresh / 20.0)) ** 2
+
+    def first_loud(starts_ms):
+        batch = 64
+        for pos in range(0, len(starts_ms), batch):
+            window = starts_ms[pos:pos+batch]; batch *= 2
+            # 한 묶음의 창들은 서로 맞닿아 있으므로 오름차순으로 정렬해 reduceat 한 번으로 창별 제곱합을 구함
+            ordered = np.sort(window)
+            a = np.minimum((ordered * frames_per_ms).astype(np.int64), frame_count) * channels
+            b = np.minimum((np.minimum(ordered + step_ms, length_ms) * frames_per_ms).astype(np.int64), frame_count) * channels
+            valid = b > a
+            loud = np.zeros(len(ordered), dtype=bool)
+            if valid.any():
+                a, b = a[valid], b[valid]
+                squares = flat[a[0]:b[-1]].astype(np.float32)
+                sums = np.add.reduceat(np.multiply(squares, squares, out=squares), a - a[0])
+                loud[valid] = sums / (b - a) > limit
+            if window[0] > window[-1]: loud = loud[::-1]
+            hits = np.flatnonzero(loud)
+            if len(hits): return int(window[hits[0]])
+        return None
+
+    start_trim = first_loud(np.arange(0, length_ms, step_ms))
+    end_trim = first_loud(np.arange(length_ms - step_ms, 0, -step_ms))
+    start_trim = 0 if start_trim is None else start_trim
+    end_trim = length_ms if end_trim is None else end_trim + step_ms
+    if start_trim >= end_trim: return 0, length_ms
+    return start_trim, end_trim
+
+def remove_silence(audio_segment, silence_thresh=-50.0):
+    start_trim, end_trim = silence_bounds(audio_segment, silence_thresh)
+    # 잘라낼 무음이 없으면 복사 없이 원본 객체를 그대로 반환
+    if start_trim == 0 and end_trim >= len(audio_segment): return audio_segment
+    return audio_segment[start_trim:end_trim]
+
+# --- WSOLA 시간 압축: 창(30ms)마다 ±10ms 범위에서 직전 구간과 파형이 가장 잘 이어지는 위치를 골라 겹쳐 더함 ---
+# samples: (프레임, 채널) 배열 / 반환: 정확히 out_frames 길이의 float32 배열 (같은 입력이면 항상 같은 결과)
+def time_stretch(samples, out_frames, frame_rate, window_ms=30, tolerance_ms=10):
+    samples = np.asarray(samples, dtype=np.float32)
+    win = max(16, int(frame_rate * window_ms / 1000)) // 2 * 2
+    hop_out, tol = win // 2, int(frame_rate * tolerance_ms / 1000)
+    hop_in = (len(samples) - win) / max(out_frames - win, 1) * hop_out if len(samples) > win else 0.0
+    window = np.hanning(win).astype(np.float32)
+
+    pad = tol + win
+    padded = np.pad(samples, ((pad, pad + win), (0, 0)))
+    mono = padded.mean(axis=1)
+    output = np.zeros((out_frames + win, samples.shape[1]), dtype=np.float32)
+    norm = np.zeros(out_frames + win, dtype=np.float32)
+    n_fft = 1 << int(np.ceil(np.log2(2 * tol + 2 * hop_out + 1)))
+
+    prev = pad
+    for k in range(int(np.ceil(out_frames / hop_out)) + 1):
+        nominal = pad + min(int(round(k * hop_in)), max(len(samples) - win, 0))
+        if k == 0:
+            best = nominal
+        else:
+            # 직전 구간의 자연스러운 다음 파형(template)과 후보 구간의 상호상관을 FFT로 한 번에 계산
+            template = mono[prev + hop_out:prev + 2 * hop_out]
+            region = mono[nominal - tol:nominal + tol + hop_out]
+            corr = np.fft.irfft(np.fft.rfft(region, n_fft) * np.conj(np.fft.rfft(template, n_fft)), n_fft)[:2 * tol + 1]
+            best = nominal - tol + int(np.argmax(corr))
+        o = k * hop_out
+        if o >= out_frames: break
+        output[o:o + win] += padded[best:best + win] * window[:, None]
+        norm[o:o + win] += window
+        prev = best
+
+    norm = norm[:out_frames]
+    return output[:out_frames] / np.maximum(norm, 1e-3)[:, None]
+
+def match_target_duration(audio_segment, target_duration_ms):
+    if len(audio_segment) > 0:
+        audio_segment = remove_silence(audio_segment)
+    
+    current_duration_ms = len(audio_segment)
+    if current_duration_ms == 0:
+        return AudioSegment.silent(duration=int(target_duration_ms))
+        
+    if current_duration_ms <= target_duration_ms:
+        return audio_segment
+
+    # 목표 길이에 딱 맞는 프레임 수로 한 번에 압축하므로 잘라내기(truncation) 경로가 없음
+    out_frames = max(1, int(target_duration_ms * audio_segment.frame_rate / 1000))
+    stretched = time_stretch(audio_samples(audio_segment), out_frames, audio_segment.frame_rate)
+    peak = audio_segment.max_possible_amplitude
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(audio_segment.sample_width, np.int32)
+    data = np.clip(np.round(stretched), -peak, peak - 1).astype(dtype)
+    return AudioSegment(data=data.tobytes(), sample_width=np.dtype(dtype).itemsize,
+                        frame_rate=audio_segment.frame_rate, channels=audio_segment.channels)
+
+# --- 더빙 타임라인 믹서: 전체 길이 버퍼를 한 번만 할당하고 구간 샘플을 제자리에서 합산 ---
+# path를 주면 버퍼 자체가 그 WAV 파일의 데이터 영역(메모리 맵)이 되어, 트랙 길이와 무관하게 힙 메모리를 쓰지 않음
+class TimelineMixer:
+    def __init__(self, duration_ms, frame_rate=DUB_FRAME_RATE, channels=DUB_CHANNELS, path=None):
+        self.frame_rate, self.channels, self.path = frame_rate, channels, path
+        frames = int(duration_ms * frame_rate / 1000)
+        if path is None:
+            self.buffer = np.zeros((frames, channels), dtype=np.int16)
+        else:
+            data_bytes = frames * channels * 2
+            with open(path, "wb") as f:
+                f.write(self.wav_header(data_bytes))
+                f.truncate(44 + data_bytes)
+            self.buffer = np.memmap(path, dtype=np.int16, mode="r+", offset=44, shape=(frames, channels))
+
+    def wav_header(self, data_bytes):
+        block_align = self.channels * 2
+        return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, self.channels,
+                           self.frame_rate, self.frame_rate * block_align, block_align, 16, b"data", data_bytes)
+
+    def add(self, audio_segment, position_ms):
+        seg = audio_segment.set_frame_rate(self.frame_rate).set_channels(self.channels).set_sample_width(2)
+        samples = audio_samples(seg)
+        start = int(position_ms * self.frame_rate / 1000)
+        end = min(start + len(samples), len(self.buffer))
+        if end <= start: return
+        # 겹치는 구간만 int32로 더한 뒤 16비트 범위로 잘라 넣음 (클리핑 방지)
+        region = self.buffer[start:end]
+        mixed = region.astype(np.int32)
+        mixed += samples[:end - start]
+        np.clip(mixed, -32768, 32767, out=mixed)
+        region[...] = mixed
+
+    def write_wav(self, fileobj):
+        with wave.open(fileobj, "wb") as wf:
+            wf.setnchannels(self.channels); wf.setsampwidth(2); wf.setframerate(self.frame_rate)
+            wf.writeframes(self.buffer)
+
+    # 파일 기반 믹서의 내용을 디스크에 확정하고 WAV 경로를 반환
+    def close(self):
+        if isinstance(self.buffer, np.memmap):
+            self.buffer.flush()
+            self.buffer = None
+        return self.path
+
+# --- WAV 파일을 ffmpeg 한 번의 스트리밍 패스로 FLAC/MP3로 인코딩 (WAV는 그대로 반환) ---
+AUDIO_EXPORT_FORMATS = {
+    "WAV": ("wav", "audio/wav", None),
+    "FLAC": ("flac", "audio/flac", ["-c:a", "flac"]),
+    "MP3": ("mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", "192k"]),
+}
+
+def encode_audio_file(wav_path, fmt):
+    ext, _, codec_args = AUDIO_EXPORT_FORMATS[fmt]
+    if codec_args is None: return wav_path
+    out_path = os.path.splitext(wav_path)[0] + "." + ext
+    with metrics.span("audio.encode"): proc = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", wav_path, *codec_args, out_path], capture_output=True)
+    if proc.returncode != 0: raise Exception(f"오디오 인코딩 실패: {proc.stderr.decode('utf-8', 'replace').strip()}")
+    return out_path
+
+# --- 프로세스 풀 작업: 한 언어의 구간 음성을 무음 제거/시간 압축 후 타임라인에 믹싱해 WAV 파일로 저장 ---
+# segments: [{'start_ms', 'end_ms', ...}], clips: 구간별 mp3 바이트 (합성 실패 구간은 None)
+# 반환: (WAV 경로, 이 작업에서 모은 지표 snapshot) — 작업자 프로세스의 지표는 부모 프로세스가 합침
+def render_dub_track(segments, clips, total_duration_ms, out_path):
+    with metrics.run() as run:
+        mixer = TimelineMixer(total_duration_ms, path=out_path)
+        for seg, clip in zip(segments, clips):
+            if clip is None: continue
+            with metrics.span("audio.decode"): seg_audio = AudioSegment.from_file(io.BytesIO(clip), format="mp3")
+            with metrics.span("audio.match_duration"): fitted = match_target_duration(seg_audio, seg['end_ms'] - seg['start_ms'])
+            with metrics.span("audio.mix"): mixer.add(fitted, seg['start_ms'])
+        path = mixer.close()
+    return path, run.snapshot()
@@ -0,0 +1,325 @@
+"""가짜 Gemini/ElevenLabs로 단계별 처리 시간과 메모리를 재는 오프라인 성능 측정."""
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from . import gemini, subtitles
+from .config import MAX_CONCURRENT_REQUESTS, TARGET_LANGUAGES
+
+# API 비용 없이 회귀/개선을 추적
+# 합성 SBV/SRT 생성기와 지연/실패율/배열 길이 불일치율을 조절할 수 있는 가짜 Gemini·ElevenLabs 백엔드를 제공하고,
+# 단계마다 처리량, 최대 메모리(tracemalloc), 경과 시간을 측정함
+# 실행: python -m translator_core bench [--sizes 100,1000,20000] [--output bench.jsonl]
+# 오디오 모듈(numpy, pydub)은 오디오 단계에서만 임포트하고, 실제 더빙 단계는 mp3 디코딩에 ffmpeg가 있을 때만 실행
+
+STAGES = ("parse_srt", "parse_sbv", "merge", "translate", "remove_silence", "match_duration", "time_stretch", "overlay", "dub")
+
+# --- 합성 자막 생성기: 길이가 다양한 영어 문장을 2~4줄에 걸쳐 나누고, 가끔 문장 사이에 공백 구간을 둠 ---
+_WORDS = ("steel", "furnace", "workers", "carefully", "shape", "the", "molten", "glass", "into", "precise", "frames",
+          "factory", "machines", "press", "each", "sheet", "while", "sparks", "fly", "across", "wooden", "beams")
+
+def synthetic_cues(count, seed=0):
+    rng = random.Random(seed)
+    starts, ends, texts = [], [], []
+    t = 1000
+    for i in range(count):
+        duration = rng.randint(1200, 5200)
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(3, 11))]
+        text = " ".join(words).capitalize() if i % 3 == 0 else " ".join(words)
+        if i % 3 == 2 or i == count - 1: text += rng.choice(".!?")
+        if rng.random() < 0.15: text = text.replace(" ", "\n", 1)
+        starts.append(t); ends.append(t + duration); texts.append(text)
+        t += duration + (rng.randint(300, 2500) if i % 3 == 2 else 0)
+    return subtitles.SubtitleTable(starts, ends, texts)
+
+def synthetic_srt(count, seed=0):
+    return subtitles.to_srt(synthetic_cues(count, seed))
+
+def synthetic_sbv(count, seed=0):
+    return subtitles.to_sbv(synthetic_cues(count, seed))
+
+# --- 가짜 Gemini 모델: 목록 번역 프롬프트를 해석해 언어별 배열을 돌려줌 (stream=True면 조각으로 나눠 보냄) ---
+# latency: 요청당 평균 지연(초, ±50% 무작위) / failure_rate: 예외 발생 확률 / mismatch_rate: 언어 하나의 배열에서 마지막 줄을 빼는 확률
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGeminiModel:
+    def __init__(self, latency=0.05, failure_rate=0.0, mismatch_rate=0.0, seed=0, stream_chunk_chars=400):
+        self.latency, self.failure_rate, self.mismatch_rate = latency, failure_rate, mismatch_rate
+        self.stream_chunk_chars = stream_chunk_chars
+        self.rng, self.lock = random.Random(seed), threading.Lock()
+        self.calls = self.failures = self.mismatches = 0
+
+    def _roll(self):
+        with self.lock:
+            self.calls += 1
+            return self.rng.uniform(0.5, 1.5), self.rng.random(), self.rng.random()
+
+    def _answer(self, prompt):
+        jitter, fail, mismatch = self._roll()
+        time.sleep(self.latency * jitter)
+        if fail < self.failure_rate:
+            with self.lock: self.failures += 1
+            raise Exception("가짜 Gemini 오류 (failure_rate)")
+        targets = json.loads(re.search(r'Target languages \(key: language\): (\{.*?\})\n', prompt).group(1))
+        if "Input JSON:" not in prompt:
+            text = prompt[prompt.rindex("Input text:") + 11:].strip()
+            return json.dumps({k: f"[{k}] {text}" for k in targets}, ensure_ascii=False)
+        items = json.loads(prompt[prompt.rindex("Input JSON:") + 11:])
+        answer = {k: [f"[{k}] {t}" for t in items] for k in targets}
+        if mismatch < self.mismatch_rate and len(items) > 1:
+            with self.lock: self.mismatches += 1
+            answer[next(iter(answer))].pop()
+        return json.dumps(answer, ensure_ascii=False)
+
+    def generate_content(self, prompt, stream=False):
+        text = self._answer(prompt)
+        if not stream: return _FakeResponse(text)
+        size = self.stream_chunk_chars
+        return (_FakeResponse(text[i:i + size]) for i in range(0, len(text), size))
+
+# --- 가짜 ElevenLabs 서버: POST /v1/text-to-speech/<voice_id>에 글자 수에 비례한 길이의 mp3를 응답 ---
+# 실패는 503(재시도 대상)으로 응답하며, mp3 생성에 ffmpeg가 필요함
+class FakeElevenLabsServer:
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=0, ms_per_char=55):
+        self.latency, self.failure_rate, self.ms_per_char = latency, failure_rate, ms_per_char
+        self.rng, self.lock = random.Random(seed), threading.Lock()
+        self.clips, self.requests, self.characters = {}, 0, 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                text = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["text"]
+                with server.lock:
+                    server.requests += 1; server.characters += len(text)
+                    jitter, fail = server.rng.uniform(0.5, 1.5), server.rng.random()
+                time.sleep(server.latency * jitter)
+                if fail < server.failure_rate:
+                    self.send_response(503); self.send_header("Retry-After", "0"); self.end_headers(); return
+                body = server.clip(len(text) * server.ms_per_char)
+                self.send_response(200); self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(body))); self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    # 길이를 250ms 단위로 묶어 같은 길이의 mp3는 한 번만 인코딩
+    def clip(self, duration_ms):
+        bucket = max(250, int(duration_ms) // 250 * 250)
+        with self.lock:
+            if bucket not in self.clips:
+                buf = io.BytesIO()
+                synthetic_speech(bucket).export(buf, format="mp3")
+                self.clips[bucket] = buf.getvalue()
+            return self.clips[bucket]
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+# --- 합성 음성: 앞뒤 무음 사이에 진폭이 출렁이는 톤을 넣어 무음 제거/시간 압축이 실제로 일하게 만듦 ---
+def synthetic_speech(duration_ms, frame_rate=44100, lead_ms=250, tail_ms=350, seed=0):
+    import numpy as np
+    from pydub import AudioSegment
+    rng = np.random.default_rng(seed + duration_ms)
+    frames = int(duration_ms * frame_rate / 1000)
+    t = np.arange(frames) / frame_rate
+    voice = (np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 410 * t)) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    voice = voice * 9000 + rng.normal(0, 300, frames)
+    lead, tail = np.zeros(int(lead_ms * frame_rate / 1000)), np.zeros(int(tail_ms * frame_rate / 1000))
+    data = np.concatenate([lead, voice, tail]).astype(np.int16)
+    return AudioSegment(data=data.tobytes(), sample_width=2, frame_rate=frame_rate, channels=1)
+
+# --- 측정 ---
+# 시간은 tracemalloc 없이 측정하고, 최대 메모리는 같은 작업을 tracemalloc을 켠 채 한 번 더 실행해 측정 (추적 부하가 시간에 섞이지 않음)
+# run()은 매번 새 입력으로 작업을 수행하고 처리한 항목 수를 반환함
+def measure(stage, size, unit, run, measure_memory=True, extra=None):
+    started = time.perf_counter()
+    items = run()
+    wall = time.perf_counter() - started
+    peak_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    result = {"stage": stage, "size": size, "items": items, "unit": unit, "wall_s": round(wall, 4),
+              "throughput": round(items / wall, 1) if wall > 0 else None, "peak_mb": round(peak_mb, 2) if peak_mb is not None else None}
+    if extra: result.update(extra() if callable(extra) else extra)
+    return result
+
+# 가짜 모델과 사실상 무제한 속도 제한기를 끼운 채로 실행하고 원래 설정으로 되돌림
+class _patched_gemini:
+    def __init__(self, model):
+        self.model = model
+
+    def __enter__(self):
+        self.saved = gemini._model, gemini.gemini_limiter
+        gemini._model, gemini.gemini_limiter = self.model, gemini.RateLimiter(10**9)
+        return self.model
+
+    def __exit__(self, *exc):
+        gemini._model, gemini.gemini_limiter = self.saved
+
+def _bench_translate(subs, size, args, workdir):
+    targets = [(uk, ld["name"]) for uk, ld in TARGET_LANGUAGES.items() if not ld["name"].startswith("영어")][:args.langs]
+    model = FakeGeminiModel(args.latency, args.failure_rate, args.mismatch_rate, args.seed)
+    failed = {}
+
+    def run():
+        # 번역 메모리가 비어 있는 상태(첫 실행)를 재기 위해 매번 새 DB를 사용
+        tm = gemini.TranslationMemory(os.path.join(tempfile.mkdtemp(dir=workdir), "tm.sqlite3"))
+        model.calls = model.failures = model.mismatches = 0
+        def on_language_done(lang_name, texts, failed_chunks): failed[lang_name] = failed_chunks
+        gemini.translate_languages_concurrently(subs.texts, targets, on_language_done, max_workers=args.workers, tm=tm)
+        tm.conn.close()
+        return len(subs) * len(targets)
+
+    with _patched_gemini(model):
+        return measure("translate", size, "lines", run, args.memory,
+                       lambda: {"languages": len(targets), "gemini_calls": model.calls, "gemini_failures": model.failures,
+                                "length_mismatches": model.mismatches, "failed_chunks": sum(failed.values())})
+
+def _audio_inputs(segments):
+    # 목표 길이보다 약 20% 긴 음성을 만들어 시간 압축이 일어나게 함 (같은 길이는 한 번만 생성)
+    clips = {}
+    for seg in segments:
+        duration = (seg['end_ms'] - seg['start_ms']) * 6 // 5 // 50 * 50
+        if duration not in clips: clips[duration] = synthetic_speech(duration)
+    return [clips[(seg['end_ms'] - seg['start_ms']) * 6 // 5 // 50 * 50] for seg in segments]
+
+# 비교 기준: WSOLA 이전의 pydub speedup 경로 (speedup 결과가 목표보다 길면 뒷부분을 잘라내고, 잘라낸 길이를 truncated에 기록)
+def speedup_baseline(audio_segment, target_duration_ms, truncated):
+    from pydub.effects import speedup
+    from .audio import remove_silence
+    audio_segment = remove_silence(audio_segment)
+    if len(audio_segment) <= target_duration_ms: return audio_segment
+    try: refined = speedup(audio_segment, playback_speed=len(audio_segment) / target_duration_ms)
+    except Exception: refined = audio_segment
+    truncated.append(max(0, len(refined) - int(target_duration_ms)))
+    return refined[:int(target_duration_ms)]
+
+# 같은 음성으로 WSOLA(match_target_duration)와 기존 speedup 경로를 각각 측정 (truncated_ms: 목표 길이를 넘어 잘려 나간 음성 합계)
+def _bench_time_stretch(segments, clips, size, args, extra):
+    from .audio import match_target_duration
+    methods = (("wsola", lambda c, target, truncated: match_target_duration(c, target)), ("speedup", speedup_baseline))
+    results = []
+    for method, stretch in methods:
+        truncated = []
+        def run(stretch=stretch, truncated=truncated):
+            truncated.clear()
+            return sum(1 for seg, c in zip(segments, clips) if stretch(c, seg['end_ms'] - seg['start_ms'], truncated) is not None)
+        results.append(measure("time_stretch", size, "segments", run, args.memory,
+                               lambda truncated=truncated, method=method: {"method": method, "truncated_ms": sum(truncated), **extra}))
+    return results
+
+def _bench_dub(subs, size, args, workdir):
+    from . import pipelines, tts
+    with FakeElevenLabsServer(args.latency, args.failure_rate, args.seed) as server:
+        client = tts.ElevenLabsClient("bench", base_url=server.url)
+        # 요청 전에 mp3를 미리 인코딩해 두어 인코딩 시간이 측정에 섞이지 않게 함
+        for seg in subtitles.merge_pysrt_items(subs): server.clip(len(seg['text']) * server.ms_per_char)
+        def run():
+            server.requests = server.characters = 0
+            failed = pipelines.dub_subtitle(subs, client, "bench-voice", os.path.join(workdir, "dub.wav"))
+            return len(subtitles.merge_pysrt_items(subs)) - failed
+        return measure("dub", size, "segments", run, args.memory,
+                       lambda: {"tts_requests": server.requests, "tts_characters": server.characters})
+
+def run_benchmarks(args, on_result=None):
+    stages = set(args.stages)
+    results = []
+    def report(result):
+        results.append(result)
+        if on_result: on_result(result)
+
+    workdir = tempfile.mkdtemp(prefix="translator-bench-")
+    try:
+        for size in args.sizes:
+            srt, sbv = synthetic_srt(size, args.seed), synthetic_sbv(size, args.seed)
+            subs = subtitles.parse_srt(srt)
+            if "parse_srt" in stages: report(measure("parse_srt", size, "cues", lambda: len(subtitles.load_subtitle(srt, "srt")[0]), args.memory))
+            if "parse_sbv" in stages: report(measure("parse_sbv", size, "cues", lambda: len(subtitles.load_subtitle(sbv, "sbv")[0]), args.memory))
+            if "merge" in stages: report(measure("merge", size, "cues", lambda: len(subs) if subtitles.merge_pysrt_items(subs) else 0, args.memory))
+            if "translate" in stages: report(_bench_translate(subs, size, args, workdir))
+
+            audio_stages = stages & {"remove_silence", "match_duration", "time_stretch", "overlay", "dub"}
+            if not audio_stages or size > args.max_audio_size: continue
+            from .audio import TimelineMixer, match_target_duration, remove_silence
+            segments = subtitles.merge_pysrt_items(subs)
+            clips = _audio_inputs(segments)
+            audio_seconds = sum(len(c) for c in clips) / 1000
+            per_second = {"audio_seconds": round(audio_seconds, 1)}
+            if "remove_silence" in stages:
+                report(measure("remove_silence", size, "segments", lambda: sum(1 for c in clips if remove_silence(c) is not None), args.memory, per_second))
+            if "match_duration" in stages:
+                report(measure("match_duration", size, "segments",
+                               lambda: sum(1 for seg, c in zip(segments, clips) if match_target_duration(c, seg['end_ms'] - seg['start_ms'])), args.memory, per_second))
+            if "time_stretch" in stages:
+                for result in _bench_time_stretch(segments, clips, size, args, per_second): report(result)
+            if "overlay" in stages:
+                def overlay():
+                    mixer = TimelineMixer(segments[-1]['end_ms'] + 5000, path=os.path.join(workdir, "overlay.wav"))
+                    for seg, c in zip(segments, clips): mixer.add(match_target_duration(c, seg['end_ms'] - seg['start_ms']), seg['start_ms'])
+                    mixer.close()
+                    return len(segments)
+                report(measure("overlay", size, "segments", overlay, args.memory, per_second))
+            if "dub" in stages:
+                if shutil.which("ffmpeg"): report(_bench_dub(subs, size, args, workdir))
+                else: report({"stage": "dub", "size": size, "skipped": "ffmpeg가 없어 mp3를 만들거나 디코딩할 수 없음"})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+# 실행 환경 정보 (결과를 시간에 따라 비교할 때 같은 조건인지 확인용)
+def environment():
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError: rev = None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_rev": rev, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def format_result(r):
+    if "skipped" in r: return f"{r['stage']:<15} {r['size']:>7}  건너뜀: {r['skipped']}"
+    peak = f"{r['peak_mb']:>9.2f}MB" if r["peak_mb"] is not None else f"{'-':>11}"
+    extra = {k: v for k, v in r.items() if k not in ("stage", "size", "items", "unit", "wall_s", "throughput", "peak_mb")}
+    return (f"{r['stage']:<15} {r['size']:>7}  {r['wall_s']:>9.3f}s  {r['throughput'] or 0:>12,.1f} {r['unit']}/s  {peak}"
+            + (f"  {json.dumps(extra, ensure_ascii=False)}" if extra else ""))
+
+def add_arguments(p):
+    p.add_argument("--sizes", default="100,1000,5000,20000", help="합성 자막 줄 수 (쉼표 구분)")
+    p.add_argument("--stages", default=",".join(STAGES), help=f"실행할 단계 (쉼표 구분, 기본: 전체 = {','.join(STAGES)})")
+    p.add_argument("--langs", type=int, default=8, help="번역 단계의 대상 언어 수")
+    p.add_argument("--workers", type=int, default=MAX_CONCURRENT_REQUESTS, help="번역 단계의 동시 요청 수")
+    p.add_argument("--latency", type=float, default=0.05, help="가짜 API 요청당 평균 지연 (초)")
+    p.add_argument("--failure-rate", type=float, default=0.0, help="가짜 API 요청 실패 확률 (0~1)")
+    p.add_argument("--mismatch-rate", type=float, default=0.0, help="가짜 Gemini 배열 길이 불일치 확률 (0~1)")
+    p.add_argument("--max-audio-size", type=int, default=1000, help="오디오 단계를 실행할 최대 줄 수 (큰 크기는 건너뜀)")
+    p.add_argument("--no-memory", dest="memory", action="store_false", help="최대 메모리 측정(작업을 한 번 더 실행) 생략")
+    p.add_argument("--seed", type=int, default=0, help="합성 데이터/가짜 API 난수 시드")
+    p.add_argument("--output", help="결과를 한 줄짜리 JSON으로 덧붙일 파일 (예: bench.jsonl, 실행 기록 누적용)")
+
+def parse_arguments(args):
+    args.sizes = [int(s) for s in str(args.sizes).split(",") if s.strip()]
+    args.stages = [s.strip() for s in str(args.stages).split(",") if s.strip()]
+    unknown = [s for s in args.stages if s not in STAGES]
+    if unknown: raise SystemExit(f"알 수 없는 단계: {', '.join(unknown)} (사용 가능: {', '.join(STAGES)})")
+    return args
@@ -0,0 +1,229 @@
+"""웹앱 없이 자막 번역/더빙/영상 현지화/성능 측정을 일괄 처리하는 명령행 도구 (야간 배치 작업용)."""
+import argparse
+import os
+import shutil
+import sys
+import time
+from .config import MAX_CONCURRENT_REQUESTS, TARGET_LANGUAGES
+
+# 사용법:
+#   translate-subs 입력폴더 출력폴더 --source ko [--langs de,fr,ja] [--workers 6]
+#   dub 입력폴더 출력폴더 [--voice 성우 라벨 또는 Voice ID] [--format WAV|FLAC|MP3]
+#   worker [--exit-when-idle]  (웹앱이 등록한 다국어 번역 작업을 별도 프로세스에서 처리)
+#   localize-videos 영상목록.txt 결과.json [--langs de,fr,ja]  (여러 영상의 제목/설명 localizations JSON 일괄 생성)
+#   bench [--sizes 100,1000,20000] [--output bench.jsonl]  (가짜 API로 오프라인 성능 측정, API 키 불필요)
+# 설치하지 않았다면 python -m translator_core translate-subs ... 형태로 실행
+# API 키는 환경 변수 GEMINI_API_KEY / ELEVENLABS_API_KEY / YOUTUBE_API_KEY (선택: ELEVENLABS_BASE_URL, YOUTUBE_API_ENDPOINT)에서 읽음
+# 무거운 의존성은 각 명령 안에서 임포트하므로 --help와 인자 오류는 즉시 응답함
+# translate-subs / dub / localize-videos는 끝날 때 구간별 소요 시간·토큰·예상 비용을 표준 오류로 출력하고,
+# --metrics-out 파일(.prom이면 Prometheus 텍스트, 그 외 JSON)로도 저장함 (METRICS_LOG_PATH가 설정되어 있으면 JSON 로그에도 덧붙임)
+
+def _subtitle_files(path, exts):
+    if os.path.isfile(path): return [path]
+    return sorted(os.path.join(path, n) for n in os.listdir(path) if n.lower().endswith(exts))
+
+def _read_text(path):
+    with open(path, encoding="utf-8") as f: return f.read()
+
+# 임시 파일에 쓴 뒤 교체하므로 중단되어도 반쯤 쓰인 결과 파일이 남지 않음
+def _write_bytes(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f: f.write(data)
+    os.replace(tmp_path, path)
+
+def _require_env(name):
+    value = os.environ.get(name)
+    if not value: raise SystemExit(f"환경 변수 {name}가 설정되지 않았습니다.")
+    return value
+
+# 원문 언어 코드 (예: en, en-US, ko) -> DeepL 기본 코드 (EN, KO)
+def _source_language(value):
+    base = value.strip().split("-")[0]
+    if not base.isalpha() or len(base) not in (2, 3): raise argparse.ArgumentTypeError(f"올바르지 않은 언어 코드: {value}")
+    return base.upper()
+
+def _select_languages(langs):
+    if not langs: return [(uk, ld["name"]) for uk, ld in TARGET_LANGUAGES.items()]
+    keys = [k.strip() for k in langs.split(",") if k.strip()]
+    unknown = [k for k in keys if k not in TARGET_LANGUAGES]
+    if unknown: raise SystemExit(f"지원하지 않는 언어 코드: {', '.join(unknown)} (사용 가능: {', '.join(TARGET_LANGUAGES)})")
+    return [(k, TARGET_LANGUAGES[k]["name"]) for k in keys]
+
+# --- 다국어 번역: 입력 폴더의 SBV/SRT마다 출력폴더/<파일 이름>/<언어>.<확장자> 생성 ---
+# 이미 결과 파일이 있는 언어는 건너뛰고, 일부 조각이 실패한 언어는 저장하지 않으므로 다시 실행하면 이어서 진행
+# (완료된 줄은 번역 메모리에 남아 있어 실패한 줄만 다시 요청함)
+def translate_subs(args):
+    from . import gemini, pipelines, subtitles
+    gemini.configure(_require_env("GEMINI_API_KEY"))
+    targets = _select_languages(args.langs)
+    failures = 0
+    for path in _subtitle_files(args.input, (".sbv", ".srt")):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        fmt = ext[1:].lower()
+        subs, err = subtitles.load_subtitle(_read_text(path), fmt)
+        if err:
+            print(f"❌ {path}: {err}", file=sys.stderr); failures += 1; continue
+        out_dir = os.path.join(args.output, stem)
+        os.makedirs(out_dir, exist_ok=True)
+        pending = [(uk, name) for uk, name in targets if not os.path.exists(os.path.join(out_dir, f"{name}.{fmt}"))]
+        print(f"⏳ {path}: {len(subs)}줄, {len(pending)}개 언어 번역 시작 (완료된 {len(targets) - len(pending)}개 언어 생략)", flush=True)
+
+        def on_file_done(lang_name, data, failed_chunks):
+            nonlocal failures
+            if failed_chunks:
+                failures += 1
+                print(f"  ❌ {lang_name}: {failed_chunks}개 조각 번역 실패 (다시 실행하면 이어서 진행)", file=sys.stderr, flush=True)
+                return
+            _write_bytes(os.path.join(out_dir, f"{lang_name}.{fmt}"), data)
+            print(f"  ✅ {lang_name}", flush=True)
+
+        pipelines.translate_subtitle_file(subs, fmt, pending, on_file_done, max_workers=args.workers, source_lang=args.source)
+    return 1 if failures else 0
+
+# --- 더빙: 입력 폴더의 SRT마다 출력폴더/<파일 이름>.<형식> 생성 (파일 이름이 언어 이름이면 기본 성우를 자동 선택) ---
+def dub(args):
+    from . import pipelines, tts
+    from .audio import AUDIO_EXPORT_FORMATS, encode_audio_file
+    from .config import ELEVENLABS_BASE_URL, VOICE_OPTIONS
+    fmt = args.format.upper()
+    if fmt not in AUDIO_EXPORT_FORMATS: raise SystemExit(f"지원하지 않는 출력 형식: {args.format} (사용 가능: {', '.join(AUDIO_EXPORT_FORMATS)})")
+    ext = AUDIO_EXPORT_FORMATS[fmt][0]
+    client = tts.ElevenLabsClient(_require_env("ELEVENLABS_API_KEY"), base_url=os.environ.get("ELEVENLABS_BASE_URL", ELEVENLABS_BASE_URL))
+
+    os.makedirs(args.output, exist_ok=True)
+    sources = {}
+    for path in _subtitle_files(args.input, (".srt",)):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if os.path.exists(os.path.join(args.output, f"{stem}.{ext}")): print(f"⏭️ {stem}: 결과 파일이 이미 있어 건너뜀"); continue
+        sources[stem] = _read_text(path)
+    voices = {ln: VOICE_OPTIONS.get(args.voice, args.voice) if args.voice else VOICE_OPTIONS[tts.default_voice_label(ln)] for ln in sources}
+
+    failures = 0
+    def on_status(ln, state):
+        nonlocal failures
+        if state.startswith("❌"): failures += 1
+        print(f"{ln}: {state}", file=sys.stderr if state.startswith("❌") else sys.stdout, flush=True)
+
+    workdir = os.path.join(args.output, ".dub_work")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        rendered = pipelines.dub_languages(sources, voices, client, workdir, cache=tts.get_tts_cache(), on_status=on_status, max_processes=args.jobs)
+        for ln, wav_path in rendered.items():
+            out_path = encode_audio_file(wav_path, fmt)
+            os.replace(out_path, os.path.join(args.output, f"{ln}.{ext}"))
+            if out_path != wav_path: os.remove(wav_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failures else 0
+
+# --- 작업 큐 작업자: 웹앱 서버와 별개로 대기열의 번역 작업을 처리 (여러 프로세스를 띄워도 작업은 하나씩만 가져감) ---
+def worker(args):
+    from . import gemini, jobs
+    gemini.configure(_require_env("GEMINI_API_KEY"))
+    job_worker = jobs.JobWorker(jobs.get_job_store())
+    print(f"⏳ 작업자 {job_worker.worker_id} 대기 중...", flush=True)
+    try:
+        while True:
+            if job_worker.run_once(): continue
+            if args.exit_when_idle: return 0
+            time.sleep(job_worker.poll_interval)
+    except KeyboardInterrupt:
+        return 0
+
+# --- 여러 영상 현지화: 목록 파일의 URL/ID(줄바꿈/쉼표 구분)를 중복 없이 50개씩 조회한 뒤 영상별 localizations 본문을 JSON 배열로 저장 ---
+def localize_videos(args):
+    import json
+    from . import gemini, metadata, youtube
+    gemini.configure(_require_env("GEMINI_API_KEY"))
+    targets = _select_languages(args.langs)
+    video_ids = youtube.parse_video_ids(_read_text(args.input))
+    client = youtube.get_youtube_client(_require_env("YOUTUBE_API_KEY"), os.environ.get("YOUTUBE_API_ENDPOINT"))
+    snippets = youtube.fetch_video_snippets(client, video_ids)
+    missing = [v for v in video_ids if v not in snippets]
+    for v in missing: print(f"❌ {v}: 영상을 찾을 수 없습니다.", file=sys.stderr)
+    print(f"⏳ {len(snippets)}개 영상, {len(targets)}개 언어 현지화 시작", flush=True)
+
+    failures = len(missing)
+    def on_video_done(video_id, body, results):
+        nonlocal failures
+        failed = [r["lang_name"] for r in results if r["status"] != "성공"]
+        if failed: failures += 1
+        print(f"  {'❌' if failed else '✅'} {video_id}: {len(body['localizations'])}개 언어" + (f" (실패: {', '.join(failed)})" if failed else ""), flush=True)
+
+    bodies = metadata.localize_videos({v: snippets[v] for v in video_ids if v in snippets}, targets, on_video_done)
+    _write_bytes(args.output, json.dumps(bodies, indent=2, ensure_ascii=False).encode("utf-8"))
+    return 1 if failures else 0
+
+# --- 오프라인 성능 측정: 합성 자막과 가짜 Gemini/ElevenLabs로 단계별 처리량/최대 메모리/경과 시간 측정 ---
+def bench(args):
+    import json
+    from . import bench as benchmarks
+    benchmarks.parse_arguments(args)
+    env = benchmarks.environment()
+    print(f"⏳ 성능 측정 ({env['git_rev'] or '-'}, Python {env['python']}, CPU {env['cpus']}개) / 가짜 API 지연 {args.latency}s, 실패율 {args.failure_rate}, 길이 불일치율 {args.mismatch_rate}", flush=True)
+    print(f"{'단계':<13} {'줄 수':>6}  {'경과 시간':>9}  {'처리량':>16}  {'최대 메모리':>9}", flush=True)
+    results = benchmarks.run_benchmarks(args, on_result=lambda r: print(benchmarks.format_result(r), flush=True))
+    if args.output:
+        config = {k: getattr(args, k) for k in ("sizes", "stages", "langs", "workers", "latency", "failure_rate", "mismatch_rate", "seed")}
+        with open(args.output, "a", encoding="utf-8") as f: f.write(json.dumps({**env, "config": config, "results": results}, ensure_ascii=False) + "\n")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="translator_core", description="자막 다국어 번역 / AI 더빙 일괄 처리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    measured = argparse.ArgumentParser(add_help=False)
+    measured.add_argument("--metrics-out", help="실행 지표 저장 파일 (.prom이면 Prometheus 텍스트 형식, 그 외 JSON)")
+
+    p = sub.add_parser("translate-subs", parents=[measured], help="SBV/SRT 자막을 다국어로 번역")
+    p.add_argument("input", help="SBV/SRT 파일 또는 폴더")
+    p.add_argument("output", help="결과 폴더 (파일마다 하위 폴더 생성)")
+    p.add_argument("--langs", help="번역할 언어 코드 (쉼표 구분, 예: de,fr,ja). 생략하면 전체 언어")
+    p.add_argument("--workers", type=int, default=MAX_CONCURRENT_REQUESTS, help="동시 Gemini 요청 수")
+    # 원문 언어를 잘못 가정하면 번역되지 않은 원문이 같은 계열 언어의 결과로 저장되므로 기본값 없이 반드시 지정
+    p.add_argument("--source", required=True, type=_source_language,
+                   help="원문 언어 코드 (필수, 예: ko, en). 원문과 같은 계열의 대상 언어(en이면 영어 미국/영국/호주 등)만 번역 없이 원문에서 만듦")
+    p.set_defaults(func=translate_subs)
+
+    p = sub.add_parser("dub", parents=[measured], help="SRT 자막으로 AI 더빙 오디오 생성")
+    p.add_argument("input", help="SRT 파일 또는 폴더")
+    p.add_argument("output", help="결과 폴더")
+    p.add_argument("--voice", help="성우 라벨 또는 ElevenLabs Voice ID. 생략하면 파일 이름(언어 이름)으로 자동 선택")
+    p.add_argument("--format", default="WAV", help="출력 형식 (WAV, FLAC, MP3)")
+    p.add_argument("--jobs", type=int, default=None, help="믹싱 작업자 프로세스 수 (기본: CPU 수)")
+    p.set_defaults(func=dub)
+
+    p = sub.add_parser("worker", help="작업 큐의 다국어 번역 작업 처리")
+    p.add_argument("--exit-when-idle", action="store_true", help="대기열이 비면 종료 (기본: 계속 대기)")
+    p.set_defaults(func=worker)
+
+    p = sub.add_parser("localize-videos", parents=[measured], help="여러 영상의 제목/설명을 다국어로 번역해 localizations JSON 생성")
+    p.add_argument("input", help="YouTube URL 또는 영상 ID 목록 파일 (줄바꿈/쉼표 구분)")
+    p.add_argument("output", help="결과 JSON 파일")
+    p.add_argument("--langs", help="번역할 언어 코드 (쉼표 구분, 예: de,fr,ja). 생략하면 전체 언어")
+    p.set_defaults(func=localize_videos)
+
+    p = sub.add_parser("bench", help="가짜 API로 오프라인 성능 측정 (처리량/최대 메모리/경과 시간)")
+    from .bench import add_arguments
+    add_arguments(p)
+    p.set_defaults(func=bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not hasattr(args, "metrics_out"): return args.func(args)
+    from .metrics import format_summary, log_run, metrics
+    with metrics.run() as run:
+        try: return args.func(args)
+        finally:
+            summary = run.summary()
+            print(format_summary(summary), file=sys.stderr, flush=True)
+            log_run(args.command, summary)
+            if args.metrics_out:
+                with open(args.metrics_out, "w", encoding="utf-8") as f: f.write(run.prometheus() if args.metrics_out.endswith(".prom") else run.to_json())
+
+# 설치 시 등록되는 translate-subs / dub 명령의 진입점
+def translate_subs_main():
+    return main(["translate-subs", *sys.argv[1:]])
+
+def dub_main():
+    return main(["dub", *sys.argv[1:]])
@@ -0,0 +1,91 @@
+"""영어 자막을 구간별로 압축해 더빙용 대본과 읽기용 스크립트를 만듦."""
+import json
+from concurrent.futures import as_completed
+from . import subtitles
+from .config import (COMPRESSION_GUIDELINES, COMPRESSION_PARAGRAPH_GAP_MS, COMPRESSION_WINDOW_CUES,
+                     COMPRESSION_WINDOW_OVERLAP, MAX_CONCURRENT_REQUESTS)
+from .gemini import generate_text, request_pool, retry_backoff
+from .metrics import metrics
+
+# 자막 전체를 한 번에 보내지 않고 겹치는 구간으로 나눠 동시에 요청하므로 파일이 길어도 지연 시간이 거의 일정하고 출력 길이 제한에 걸리지 않음
+# 모델은 줄별 텍스트만 돌려주고, 압축 자막과 읽기용 스크립트는 원본 시각 배열로 로컬에서 다시 조립함
+
+# 구간 본문 범위 [(시작, 끝), ...] — 앞뒤 문맥 줄은 요청을 만들 때 덧붙임
+def plan_windows(count, size=COMPRESSION_WINDOW_CUES):
+    return [(a, min(a + size, count)) for a in range(0, count, size)]
+
+def window_prompt(table, a, b, overlap=COMPRESSION_WINDOW_OVERLAP):
+    cues = [{"id": i + 1, "start_ms": table.start_ms[i], "end_ms": table.end_ms[i],
+             "seconds": round((table.end_ms[i] - table.start_ms[i]) / 1000, 1), "text": table.texts[i]} for i in range(a, b)]
+    payload = {"context_before": table.texts[max(0, a - overlap):a], "cues": cues, "context_after": table.texts[b:b + overlap]}
+    return f"""{COMPRESSION_GUIDELINES}
+### **Task**
+Compress ONLY the subtitle lines in "cues". "context_before" and "context_after" are the neighbouring lines of the same video, given only so that sentences crossing the boundary stay natural. Do NOT output them.
+
+### **Output Rules**
+1. Return ONLY a valid JSON array. No explanations, no markdown.
+2. The array MUST have exactly {b - a} objects, one per input cue, in the same order: {{"id": ..., "start_ms": ..., "end_ms": ..., "text": "..."}}.
+3. Copy "id", "start_ms" and "end_ms" unchanged from the input. Never leave "text" empty.
+Input JSON:
+{json.dumps(payload, ensure_ascii=False)}"""
+
+# 응답을 검증해 구간 본문 줄의 압축 텍스트 목록으로 변환 (줄 수/번호/시각이 하나라도 다르면 예외)
+def parse_window(res_text, table, a, b):
+    start_idx, end_idx = res_text.find('['), res_text.rfind(']')
+    if start_idx == -1 or end_idx == -1: raise ValueError("JSON 배열 기호를 찾을 수 없습니다.")
+    items = json.loads(res_text[start_idx:end_idx+1])
+    if len(items) != b - a: raise ValueError(f"자막 개수 불일치 ({len(items)}/{b - a})")
+    texts = []
+    for i, item in zip(range(a, b), items):
+        if not isinstance(item, dict) or (item.get("id"), item.get("start_ms"), item.get("end_ms")) != (i + 1, table.start_ms[i], table.end_ms[i]):
+            raise ValueError(f"{i + 1}번 자막의 번호/시각 불일치")
+        text = str(item.get("text") or "").strip()
+        if not text: raise ValueError(f"{i + 1}번 자막 텍스트 누락")
+        texts.append(text)
+    return texts
+
+# 반환: (압축 텍스트 목록, None) 또는 (None, 오류 메시지)
+def compress_window(table, a, b, max_retries=3):
+    prompt = window_prompt(table, a, b)
+    for attempt in range(max_retries):
+        try:
+            res_text = generate_text(prompt)
+            with metrics.span("compression.parse"): return parse_window(res_text, table, a, b), None
+        except Exception as e:
+            if attempt < max_retries - 1: retry_backoff(attempt); continue
+            return None, f"Gemini 압축 실패: {str(e)}"
+
+# 압축된 줄을 문장 단위로 이어 붙이고, 문장 사이 공백이 긴 곳에서 문단을 나눔
+def readable_script(table):
+    paragraphs, current, last_end = [], [], None
+    for seg in subtitles.merge_pysrt_items(table):
+        if current and seg['start_ms'] - last_end >= COMPRESSION_PARAGRAPH_GAP_MS:
+            paragraphs.append(" ".join(current)); current = []
+        current.append(seg['text']); last_end = seg['end_ms']
+    if current: paragraphs.append(" ".join(current))
+    return "\n\n".join(paragraphs)
+
+# --- 영어 자막 압축: 구간별 동시 요청 후 원본 시각으로 재조립 ---
+# 실패한 구간은 원문을 그대로 두므로 자막 개수와 시각은 항상 원본과 같음
+# on_progress(done_windows, total_windows)는 메인 스레드에서 구간이 끝날 때마다 호출됨 (선택)
+# 반환: (압축 자막, 읽기용 스크립트, 원문으로 남은 줄 수)
+def compress_subtitle(content, fmt, on_progress=None, max_workers=MAX_CONCURRENT_REQUESTS):
+    table, err = subtitles.load_subtitle(content, fmt)
+    if err: raise ValueError(err)
+    windows = plan_windows(len(table))
+    texts = list(table.texts)
+    failed = 0
+    pool = request_pool(max_workers)
+    try:
+        futures = {pool.submit(compress_window, table, a, b): (a, b) for a, b in windows}
+        for done, fut in enumerate(as_completed(futures), 1):
+            a, b = futures[fut]
+            compressed, _ = fut.result()
+            if compressed is None: failed += b - a
+            else: texts[a:b] = compressed
+            if on_progress: on_progress(done, len(windows))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    with metrics.span("compression.rebuild"):
+        result = table.with_texts(texts)
+        return subtitles.SERIALIZERS[fmt](result), readable_script(result), failed
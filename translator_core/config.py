@@ -0,0 +1,219 @@
+"""웹앱과 CLI가 공유하는 설정: 대상 언어, 조각 분할, API 동시성, 가격, 번역 지침."""
+from collections import OrderedDict
+import hashlib
+
+# --- 지원 언어 목록 ---
+TARGET_LANGUAGES = OrderedDict({
+    "el": {"name": "그리스어", "code": "EL"},
+    "nl": {"name": "네덜란드어", "code": "NL"},
+    "no": {"name": "노르웨이어", "code": "NB"},
+    "da": {"name": "덴마크어", "code": "DA"},
+    "de": {"name": "독일어", "code": "DE"},
+    "ru": {"name": "러시아어", "code": "RU"},
+    "mr": {"name": "마라티어", "code": "MR"},
+    "ms": {"name": "말레이어", "code": "MS"},
+    "vi": {"name": "베트남어", "code": "VI"},
+    "bn": {"name": "벵골어", "code": "BN"},
+    "sv": {"name": "스웨덴어", "code": "SV"},
+    "es": {"name": "스페인어", "code": "ES"},
+    "sk": {"name": "슬로바키아어", "code": "SK"},
+    "ar": {"name": "아랍어", "code": "AR"},
+    "en-US": {"name": "영어 (미국)", "code": "EN-US"},
+    "en-IE": {"name": "영어 (아일랜드)", "code": "EN-GB"}, 
+    "en-GB": {"name": "영어 (영국)", "code": "EN-GB"},
+    "en-AU": {"name": "영어 (호주)", "code": "EN-AU"},   
+    "en-IN": {"name": "영어 (인도)", "code": "EN-GB"},   
+    "en-CA": {"name": "영어 (캐나다)", "code": "EN-CA"},
+    "ur": {"name": "우르두어", "code": "UR"},
+    "uk": {"name": "우크라이나어", "code": "UK"},
+    "it": {"name": "이탈리아어", "code": "IT"},
+    "id": {"name": "인도네시아어", "code": "ID"},
+    "ja": {"name": "일본어", "code": "JA"},
+    "zh-CN": {"name": "중국어(간체)", "code": "ZH"},
+    "zh-TW": {"name": "중국어(번체)", "code": "zh-TW"},
+    "cs": {"name": "체코어", "code": "CS"},
+    "ta": {"name": "타밀어", "code": "TA"},
+    "th": {"name": "태국어", "code": "TH"},
+    "te": {"name": "텔루구어", "code": "TE"},
+    "tr": {"name": "튀르키예어", "code": "TR"},
+    "pa": {"name": "펀잡어", "code": "PA"},
+    "pt": {"name": "포르투갈어", "code": "PT-PT"},
+    "pl": {"name": "폴란드어", "code": "PL"},
+    "fr": {"name": "프랑스어", "code": "FR"},
+    "fi": {"name": "핀란드어", "code": "FI"},
+    "fil": {"name": "필리핀어", "code": "FIL"},
+    "ko": {"name": "한국어", "code": "KO"},
+    "hu": {"name": "헝가리어", "code": "HU"},
+    "hi": {"name": "힌디어", "code": "HI"},
+})
+
+# --- 지역 변형 언어: DeepL 코드 -> 미국식 철자에서 바꿀 규칙 (translator_core.locales) ---
+# 같은 언어 계열의 변형은 하나만 번역(영어 원문이면 번역 없이 원문 사용)하고 나머지는 철자만 바꿔 만듦
+# (EN-CA는 -ize와 aluminum 등 미국식을 유지)
+LOCALE_SPELLING_RULES = {
+    "EN-US": (),
+    "EN-GB": ("our", "re", "ll", "ise", "words"),
+    "EN-AU": ("our", "re", "ll", "ise", "words"),
+    "EN-CA": ("our", "re", "ll", "words_ca"),
+}
+LOCALE_SPELLING_CONVERSION = True  # False면 철자를 바꾸지 않고 그대로 복사
+
+# --- 조각 분할 설정 (고정 줄 수 대신 예상 토큰 기준, 실행 중 지연/실패율에 따라 자동 조절) ---
+CHUNK_INPUT_TOKEN_BUDGET = 1500    # 조각당 원문 토큰 상한
+CHUNK_OUTPUT_TOKEN_BUDGET = 12000  # 조각당 (그룹 내 전체 언어) 예상 출력 토큰 상한
+CHUNK_MIN_LINES, CHUNK_MAX_LINES = 5, 120
+CHUNK_TARGET_LATENCY = 30.0        # 이 시간(초)보다 느린 응답이 나오면 조각을 줄임
+
+# 영어 원문 대비 번역문 토큰 팽창 비율 (문자 체계별 토크나이저 효율 차이 반영, 목록에 없으면 1.5)
+TOKEN_EXPANSION = {
+    "en-US": 1.0, "en-IE": 1.0, "en-GB": 1.0, "en-AU": 1.0, "en-IN": 1.0, "en-CA": 1.0,
+    "es": 1.35, "pt": 1.35, "fr": 1.4, "it": 1.4, "nl": 1.4, "id": 1.4, "ms": 1.4, "fil": 1.5,
+    "de": 1.5, "sv": 1.3, "da": 1.3, "no": 1.3, "fi": 1.6, "vi": 1.6, "tr": 1.6, "ko": 1.6,
+    "pl": 1.7, "cs": 1.7, "sk": 1.7, "hu": 1.7, "ja": 1.3, "zh-CN": 1.2, "zh-TW": 1.3,
+    "ru": 2.0, "uk": 2.0, "ar": 2.0, "el": 2.5, "ur": 2.5, "th": 2.5,
+    "hi": 3.0, "mr": 3.0, "bn": 3.0, "pa": 3.0, "ta": 4.0, "te": 4.0,
+}
+
+# --- 동시 번역 설정 (고정 sleep 대신 속도 제한기로 호출 간격 제어) ---
+MAX_CONCURRENT_REQUESTS = 6
+LANGUAGE_GROUP_SIZE = 8  # 한 번의 Gemini 요청으로 동시에 번역할 언어 수
+GEMINI_REQUESTS_PER_MINUTE = 60
+
+# --- YouTube Data API (videos.list 한 번에 조회할 수 있는 최대 ID 수) ---
+YOUTUBE_BATCH_SIZE = 50
+
+# --- Gemini 모델 ---
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+# 목록 번역 응답을 스트리밍으로 받아 완성된 줄부터 처리 (응답이 끊겨도 받은 줄은 유지하고 나머지만 다시 요청)
+GEMINI_STREAM_RESPONSES = True
+# 스트리밍 중 진행률을 갱신하는 간격 (초)
+STREAM_PROGRESS_SECONDS = 0.5
+
+# --- 번역 메모리 (줄 단위 영구 캐시, 서버 재시작 후에도 유지) ---
+TM_DB_PATH = "translation_memory.sqlite3"
+
+# --- 다국어 번역 작업 큐 (작업 정보/언어별 결과 영구 저장, 브라우저 새로고침이나 서버 재시작 후에도 이어서 진행) ---
+JOB_DB_PATH = "translation_jobs.sqlite3"
+JOB_POLL_SECONDS = 1.0        # 작업자가 대기열을 확인하는 간격
+JOB_ERROR_BACKOFF_MAX_SECONDS = 60.0  # 작업자 루프 오류(DB 잠김 등) 후 다시 시도하기까지의 최대 대기 (연속 오류마다 2배)
+JOB_HEARTBEAT_SECONDS = 10.0  # 실행 중 작업의 생존 신호 간격
+JOB_STALE_SECONDS = 60.0      # 이 시간 동안 생존 신호가 없으면 다른 작업자가 이어받음
+JOB_UI_POLL_SECONDS = 2.0     # 웹앱이 작업 상태를 다시 읽는 간격
+
+# --- ElevenLabs TTS 설정 ---
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+TTS_MAX_CONCURRENCY = 4
+TTS_MAX_RETRIES = 5
+
+# --- 합성 음성 디스크 캐시 (voice_id, model_id, 문장) 기준, 용량 초과 시 오래 안 쓴 파일부터 삭제 ---
+TTS_CACHE_DIR = "tts_cache"
+TTS_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# --- 웹앱 더빙 결과 다운로드 ---
+# Streamlit 다운로드 버튼은 누르는 순간 파일 전체를 서버 메모리에 올리므로, WAV 결과가 이 크기를 넘으면 FLAC으로 변환해 제공
+DUB_DOWNLOAD_MAX_BYTES = 200 * 1024 ** 2
+
+# --- 실행 지표 (구간별 소요 시간, Gemini 토큰, ElevenLabs 글자 수) ---
+# 예상 비용 계산용 단가 (USD, 요금제에 맞게 조정)
+GEMINI_PRICE_INPUT_PER_MTOK = 0.30    # 입력 토큰 100만 개당
+GEMINI_PRICE_OUTPUT_PER_MTOK = 2.50   # 출력 토큰 100만 개당 (thinking 토큰 포함)
+ELEVENLABS_PRICE_PER_1K_CHARS = 0.30  # 글자 1,000자당
+# 지정하면 실행(번역 작업, CLI 명령)이 끝날 때마다 지표 요약을 한 줄짜리 JSON으로 덧붙임
+METRICS_LOG_PATH = None
+
+# --- ElevenLabs Voice ID 목록 ---
+VOICE_OPTIONS = {
+    "한국어(세모과)": "ruSJRhA64v8HAqiqKXVw",
+    "영어(세모과)": "EkK5I93UQWFDigLMpZcX",
+    "덴마크어, 네덜란드어, 스웨덴어, 독일어(세모과)": "ygiXC2Oa1BiHksD3WkJZ",
+    "포르투갈어, 스페인어(세모과)": "4za2kOXGgUd57HRSQ1fn"
+}
+
+# --- 영어 자막 압축: 자막을 겹치는 구간(window)으로 나눠 동시에 요청 ---
+# 구간마다 앞뒤 COMPRESSION_WINDOW_OVERLAP줄을 문맥으로만 함께 보내고 (압축 대상 아님), 결과는 구간 본문 줄만 받음
+COMPRESSION_WINDOW_CUES = 40
+COMPRESSION_WINDOW_OVERLAP = 4
+# 읽기용 스크립트에서 문장 사이 공백이 이 이상이면 문단을 나눔
+COMPRESSION_PARAGRAPH_GAP_MS = 2000
+
+# --- 영어 압축 지침 (구간별 JSON 입출력 형식은 compression 모듈이 덧붙임) ---
+COMPRESSION_GUIDELINES = """
+### Role & Context
+You are the **Chief Script Editor** for the 3-million-subscriber industrial documentary channel 'All process of world'.
+Your mission is to optimize English subtitles for **Multi-Language Dubbing (German, French, etc.)**.
+
+Target languages (like German) naturally expand in length by ~30%. Therefore, you must slightly tighten the English text to create "breathing room" for translators.
+**HOWEVER**, you must strictly preserve the **documentary's narrative tone, descriptive richness, and audio density**.
+
+### **CORE GOAL: "Smart Dubbing Optimization" (더빙 최적화)**
+Do not strip the script to its bare bones. Instead, **"tighten the bolts."**
+Your goal is to reduce the character count by **10% to 20%** (Smart Trim), NOT 50% (Hard Cut).
+* **Avoid:** Creating "dead air" where the text becomes too short for the timestamp duration.
+* **Aim for:** A smooth, professional flow that retains the original meaning and imagery but uses fewer syllables.
+
+### **CRITICAL RULES (Strict Adherence)**
+
+**1. STRICT TIMELINE INTEGRITY**
+* **ONE-TO-ONE MAPPING:** Output the **EXACT SAME number of lines** as the input.
+* **NO DELETION:** Never delete a subtitle block.
+* **NO MERGING:** Keep original timestamps 100% intact.
+
+**2. DURATION AWARENESS (Prevent Dead Air)**
+* **Check the Duration:** Calculate the time difference (`End Time` - `Start Time`) for each line.
+* **If a segment is LONG (e.g., > 4 seconds):**
+    * **DO NOT SHORTEN AGGRESSIVELY.** The narrator needs enough text to fill the audio time naturally.
+    * **Keep Adjectives:** Retain words like "kiln-fired," "guarding," "colossal" to maintain atmosphere.
+* **If a segment is SHORT (e.g., < 2 seconds) and text is long:**
+    * **SHORTEN AGGRESSIVELY.** This is where you need to create space.
+
+**3. STRUCTURAL COMPRESSION (Priority Strategy)**
+Use this order to shorten text instead of deleting words randomly:
+* **Priority 1: Grammar Shift (A of B → B A)**
+    * *Ex:* "The frames of wooden houses" → "The wooden frames" (Saves syllables, keeps meaning).
+    * *Ex:* "Production of the factory" → "Factory production".
+* **Priority 2: Trim "Functional" Fillers Only**
+    * Remove: "basically," "actually," "in order to," "is designed to."
+    * *Ex:* "It is designed to be used for cutting" → "It cuts".
+* **Priority 3: Flavor Preservation**
+    * **KEEP:** Adjectives that describe texture, mood, or quality.
+    * **REMOVE:** Only if the sentence is *critically* too long for the timestamp.
+
+### **Comparison Example (Calibration)**
+* **Input:** "From kiln-fired bricks" / "to concrete walls guarding the earth…" / "…and the breathing frames of wooden houses."
+* **BAD (Over-Compressed - Do NOT do this):** "From bricks to concrete walls… …and wooden frames." (lines merged, imagery lost)
+* **GOOD (Target Standard):** "From kiln-fired bricks" / "to concrete walls guarding the earth…" / "…and the breathing wooden frames."
+"""
+
+# --- Gemini 번역 지침 (번역 메모리 키에 지침 해시가 포함됨) ---
+TITLE_GUIDELINES = """
+        ROLE: You are an Expert Title Translator for high-end industrial, manufacturing, and cultural documentaries (e.g., BBC, National Geographic).
+        
+        CRITICAL TITLE TRANSLATION RULES:
+        1. Contextual Analysis: Identify the specific industry/topic. ALWAYS prioritize authentic 'Industry Jargon' over literal words (e.g., instead of literally translating 'massive', use industry-appropriate nuances like 'colossal scale' or 'gigantic process').
+        2. Meaning-Based & No Literal Translation: Translate the *core purpose* and *context*, not the dictionary definition (e.g., 'Junkyard' translates to the professional equivalent of 'Car Dismantling Facility' in the target language). Ensure zero "Translation-ese".
+        3. Amplify Adjectives: Replace bland adjectives with the most powerful, impactful expressions available in the target language to highlight scale, speed, or rarity.
+        4. Headline Impact & Conciseness: Eliminate unnecessary conjunctions and prepositions. Deliver a concise, striking headline.
+        5. Tone of Formal Expertise: Avoid cheap clickbait. Maintain a tone of professional awe and trustworthiness, exactly as a major documentary broadcaster would format a title in the target country.
+        """
+
+SUBTITLE_GUIDELINES = """
+        ROLE: You are an Expert Script Translator for professional industrial and craftsmanship documentaries (similar to the style of "How It's Made").
+        
+        CRITICAL TRANSLATION RULES:
+        1. Factual & Professional: Translate with accurate, professional terminology. STRICTLY AVOID overly dramatic, poetic, or flowery language (e.g., do not use words like "Sacred Ritual" or "Alchemy"). Maintain the exact original meaning of the text without exaggeration.
+        2. Natural Documentary Tone: Ensure the English sounds completely natural for a native-speaking audience watching a factual documentary. Use clear subject-verb structures, prefer active voice, and avoid convoluted relative clauses.
+        3. NO Special Characters: STRICTLY PROHIBITED to use slashes (/), brackets ([ ]), or ellipses (...) to indicate pauses, pacing, or formatting. Use only standard, minimal grammatical punctuation (like periods and necessary commas).
+        4. Technical Accuracy: Use correct industry terms naturally within the context (e.g., slip, bisque firing, casting, parting line). Translate '대표' as 'Founder' or 'Head' rather than a sterile 'CEO' in the context of craftsmanship, but keep the overall tone grounded and factual.
+        """
+
+# 영상 설명 문단: 자막 지침에 YouTube 챕터 시간(00:00 Intro)을 보존하는 규칙을 더함 (시간이 바뀌면 챕터가 깨짐)
+DESCRIPTION_GUIDELINES = SUBTITLE_GUIDELINES + """5. Timestamps: Do NOT translate or change timestamps (e.g., 00:00, 1:02:30). Keep YouTube chapter lines such as "00:00 Intro" starting with the exact original timestamp and translate only the chapter title after it.
+        """
+
+def prompt_hash(guidelines):
+    return hashlib.sha256(guidelines.encode('utf-8')).hexdigest()[:16]
+
+SUBTITLE_PROMPT_HASH = prompt_hash(SUBTITLE_GUIDELINES)
+# 설명란 문단 캐시는 번역 단위가 자막 줄과 다르므로 별도 키 공간을 사용
+DESCRIPTION_PROMPT_HASH = prompt_hash("description-paragraph\n" + DESCRIPTION_GUIDELINES)
@@ -0,0 +1,562 @@
+"""Gemini 다국어 번역: 속도 제한, 번역 메모리, 스트리밍 JSON 파서, 조각 분할 번역."""
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .config import (CHUNK_INPUT_TOKEN_BUDGET, CHUNK_MAX_LINES, CHUNK_MIN_LINES, CHUNK_OUTPUT_TOKEN_BUDGET,
+                     CHUNK_TARGET_LATENCY, GEMINI_MODEL_NAME, GEMINI_REQUESTS_PER_MINUTE, GEMINI_STREAM_RESPONSES,
+                     LANGUAGE_GROUP_SIZE, MAX_CONCURRENT_REQUESTS, STREAM_PROGRESS_SECONDS, SUBTITLE_GUIDELINES, SUBTITLE_PROMPT_HASH,
+                     TITLE_GUIDELINES, TM_DB_PATH, TOKEN_EXPANSION)
+from .metrics import active_runs, bind_runs, metrics
+
+# google-generativeai는 configure()가 처음 호출될 때 임포트하므로 CLI 시작과 --help가 빠름
+
+# --- Gemini 모델 설정 (웹앱은 st.secrets, CLI는 환경 변수에서 키를 받아 호출) ---
+_model = None
+
+def configure(api_key, model_name=GEMINI_MODEL_NAME):
+    global _model
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    _model = genai.GenerativeModel(model_name)
+
+def get_model():
+    if _model is None: raise RuntimeError("Gemini API 키가 설정되지 않았습니다. configure()를 먼저 호출하세요.")
+    return _model
+
+# --- 요청 주체(세션) 구분: 속도 제한기는 주체별 대기열을 번갈아 처리하므로 한 세션의 대량 작업이 다른 세션을 막지 않음 ---
+# 웹앱은 세션마다, 번역 작업자는 작업마다 주체를 지정하고, 지정하지 않은 스레드(CLI 등)는 "default"로 묶임
+_client = threading.local()
+
+def set_request_client(client_id):
+    _client.id = client_id
+
+def request_client():
+    return getattr(_client, "id", None) or "default"
+
+def _bind_worker(client_id, runs):
+    set_request_client(client_id); bind_runs(runs)
+
+# 요청 작업자 스레드 풀: 풀을 만든 스레드의 요청 주체와 실행 지표 기록기를 작업자 스레드가 물려받음
+def request_pool(max_workers):
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=_bind_worker, initargs=(request_client(), active_runs()))
+
+# --- 요청 속도 제한기 (토큰 버킷 + 주체별 공정 대기열, 스레드 안전) ---
+# 프로세스 전체가 하나의 버킷을 공유하고, 토큰은 대기 중인 주체들에게 한 번씩 돌아가며 배정 (같은 주체 안에서는 도착 순서)
+class RateLimiter:
+    def __init__(self, requests_per_minute, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, MAX_CONCURRENT_REQUESTS)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+        self.queues = OrderedDict()  # 요청 주체 -> 대기 중인 요청 (맨 앞 주체가 다음 차례)
+
+    def acquire(self, client=None):
+        client = client or request_client()
+        started, waited = time.perf_counter(), False
+        ticket = object()
+        with self.cond:
+            self.queues.setdefault(client, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    my_turn = next(iter(self.queues)) == client and self.queues[client][0] is ticket
+                    if my_turn and self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    # 차례가 아니면 토큰을 배정받은 요청이 깨울 때까지, 차례면 다음 토큰이 찰 때까지 대기
+                    waited = True
+                    self.cond.wait((1 - self.tokens) / self.rate if my_turn else None)
+            finally:
+                queue = self.queues[client]
+                queue.remove(ticket)
+                if queue: self.queues.move_to_end(client)
+                else: del self.queues[client]
+                self.cond.notify_all()
+        if waited: metrics.observe("gemini.rate_limit_wait", time.perf_counter() - started)
+
+gemini_limiter = RateLimiter(GEMINI_REQUESTS_PER_MINUTE)
+
+# --- 동일 요청 합치기: 같은 프롬프트(해시)의 요청이 진행 중이면 새로 보내지 않고 그 응답을 함께 받음 ---
+# 두 세션이 같은 파일을 동시에 번역하는 경우 등 / 스트리밍 응답은 도착한 조각을 그대로 나눠 받으므로 진행률도 함께 갱신됨
+class SharedResponse:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks, self.done, self.error = [], False, None
+
+    def put(self, text):
+        with self.cond: self.chunks.append(text); self.cond.notify_all()
+
+    def close(self, error=None):
+        with self.cond: self.done, self.error = True, error; self.cond.notify_all()
+
+    # 요청을 보낸 쪽이 받은 조각을 순서대로 내보내고, 요청이 실패했으면 같은 예외를 발생시킴
+    def __iter__(self):
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.chunks) and not self.done: self.cond.wait()
+                new, done, error = self.chunks[i:], self.done, self.error
+            i += len(new)
+            yield from new
+            if done:
+                if error is not None: raise error
+                return
+
+_in_flight, _in_flight_lock = {}, threading.Lock()
+
+# 반환: (키, 공유 응답, 직접 요청해야 하면 True)
+def _join_request(kind, prompt):
+    key = (kind, hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+    with _in_flight_lock:
+        if key in _in_flight: return key, _in_flight[key], False
+        shared = _in_flight[key] = SharedResponse()
+    return key, shared, True
+
+def _leave_request(key, shared, error=None):
+    with _in_flight_lock: _in_flight.pop(key, None)
+    shared.close(error)
+
+def _follow():
+    metrics.count("gemini.coalesced_requests")
+    return metrics.span("gemini.coalesced_wait")
+
+# --- 요청/재시도 계측: 요청 시간, 재시도 대기 시간, 사용 토큰(usage_metadata)을 실행 지표에 기록 ---
+def _record_usage(response):
+    try: usage = response.usage_metadata
+    except Exception: return  # 중간에 끊긴 스트림 등
+    if not usage: return
+    metrics.count("gemini.prompt_tokens", getattr(usage, "prompt_token_count", 0) or 0)
+    # thinking 모델은 생각 토큰도 출력 토큰 단가로 과금됨
+    metrics.count("gemini.output_tokens", (getattr(usage, "candidates_token_count", 0) or 0) + (getattr(usage, "thoughts_token_count", 0) or 0))
+
+def generate_text(prompt):
+    key, shared, leader = _join_request("text", prompt)
+    if not leader:
+        with _follow(): return "".join(shared)
+    error = None
+    try:
+        gemini_limiter.acquire()
+        metrics.count("gemini.requests")
+        with metrics.span("gemini.request"):
+            response = get_model().generate_content(prompt)
+            text = response.text
+        _record_usage(response)
+        shared.put(text)
+        return text
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _leave_request(key, shared, error)
+
+def retry_backoff(attempt):
+    metrics.count("gemini.retries")
+    with metrics.span("gemini.backoff"): time.sleep(2 ** attempt)
+
+# --- 번역 메모리: (원문 줄, 대상 언어, 지침 해시) -> 번역문 ---
+class TranslationMemory:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS segments (
+                source TEXT NOT NULL, target_lang TEXT NOT NULL, prompt_hash TEXT NOT NULL,
+                translation TEXT NOT NULL, updated_at REAL NOT NULL,
+                PRIMARY KEY (source, target_lang, prompt_hash))""")
+
+    def lookup(self, texts, target_lang, p_hash):
+        found = {}
+        unique = list(dict.fromkeys(texts))
+        with metrics.span("tm.lookup"), self.lock:
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i+500]
+                rows = self.conn.execute(
+                    f"SELECT source, translation FROM segments WHERE target_lang=? AND prompt_hash=? AND source IN ({','.join('?' * len(batch))})",
+                    [target_lang, p_hash, *batch]).fetchall()
+                found.update(rows)
+        metrics.count("tm.lookup_lines", len(unique)); metrics.count("tm.hit_lines", len(found))
+        return found
+
+    def store(self, sources, translations, target_lang, p_hash):
+        now = time.time()
+        with metrics.span("tm.store"), self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?)",
+                [(src, target_lang, p_hash, tr, now) for src, tr in zip(sources, translations)])
+
+# 프로세스 안에서 하나의 연결을 공유 (웹앱 세션들과 CLI 작업 모두 같은 객체를 사용)
+@functools.lru_cache(maxsize=None)
+def get_translation_memory(path=TM_DB_PATH):
+    return TranslationMemory(path)
+
+# --- 스트리밍 응답용 점진적 JSON 파서 ---
+# 최상위 배열 [..] 또는 {키: [..]} 객체에서 원소가 완성되는 즉시 (키, 순번, 값)을 내보냄 (최상위 배열이면 키는 None)
+# 첫 '[' / '{' 앞의 설명문이나 마크다운 펜스는 무시하고, 배열이 닫힌 키는 closed에 기록됨
+# (닫히지 않은 배열은 응답이 중간에 끊긴 것이므로 받은 원소까지만 믿고 나머지만 다시 요청할 수 있음)
+class JSONArrayStream:
+    def __init__(self):
+        self.buf, self.pos = "", 0
+        self.stack = []
+        self.in_string = self.escape = False
+        self.expect_key = False
+        self.key, self.key_start, self.item_start = None, None, None
+        self.counts, self.closed = {}, set()
+
+    def _item_level(self):
+        return self.stack[-1:] == ['['] and (len(self.stack) == 1 or (len(self.stack) == 2 and self.stack[0] == '{'))
+
+    def _key_level(self):
+        return self.stack == ['{'] and self.expect_key
+
+    def _emit(self, end, out):
+        if self.item_start is None: return
+        value = json.loads(self.buf[self.item_start:end])
+        key = self.key if self.stack[0] == '{' else None
+        index = self.counts.get(key, 0)
+        self.counts[key] = index + 1
+        self.item_start = None
+        out.append((key, index, value))
+
+    def feed(self, text):
+        self.buf += text
+        out = []
+        buf, i = self.buf, self.pos
+        while i < len(buf):
+            c = buf[i]
+            if self.in_string:
+                if self.escape: self.escape = False
+                elif c == '\\': self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self._key_level(): self.key = json.loads(buf[self.key_start:i+1])
+            elif not self.stack:
+                # 최상위 값이 이미 끝났으면 뒤따르는 텍스트는 무시
+                if c in '[{' and not self.counts and not self.closed:
+                    self.stack.append(c); self.expect_key = c == '{'
+            elif c == '"':
+                self.in_string = True
+                if self._key_level(): self.key_start = i
+                elif self._item_level() and self.item_start is None: self.item_start = i
+            elif c in '[{':
+                if self._item_level() and self.item_start is None: self.item_start = i
+                self.stack.append(c)
+            elif c in ']}':
+                if self._item_level():
+                    self._emit(i, out)
+                    self.closed.add(self.key if self.stack[0] == '{' else None)
+                self.stack.pop()
+            elif c == ',':
+                if self._item_level(): self._emit(i, out)
+                elif self.stack == ['{']: self.expect_key = True
+            elif c == ':':
+                if self.stack == ['{']: self.expect_key = False
+            elif not c.isspace():
+                if self._item_level() and self.item_start is None: self.item_start = i
+            i += 1
+        self.pos = i
+        return out
+
+# 스트리밍 요청: 응답 조각이 도착할 때마다 완성된 원소를 on_element(키, 순번, 값)로 넘김
+# 스트림이 중간에 끊겨도 예외를 삼키지 않으므로 호출자는 parser.closed로 끊긴 키를 판별함
+# 같은 프롬프트의 스트림이 진행 중이면 요청하지 않고 그 조각을 처음부터 받아 자기 파서에 넣음
+def _stream_json(prompt, parser, on_element):
+    def feed(text):
+        for key, index, value in parser.feed(text): on_element(key, index, value)
+
+    request_key, shared, leader = _join_request("stream", prompt)
+    if not leader:
+        with _follow():
+            for text in shared: feed(text)
+        return
+    error = None
+    try:
+        gemini_limiter.acquire()
+        metrics.count("gemini.requests")
+        with metrics.span("gemini.request"):
+            response = get_model().generate_content(prompt, stream=True)
+            try:
+                for chunk in response:
+                    try: text = chunk.text
+                    except ValueError: continue  # 텍스트 없는 마지막 조각 (종료 사유만 담김)
+                    shared.put(text); feed(text)
+            finally:
+                _record_usage(response)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _leave_request(request_key, shared, error)
+
+LENGTH_MISMATCH = "배열 길이 불일치"
+INVALID_ITEM = "문자열이 아닌 항목"
+
+def _has_invalid_item(items):
+    return any(not isinstance(item, str) for item in items)
+
+# 한 언어의 완성된 목록 응답을 검증 / 반환: (줄별 번역 목록, None) 또는 (None, LENGTH_MISMATCH / INVALID_ITEM)
+# 한 줄짜리 조각을 여러 항목으로 쪼개 온 경우는 버리지 않고 합쳐서 사용
+# 줄 수가 어긋나거나 null/숫자 항목이 있으면 같은 프롬프트를 다시 보내도 반복되기 쉬우므로 재시도하지 않고 호출자(분할 복구)에게 넘김
+def _check_list(items, text_data):
+    if _has_invalid_item(items): return None, INVALID_ITEM
+    if len(text_data) == 1 and items: items = [" ".join(items)]
+    if len(items) != len(text_data): return None, LENGTH_MISMATCH
+    return items, None
+
+def _list_prompt(director_guidelines, text_data, target_json):
+    return f"""{director_guidelines}
+        TASK: Translate the following JSON array of strings into EACH target language listed below, applying the CRITICAL TRANSLATION RULES.
+        Target languages (key: language): {target_json}
+        STRICT FORMATTING RULES:
+        1. Return ONLY a valid JSON object whose keys are exactly the target language keys above. No explanations, no markdown.
+        2. Each value MUST be a JSON array of strings with exactly {len(text_data)} items, in the same order as the input. Do not merge or split the array items themselves.
+        3. Do NOT translate HTML tags, URLs or email addresses.
+        4. Preserve line breaks (newlines) inside each string exactly as they are.
+        Input JSON:
+        {json.dumps(text_data, ensure_ascii=False)}"""
+
+# --- 다중 언어 동시 번역: 한 번의 요청으로 여러 언어를 받고, 실패한 언어만 재요청 ---
+# targets: ((lang_key, lang_name), ...) / 반환: ({lang_key: 번역 결과}, {lang_key: 오류 메시지})
+# 목록 번역은 응답을 스트리밍으로 받아 줄이 완성될 때마다 on_item(lang_key, 줄 번호, 번역문)을 호출함 (작업 스레드에서 호출)
+# 응답이 중간에 끊긴 언어는 받은 줄을 유지하고, 빠진 뒷부분만 다시 요청해 이어 붙임
+def translate_gemini_multi(text_data, targets, is_title=False, on_item=None, director_guidelines=None):
+    is_list = isinstance(text_data, list)
+    director_guidelines = director_guidelines or (TITLE_GUIDELINES if is_title else SUBTITLE_GUIDELINES)
+    if is_list and GEMINI_STREAM_RESPONSES:
+        results, errors = _translate_list_streaming(text_data, targets, on_item, director_guidelines=director_guidelines)
+        return results, {key: f"Gemini 번역 실패: {msg}" for key, msg in errors.items()}
+    results, errors = {}, {}
+    pending = dict(targets)
+
+    max_retries = 5
+    for attempt in range(max_retries):
+        target_json = json.dumps(pending, ensure_ascii=False)
+        if is_list:
+            prompt = _list_prompt(director_guidelines, text_data, target_json)
+        else:
+            prompt = f"""{director_guidelines}
+        TASK: Translate the following text into EACH target language listed below, applying the CRITICAL TRANSLATION RULES.
+        Target languages (key: language): {target_json}
+        STRICT FORMATTING RULES:
+        1. Return ONLY a valid JSON object whose keys are exactly the target language keys above and whose values are the translated texts as JSON strings. No explanations, no markdown.
+        2. Preserve ALL original line breaks (newlines), empty lines, and formatting EXACTLY as they are inside each string. Do NOT combine separate lines.
+        3. Do NOT translate timestamps (e.g., 00:00) or email addresses.
+        Input text:
+        {text_data}"""
+        try:
+            res_text = generate_text(prompt).strip()
+            start_idx = res_text.find('{')
+            end_idx = res_text.rfind('}')
+            if start_idx == -1 or end_idx == -1: raise Exception("JSON 객체 기호를 찾을 수 없습니다.")
+            with metrics.span("gemini.parse"): translated = json.loads(res_text[start_idx:end_idx+1])
+            for key in list(pending):
+                value = translated.get(key)
+                if is_list and isinstance(value, list):
+                    value, error = _check_list(value, text_data)
+                    if error: errors[key] = error; del pending[key]; continue
+                if not isinstance(value, list if is_list else str):
+                    errors[key] = "번역 결과 누락"; continue
+                results[key] = value; errors.pop(key, None); del pending[key]
+        except Exception as e:
+            for key in pending: errors[key] = str(e)
+        if not pending: break
+        if attempt < max_retries - 1: retry_backoff(attempt)
+    return results, {key: f"Gemini 번역 실패: {msg}" for key, msg in errors.items()}
+
+# 스트리밍 목록 번역 본체 / 반환: ({lang_key: 줄별 번역 목록}, {lang_key: 오류 원인})
+def _translate_list_streaming(text_data, targets, on_item=None, max_retries=5, director_guidelines=SUBTITLE_GUIDELINES):
+    results, errors = {}, {}
+    pending = dict(targets)
+    tails = {}  # lang_key -> 끊기기 전까지 받은 줄 목록
+
+    for attempt in range(max_retries):
+        prompt = _list_prompt(director_guidelines, text_data, json.dumps(pending, ensure_ascii=False))
+        parser = JSONArrayStream()
+        received = {key: [] for key in pending}
+
+        # 문자열이 아닌 항목도 줄 번호를 맞추기 위해 받아 두되 on_item으로 내보내지 않음 (아래에서 실패로 처리)
+        def on_element(key, index, value):
+            if key not in received or index != len(received[key]): return
+            received[key].append(value)
+            if on_item and index < len(text_data) and isinstance(value, str): on_item(key, index, value)
+
+        stream_error = None
+        try:
+            _stream_json(prompt, parser, on_element)
+        except Exception as e:
+            stream_error = e
+        for key in list(pending):
+            items = received[key]
+            if key in parser.closed:
+                checked, error = _check_list(items, text_data)
+                if error: errors[key] = error
+                else: results[key] = checked; errors.pop(key, None)
+                del pending[key]
+            elif len(items) > len(text_data):
+                errors[key] = LENGTH_MISMATCH; del pending[key]
+            elif _has_invalid_item(items):
+                errors[key] = INVALID_ITEM; del pending[key]
+            # 모든 줄을 받았는데 배열 닫는 기호 전에 끊긴 경우는 완료로 보고 빈 뒷부분을 요청하지 않음
+            elif len(items) == len(text_data):
+                results[key] = items; errors.pop(key, None); del pending[key]
+            elif items:
+                tails[key] = items; errors.pop(key, None); del pending[key]
+            else:
+                errors[key] = str(stream_error) if stream_error else "번역 결과 누락"
+        if not pending: break
+        if attempt < max_retries - 1: retry_backoff(attempt)
+
+    # 끊긴 언어는 받은 줄 수가 같은 언어끼리 묶어 나머지 줄만 다시 요청 (받은 줄이 1줄 이상이므로 재귀는 반드시 줄어듦)
+    by_offset = {}
+    for key, items in tails.items(): by_offset.setdefault(len(items), []).append(key)
+    names = dict(targets)
+    for offset, keys in by_offset.items():
+        metrics.count("gemini.stream_tail_requests")
+        shifted = (lambda k, i, v, offset=offset: on_item(k, i + offset, v)) if on_item else None
+        tail_results, tail_errors = _translate_list_streaming(text_data[offset:], tuple((k, names[k]) for k in keys), shifted, max_retries, director_guidelines)
+        for key in keys:
+            if key in tail_results: results[key] = tails[key] + tail_results[key]; errors.pop(key, None)
+            else: errors[key] = tail_errors[key]
+    return results, errors
+
+# --- 배열 길이 불일치/문자열이 아닌 항목 복구: 어긋난 언어만 조각을 반으로 나눠 재귀적으로 재요청 ---
+# 반환: ({lang_key: 줄별 번역 목록 (실패한 줄은 None)}, {lang_key: 오류 메시지})
+# 정렬이 맞은 언어와 하위 구간은 그대로 유지되므로, 한 줄이 어긋나면 그 줄이 포함된 작은 구간만 다시 요청함
+def translate_multi_with_repair(chunk_texts, targets, on_item=None, director_guidelines=None):
+    results, errors = translate_gemini_multi(chunk_texts, tuple(targets), on_item=on_item, director_guidelines=director_guidelines)
+    results = dict(results)
+    mismatched = [(k, n) for k, n in targets if errors.get(k, "").endswith((LENGTH_MISMATCH, INVALID_ITEM))]
+    if mismatched and len(chunk_texts) > 1:
+        metrics.count("gemini.length_mismatch_splits")
+        mid = len(chunk_texts) // 2
+        left, left_err = translate_multi_with_repair(chunk_texts[:mid], mismatched, on_item, director_guidelines)
+        right, right_err = translate_multi_with_repair(chunk_texts[mid:], mismatched, on_item and (lambda k, i, v: on_item(k, i + mid, v)), director_guidelines)
+        errors = {k: v for k, v in errors.items() if k not in dict(mismatched)}
+        for k, _ in mismatched:
+            results[k] = left.get(k, [None] * mid) + right.get(k, [None] * (len(chunk_texts) - mid))
+            if k in left_err or k in right_err: errors[k] = left_err.get(k) or right_err.get(k)
+    return results, errors
+
+# --- 언어 그룹 단위 조각 번역 후 성공한 줄은 즉시 번역 메모리에 기록 ---
+def translate_chunk_with_memory(tm, chunk_texts, group, on_item=None):
+    started = time.monotonic()
+    results, errors = translate_multi_with_repair(chunk_texts, group, on_item)
+    names = dict(group)
+    for key, chunk in results.items():
+        done = [(src, tr) for src, tr in zip(chunk_texts, chunk) if tr is not None]
+        if done: tm.store(*zip(*done), names[key], SUBTITLE_PROMPT_HASH)
+    return results, errors, time.monotonic() - started
+
+def group_languages(targets, size=LANGUAGE_GROUP_SIZE):
+    return [targets[i:i+size] for i in range(0, len(targets), size)]
+
+# --- 토큰 기반 적응형 조각 분할기 ---
+def estimate_tokens(text):
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (ascii_chars / 4) + (len(text) - ascii_chars) + 1
+
+class ChunkPlanner:
+    def __init__(self):
+        self.scale = 1.0
+        self.lock = threading.Lock()
+
+    # texts[start:]에서 입력/출력 토큰 예산을 넘지 않는 만큼의 줄 수를 반환
+    def next_size(self, texts, start, lang_keys):
+        expansion = sum(TOKEN_EXPANSION.get(k, 1.5) for k in lang_keys)
+        with self.lock: scale = self.scale
+        in_budget, out_budget = CHUNK_INPUT_TOKEN_BUDGET * scale, CHUNK_OUTPUT_TOKEN_BUDGET * scale
+        in_tokens = out_tokens = 0
+        end = start
+        while end < len(texts) and end - start < CHUNK_MAX_LINES:
+            t = estimate_tokens(texts[end])
+            # 줄마다 JSON 따옴표/구분자 오버헤드(약 3토큰)가 언어 수만큼 붙음
+            if end - start >= CHUNK_MIN_LINES and (in_tokens + t > in_budget or out_tokens + (t * expansion) + 3 * len(lang_keys) > out_budget): break
+            in_tokens += t; out_tokens += t * expansion + 3 * len(lang_keys)
+            end += 1
+        return end - start
+
+    # 실패 시 절반 가까이 줄이고(곱 감소), 빠른 성공이면 조금씩 키움(합 증가에 가까운 완만한 증가)
+    def record(self, latency, ok):
+        with self.lock:
+            if not ok: self.scale = max(0.25, self.scale * 0.6)
+            elif latency > CHUNK_TARGET_LATENCY: self.scale = max(0.25, self.scale * 0.85)
+            else: self.scale = min(2.0, self.scale * 1.1)
+
+# --- 다국어 동시 번역 엔진: 번역 메모리에 없는 줄만 (언어 그룹, 조각) 단위로 스레드 풀에서 병렬 처리 ---
+# targets: [(lang_key, lang_name), ...] — 번역 메모리와 결과 콜백은 lang_name 기준
+# 조각 크기는 제출 시점마다 ChunkPlanner가 결정하므로 앞선 조각의 지연/실패가 다음 조각에 반영됨
+# on_language_done(lang_name, translated_texts, failed_chunks)는 메인 스레드에서 언어 완료 시마다 호출됨
+# on_progress(done_lines, total_lines)는 조각이 끝날 때마다, 그리고 스트리밍 중에는 STREAM_PROGRESS_SECONDS마다 호출됨 (선택)
+# (스트리밍 중인 줄은 그룹의 모든 언어가 받았을 때 완료로 셈)
+def translate_languages_concurrently(texts, targets, on_language_done, max_workers=MAX_CONCURRENT_REQUESTS, on_progress=None, tm=None):
+    tm = tm or get_translation_memory()
+    planner = ChunkPlanner()
+    hits = {ln: tm.lookup(texts, ln, SUBTITLE_PROMPT_HASH) for _, ln in targets}
+    groups = group_languages(targets)
+    # 그룹 내 한 언어라도 번역 메모리에 없는 줄을 모아 순서대로 잘라 보냄
+    misses = [list(dict.fromkeys(t for t in texts if any(t not in hits[ln] for _, ln in group))) for group in groups]
+    cursors = [0] * len(groups)
+    in_flight = [0] * len(groups)
+    failed = {ln: 0 for _, ln in targets}
+    total_lines, done_lines = sum(len(m) for m in misses), 0
+    streamed, stream_lock = {}, threading.Lock()  # (그룹, 조각 시작) -> 진행 중인 조각에서 받은 줄 수
+
+    def stream_counter(gi, a, size):
+        seen = [set() for _ in range(size)]
+        def on_item(key, index, value):
+            with stream_lock:
+                if key in seen[index]: return  # 분할 복구로 같은 줄을 다시 받은 경우
+                seen[index].add(key)
+                if len(seen[index]) == len(groups[gi]): streamed[(gi, a)] = streamed.get((gi, a), 0) + 1
+        return on_item
+
+    def finish(group):
+        for _, ln in group:
+            on_language_done(ln, [hits[ln].get(t, "오류") for t in texts], failed[ln])
+
+    pool = request_pool(max_workers)
+    try:
+        for gi, group in enumerate(groups):
+            if not misses[gi]: finish(group)
+        futures, next_group = {}, 0
+        while True:
+            # 빈 슬롯마다 그룹을 돌아가며 다음 조각을 계획해 제출
+            while len(futures) < max_workers:
+                open_groups = [gi for gi in range(len(groups)) if cursors[gi] < len(misses[gi])]
+                if not open_groups: break
+                gi = min(open_groups, key=lambda g: (g - next_group) % len(groups))
+                next_group = (gi + 1) % len(groups)
+                a = cursors[gi]
+                b = a + planner.next_size(misses[gi], a, [k for k, _ in groups[gi]])
+                cursors[gi] = b; in_flight[gi] += 1
+                futures[pool.submit(translate_chunk_with_memory, tm, misses[gi][a:b], groups[gi], stream_counter(gi, a, b - a))] = (gi, a, b)
+            if not futures: break
+            done, _ = wait(futures, timeout=STREAM_PROGRESS_SECONDS if on_progress else None, return_when=FIRST_COMPLETED)
+            if not done:
+                with stream_lock: in_progress = sum(streamed.values())
+                if in_progress: on_progress(done_lines + in_progress, total_lines)
+                continue
+            for fut in done:
+                gi, a, b = futures.pop(fut)
+                with stream_lock: streamed.pop((gi, a), None)
+                chunk_texts = misses[gi][a:b]
+                try: results, errors, latency = fut.result()
+                except Exception as ex: results, errors, latency = {}, {key: str(ex) for key, _ in groups[gi]}, 0.0
+                planner.record(latency, ok=not errors)
+                for key, ln in groups[gi]:
+                    if key in results: hits[ln].update((src, tr) for src, tr in zip(chunk_texts, results[key]) if tr is not None)
+                    if key in errors: failed[ln] += 1
+                in_flight[gi] -= 1; done_lines += b - a
+                if on_progress: on_progress(done_lines, total_lines)
+                if not in_flight[gi] and cursors[gi] >= len(misses[gi]): finish(groups[gi])
+    finally:
+        # 사용자가 중단(재실행)하면 대기 중인 요청은 취소하고 즉시 반환
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,227 @@
+"""SQLite 영구 작업 큐와 작업자로 다국어 번역을 브라우저 세션/서버 프로세스와 분리해 실행."""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from . import archive
+from .config import JOB_DB_PATH, JOB_ERROR_BACKOFF_MAX_SECONDS, JOB_HEARTBEAT_SECONDS, JOB_POLL_SECONDS, JOB_STALE_SECONDS, MAX_CONCURRENT_REQUESTS
+from .metrics import log_run, metrics
+
+# 작업 정보와 언어별 결과는 SQLite에 저장되고, 조각 단위 체크포인트는 번역 메모리가 담당
+# (조각이 끝날 때마다 성공한 줄이 번역 메모리에 기록되므로, 재시작 후에는 아직 번역되지 않은 줄만 다시 요청함)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+class JobCancelled(Exception):
+    pass
+
+# --- 작업 저장소: 상태 전이는 queued -> running -> done / failed / cancelled ---
+# running 작업의 heartbeat가 JOB_STALE_SECONDS 이상 멈추면 작업자가 죽은 것으로 보고 다른 작업자가 이어받음
+class JobStore:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, source_name TEXT NOT NULL, fmt TEXT NOT NULL,
+                content TEXT NOT NULL, content_hash TEXT NOT NULL, targets TEXT NOT NULL, max_workers INTEGER NOT NULL,
+                status TEXT NOT NULL, error TEXT, worker_id TEXT, heartbeat REAL,
+                done_lines INTEGER NOT NULL DEFAULT 0, total_lines INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL, updated_at REAL NOT NULL, source_lang TEXT)""")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS job_outputs (
+                job_id TEXT NOT NULL, lang_name TEXT NOT NULL, data BLOB NOT NULL, failed_chunks INTEGER NOT NULL,
+                created_at REAL NOT NULL, zip_member BLOB, PRIMARY KEY (job_id, lang_name))""")
+            if "zip_member" not in {r[1] for r in self.conn.execute("PRAGMA table_info(job_outputs)")}:
+                self.conn.execute("ALTER TABLE job_outputs ADD COLUMN zip_member BLOB")
+            job_columns = {r[1] for r in self.conn.execute("PRAGMA table_info(jobs)")}
+            # 마지막 실행의 지표 요약 (JSON)
+            if "metrics" not in job_columns: self.conn.execute("ALTER TABLE jobs ADD COLUMN metrics TEXT")
+            # 원문 언어 (DeepL 기본 코드) — 이전에 등록된 작업은 모두 영어 자막의 다국어 번역
+            if "source_lang" not in job_columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN source_lang TEXT")
+                self.conn.execute("UPDATE jobs SET source_lang='EN'")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_content ON jobs (content_hash, fmt)")
+
+    # 같은 자막/형식/언어 목록의 작업이 있으면 새로 만들지 않고 그 작업에 연결 (실패/취소된 작업은 다시 대기열로)
+    # source_lang을 주면 원문과 같은 계열의 대상 언어는 번역하지 않고 원문에서 만듦 (pipelines.translate_subtitle_file)
+    def submit(self, source_name, fmt, content, targets, max_workers=MAX_CONCURRENT_REQUESTS, kind="translate", source_lang=None):
+        targets_json = json.dumps([list(t) for t in targets], ensure_ascii=False)
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id, status FROM jobs WHERE content_hash=? AND fmt=? AND targets=? AND kind=? AND source_lang IS ? ORDER BY created_at DESC LIMIT 1",
+                (content_hash, fmt, targets_json, kind, source_lang)).fetchone()
+            if row:
+                if row["status"] in ("failed", "cancelled"):
+                    self.conn.execute("UPDATE jobs SET status='queued', error=NULL, max_workers=?, updated_at=? WHERE id=?", (max_workers, now, row["id"]))
+                return row["id"]
+            job_id = uuid.uuid4().hex
+            self.conn.execute("INSERT INTO jobs (id, kind, source_name, fmt, content, content_hash, targets, max_workers, status, created_at, updated_at, source_lang) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                              (job_id, kind, source_name, fmt, content, content_hash, targets_json, max_workers, now, now, source_lang))
+            return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row is None: return None
+            job = dict(row)
+            job["targets"] = [tuple(t) for t in json.loads(job["targets"])]
+            job["metrics"] = json.loads(job["metrics"]) if job.get("metrics") else None
+            # 일부 조각이 실패한 언어는 결과를 보관하되 완료로 치지 않으므로 작업을 다시 돌리면 그 언어만 재시도함
+            outputs = self.conn.execute("SELECT lang_name, failed_chunks, created_at FROM job_outputs WHERE job_id=? ORDER BY created_at", (job_id,)).fetchall()
+            job["output_langs"] = [r[0] for r in outputs]
+            job["finished_langs"] = [r[0] for r in outputs if r[1] == 0]
+            # 결과가 저장되거나 다시 저장될 때마다 바뀌는 값 (ZIP 캐시 키용: 실패한 언어를 재시도해 덮어써도 언어 목록은 같을 수 있음)
+            job["output_version"] = (len(outputs), max((r[2] for r in outputs), default=0.0), sum(r[1] for r in outputs))
+        return job
+
+    def outputs(self, job_id):
+        with self.lock:
+            return {r[0]: r[1] for r in self.conn.execute("SELECT lang_name, data FROM job_outputs WHERE job_id=? ORDER BY created_at", (job_id,))}
+
+    # 대기 중인 작업 또는 heartbeat가 끊긴 실행 중 작업 하나를 원자적으로 가져감
+    # 여러 작업자 프로세스가 같은 DB를 쓰므로 UPDATE에도 같은 조건을 걸고, 다른 작업자가 먼저 가져갔으면(rowcount 0) 다시 찾음
+    def claim(self, worker_id):
+        while True:
+            now = time.time()
+            with self.lock, self.conn:
+                row = self.conn.execute(
+                    "SELECT id FROM jobs WHERE status='queued' OR (status='running' AND heartbeat < ?) ORDER BY created_at LIMIT 1",
+                    (now - JOB_STALE_SECONDS,)).fetchone()
+                if row is None: return None
+                cur = self.conn.execute("UPDATE jobs SET status='running', worker_id=?, heartbeat=?, updated_at=? "
+                                        "WHERE id=? AND (status='queued' OR (status='running' AND heartbeat < ?))",
+                                        (worker_id, now, now, row["id"], now - JOB_STALE_SECONDS))
+            if cur.rowcount == 1: return self.get(row["id"])
+
+    # 진행 상황 기록 겸 heartbeat 갱신, 작업이 취소되었으면 False 반환
+    def checkpoint(self, job_id, worker_id, done_lines=None, total_lines=None):
+        now = time.time()
+        with self.lock, self.conn:
+            if done_lines is not None:
+                self.conn.execute("UPDATE jobs SET done_lines=?, total_lines=? WHERE id=? AND worker_id=?", (done_lines, total_lines, job_id, worker_id))
+            cur = self.conn.execute("UPDATE jobs SET heartbeat=?, updated_at=? WHERE id=? AND worker_id=? AND status='running'", (now, now, job_id, worker_id))
+        return cur.rowcount == 1
+
+    # 언어 결과를 저장하면서 ZIP 항목도 이때 한 번만 압축해 함께 보관
+    def save_output(self, job_id, lang_name, file_name, data, failed_chunks):
+        member = archive.zip_member(file_name, data)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO job_outputs (job_id, lang_name, data, failed_chunks, created_at, zip_member) VALUES (?, ?, ?, ?, ?, ?)",
+                              (job_id, lang_name, data, failed_chunks, time.time(), member))
+
+    # 지금까지 끝난 언어들의 압축된 항목을 이어 붙여 ZIP을 만듦 (중간 저장본과 최종본 모두 다시 압축하지 않음)
+    def build_archive(self, job_id):
+        with self.lock:
+            rows = self.conn.execute("SELECT o.zip_member, o.lang_name, o.data, j.fmt FROM job_outputs o JOIN jobs j ON j.id = o.job_id "
+                                     "WHERE o.job_id=? ORDER BY o.created_at", (job_id,)).fetchall()
+        # 압축 항목을 보관하기 전에 저장된 결과는 여기서 압축
+        return archive.build_zip(member or archive.zip_member(f"{lang_name}.{fmt}", data) for member, lang_name, data, fmt in rows)
+
+    def finish(self, job_id, worker_id, status, error=None):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status=?, error=?, updated_at=? WHERE id=? AND worker_id=? AND status='running'",
+                              (status, error, time.time(), job_id, worker_id))
+
+    def save_metrics(self, job_id, summary):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET metrics=? WHERE id=?", (json.dumps(summary, ensure_ascii=False), job_id))
+
+    def cancel(self, job_id):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status='cancelled', updated_at=? WHERE id=? AND status IN ('queued', 'running')", (time.time(), job_id))
+
+# 프로세스 안에서 하나의 연결을 공유
+@functools.lru_cache(maxsize=None)
+def get_job_store(path=JOB_DB_PATH):
+    return JobStore(path)
+
+# --- 작업자: 별도 스레드에서 대기열을 폴링하며 작업을 하나씩 실행 (웹앱 서버 또는 CLI worker 명령에서 실행) ---
+class JobWorker(threading.Thread):
+    def __init__(self, store, poll_interval=JOB_POLL_SECONDS):
+        super().__init__(daemon=True, name="translation-job-worker")
+        self.store, self.poll_interval = store, poll_interval
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stop_event = threading.Event()
+
+    # 루프 안의 오류(다른 작업자와 DB를 함께 쓰다 생기는 database is locked 등)로 스레드가 죽지 않도록 기록 후 점점 길게 쉬고 다시 시도
+    def run(self):
+        errors = 0
+        while not self.stop_event.is_set():
+            try:
+                busy, errors = self.run_once(), 0
+            except Exception:
+                errors += 1
+                print(f"❌ 작업자 {self.worker_id} 오류 (연속 {errors}회):", file=sys.stderr, flush=True); traceback.print_exc()
+                self.stop_event.wait(min(self.poll_interval * 2 ** errors, JOB_ERROR_BACKOFF_MAX_SECONDS)); continue
+            if not busy: self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+    # 작업 하나를 처리했으면 True, 대기열이 비어 있으면 False
+    def run_once(self):
+        job = self.store.claim(self.worker_id)
+        if job is None: return False
+        # 작업 실행 동안의 구간 시간/토큰 사용량을 작업에 저장 (취소/실패해도 그때까지의 지표는 남김)
+        with metrics.run() as run:
+            try:
+                failed_langs = self.run_translate(job)
+                if failed_langs: self.store.finish(job["id"], self.worker_id, "failed", f"{failed_langs}개 언어 일부 구간 번역 실패 (다시 실행하면 해당 언어만 이어서 진행)")
+                else: self.store.finish(job["id"], self.worker_id, "done")
+            except JobCancelled:
+                pass
+            except Exception as e:
+                self.store.finish(job["id"], self.worker_id, "failed", str(e))
+        # 지표 저장 실패는 작업 결과에 영향을 주지 않으므로 기록만 하고 넘어감
+        try:
+            summary = run.summary()
+            self.store.save_metrics(job["id"], summary)
+            log_run("translation_job", summary, job_id=job["id"], source_name=job["source_name"])
+        except Exception as e:
+            print(f"⚠️ 작업 {job['id'][:8]} 지표 저장 실패: {e}", file=sys.stderr, flush=True)
+        return True
+
+    # 반환: 일부 조각이 실패한 언어 수
+    def run_translate(self, job):
+        from . import gemini, pipelines, subtitles
+        # 웹앱 세션들과 같은 속도 제한기를 공유하되 작업 하나를 요청 주체 하나로 보고 차례를 나눔
+        gemini.set_request_client(f"job:{job['id'][:8]}")
+        subs, err = subtitles.load_subtitle(job["content"], job["fmt"])
+        if err: raise ValueError(err)
+        # 이미 결과가 저장된 언어는 건너뛰고, 남은 언어도 번역 메모리에 있는 줄은 다시 요청하지 않음
+        pending = [t for t in job["targets"] if t[1] not in set(job["finished_langs"])]
+        heartbeat_stop = threading.Event()
+        failed_langs = 0
+
+        # 한 조각이 오래 걸려도 작업이 죽은 것으로 오인되지 않도록 별도로 heartbeat를 보냄
+        def heartbeat():
+            while not heartbeat_stop.wait(JOB_HEARTBEAT_SECONDS):
+                if not self.store.checkpoint(job["id"], self.worker_id): return
+
+        def on_progress(done, total):
+            if not self.store.checkpoint(job["id"], self.worker_id, done, total): raise JobCancelled()
+
+        def on_file_done(lang_name, data, failed_chunks):
+            nonlocal failed_langs
+            if failed_chunks: failed_langs += 1
+            self.store.save_output(job["id"], lang_name, f"{lang_name}.{job['fmt']}", data, failed_chunks)
+
+        beat = threading.Thread(target=heartbeat, daemon=True)
+        beat.start()
+        try:
+            pipelines.translate_subtitle_file(subs, job["fmt"], pending, on_file_done, max_workers=job["max_workers"], on_progress=on_progress, source_lang=job["source_lang"])
+        finally:
+            heartbeat_stop.set()
+        return failed_langs
@@ -0,0 +1,101 @@
+"""지역 변형 언어 묶기와 미국식 철자의 지역 철자 변환."""
+import re
+from collections import OrderedDict
+from .config import LOCALE_SPELLING_CONVERSION, LOCALE_SPELLING_RULES, TARGET_LANGUAGES
+
+# 대상 언어를 DeepL 코드 기준으로 묶어, 묶음마다 대표 언어 하나만 번역하고 나머지 변형은 로컬에서 만듦
+# (영어 아일랜드/영국/인도는 코드가 EN-GB로 같고, 영어 미국/영국/호주/캐나다는 철자 규칙이 있어 한 계열로 묶임)
+
+# --- 미국식 -> 지역 철자 변환 규칙 (소문자 기준 정규식, 치환 템플릿 또는 함수) ---
+_RULES = {
+    # colour, favourite, neighbourhood, behaviours (honorary, humorous처럼 원래 같은 단어는 그대로)
+    "our": (r"\b(col|fav|hon|hum|lab|neighb|behavi|flav|harb|rum|vap|arm|endeav)or(s|ed|ing|al|ful|fully|able|ite|ites|hood|hoods)?\b", r"\1our\2"),
+    # centre, centred, theatres, fibre, litre, sombre, spectre
+    "re": (r"\b(cent|theat|fib|lit|somb|calib|lust|sab|spect)er(s|ed|ing)?\b", None),
+    # travelled, cancelling, labelled, counsellor, marvellous
+    "ll": (r"\b(travel|cancel|label|model|fuel|level|signal|marvel|channel|tunnel|quarrel|total|dial|duel|jewel|counsel)(ed|ing|er|ers|or|ors|ous)\b", r"\1l\2"),
+    # organise, realisation, apologising, analyse (size, seize, prize처럼 목록에 없는 단어는 그대로)
+    "ise": (r"\b(organ|real|recogn|apolog|custom|optim|priorit|minim|maxim|special|summar|memor|final|util|emphas|critic|author|categor|character|"
+            r"visual|standard|global|modern|symbol|stabil|capital|civil|familiar|general|harmon|ideal|legal|mobil|normal|personal|popular|revolution|"
+            r"synchron|neutral|fertil|hospital|immun|monopol|sympath|theor|colon)i([zs])(e|es|ed|ing|ation|ations|er|ers)\b|\b(anal|paral|catal)yz(e|es|ed|ing|er|ers)\b", None),
+    "words": (r"\b(gray|jewelry|defense|offense|aluminum|pajamas|plow|mold|cozy|mustache|skeptic)(s|es|ed|ing|al|ally|ish|ier|iest)?\b", None),
+    "words_ca": (r"\b(gray|jewelry|defense|offense)(s|ed|ing|ish)?\b", None),
+}
+_WORDS = {"gray": "grey", "jewelry": "jewellery", "defense": "defence", "offense": "offence", "aluminum": "aluminium",
+          "pajamas": "pyjamas", "plow": "plough", "mold": "mould", "cozy": "cosy", "mustache": "moustache", "skeptic": "sceptic"}
+
+# -er -> -re, 어미가 붙으면 e를 빼고 이어 붙임 (centered -> centred, centering -> centring)
+def _re(m):
+    suffix = m.group(2) or ""
+    return f"{m.group(1)}r{suffix}" if suffix in ("ed", "ing") else f"{m.group(1)}re{suffix}"
+
+def _ise(m):
+    if m.group(4): return f"{m.group(4)}ys{m.group(5)}"
+    return f"{m.group(1)}is{m.group(3)}"
+
+def _word(m):
+    return _WORDS[m.group(1)] + (m.group(2) or "")
+
+_FUNCTIONS = {"re": _re, "ise": _ise}
+_COMPILED = {name: (re.compile(pattern, re.IGNORECASE), repl or _FUNCTIONS.get(name, _word)) for name, (pattern, repl) in _RULES.items()}
+# 링크, 이메일, HTML 태그(<font color=...>), 해시태그(#color) 안은 바꾸지 않음
+_PROTECTED = re.compile(r'(<[^>]*>|https?://\S+|www\.\S+|\S+@\S+|#\w+)')
+_SENTENCE_END = ".!?:-\n"
+
+# 소문자 단어와 전체 대문자 단어는 바꾸고, 대문자로 시작하는 단어는 문장 첫 단어일 때만 바꿈 (문장 중간이면 고유명사로 봄: Labor Day, World Trade Center)
+def _convert(rx, repl, text):
+    def sub(m):
+        word = m.group(0)
+        if word.islower(): return rx.sub(repl, word)
+        if word.isupper(): return rx.sub(repl, word.lower()).upper()
+        before = text[:m.start()].rstrip(" \t\"'“‘(")
+        if word[0].isupper() and word[1:].islower() and (not before or before[-1] in _SENTENCE_END):
+            new = rx.sub(repl, word.lower())
+            return new[0].upper() + new[1:]
+        return word
+    return rx.sub(sub, text)
+
+# 미국식 철자 텍스트를 DeepL 코드의 지역 철자로 변환 (규칙이 없는 코드는 그대로 반환)
+def localize_spelling(text, code):
+    rules = LOCALE_SPELLING_RULES.get(code) if LOCALE_SPELLING_CONVERSION else None
+    if not rules or not text: return text
+    pieces = _PROTECTED.split(text)
+    for i in range(0, len(pieces), 2):
+        for name in rules: pieces[i] = _convert(*_COMPILED[name], pieces[i])
+    return "".join(pieces)
+
+def language_code(lang_key):
+    return TARGET_LANGUAGES[lang_key]["code"].upper() if lang_key in TARGET_LANGUAGES else lang_key.upper()
+
+def base_language(code):
+    return code.split("-")[0].upper()
+
+# 원문 언어(source_lang: DeepL 기본 코드, 예: "EN")와 같은 계열의 언어는 번역하지 않고 원문에서 만듦
+def is_source_language(lang_key, source_lang):
+    return bool(source_lang) and base_language(language_code(lang_key)) == source_lang.upper()
+
+# --- 대상 언어 묶기: DeepL 코드가 같거나, 철자 규칙이 있는 같은 계열의 언어를 한 묶음으로 ---
+# targets: [(lang_key, lang_name), ...]
+# 반환: [(대표 (lang_key, lang_name), [(lang_key, lang_name, DeepL 코드), ...]), ...] — 대표만 번역하고 나머지는 localize_spelling으로 만듦
+# 변환 규칙은 미국식 철자 기준이므로 철자 계열의 대표는 항상 미국식(EN-US) 언어이고, 대상에 없으면 targets에 없는 대표가 반환됨
+# (영국식 번역에서 캐나다식을 만들면 -ise가 남으므로 대표를 영국식으로 삼지 않음, 대표 자체의 결과는 targets에 있을 때만 사용)
+def variant_classes(targets):
+    classes = OrderedDict()
+    for key, name in targets:
+        code = language_code(key)
+        group = ("family", base_language(code)) if code in LOCALE_SPELLING_RULES else ("code", code)
+        classes.setdefault(group, []).append((key, name, code))
+    result = []
+    for (kind, base), members in classes.items():
+        rep = next((m for m in members if not LOCALE_SPELLING_RULES.get(m[2])), None)
+        if rep is None and kind == "family": rep = _spelling_base(base)
+        rep = rep or members[0]
+        result.append(((rep[0], rep[1]), [m for m in members if m is not rep]))
+    return result
+
+# 철자 계열의 변환 규칙이 없는 기준 언어 (영어면 EN-US) / 반환: (lang_key, lang_name, DeepL 코드) 또는 None
+def _spelling_base(base):
+    for key, lang in TARGET_LANGUAGES.items():
+        code = language_code(key)
+        if base_language(code) == base and code in LOCALE_SPELLING_RULES and not LOCALE_SPELLING_RULES[code]: return (key, lang["name"], code)
+    return None
@@ -0,0 +1,117 @@
+"""YouTube 영상 제목/설명의 다국어 현지화와 localizations 본문 생성."""
+import re
+from concurrent.futures import as_completed
+from .config import DESCRIPTION_GUIDELINES, DESCRIPTION_PROMPT_HASH, MAX_CONCURRENT_REQUESTS, TARGET_LANGUAGES
+from .locales import language_code, localize_spelling
+from .gemini import get_translation_memory, group_languages, request_pool, translate_gemini_multi, translate_multi_with_repair
+
+# 언어 이름(예: "영어 (영국)")으로 원본 제목/설명을 그대로 쓰는 영어 계열인지 판별
+def is_english_name(lang_name):
+    return lang_name.startswith("영어")
+
+# --- 설명란 문단 캐시: 채널 링크, 크레딧, 해시태그처럼 영상마다 반복되는 문단은 번역 메모리에서 재사용 ---
+_PARAGRAPH_BREAK = re.compile(r'(\s*\n\s*\n\s*)')
+_URL_OR_EMAIL = re.compile(r'https?://\S+|www\.\S+|\S+@\S+')
+
+# [문단, 구분자, 문단, ...] 형태로 분리 (구분자는 빈 줄과 공백을 포함한 원문 그대로라서 이어 붙이면 원문과 같음)
+def split_paragraphs(text):
+    return _PARAGRAPH_BREAK.split(text)
+
+# 링크/이메일/기호만 있는 문단은 번역하지 않고 그대로 둠
+def needs_translation(paragraph):
+    return any(c.isalpha() for c in _URL_OR_EMAIL.sub('', paragraph))
+
+# 설명을 문단 단위로 번역 메모리에서 찾고, 없는 문단만 언어 그룹 한 번의 요청으로 번역한 뒤 원래 줄바꿈 그대로 다시 조립
+# 반환: ({lang_key: 번역된 설명}, {lang_key: 오류 메시지})
+def translate_description(description, group, tm=None):
+    tm = tm or get_translation_memory()
+    pieces = split_paragraphs(description)
+    paragraphs = list(dict.fromkeys(p.strip() for p in pieces[0::2] if needs_translation(p)))
+    hits = {ln: tm.lookup(paragraphs, ln, DESCRIPTION_PROMPT_HASH) for _, ln in group}
+    missing = [p for p in paragraphs if any(p not in hits[ln] for _, ln in group)]
+    errors = {}
+    if missing:
+        results, errors = translate_multi_with_repair(missing, group, director_guidelines=DESCRIPTION_GUIDELINES)
+        for uk, ln in group:
+            done = [(src, tr.strip()) for src, tr in zip(missing, results.get(uk, ())) if tr is not None]
+            if done: tm.store(*zip(*done), ln, DESCRIPTION_PROMPT_HASH); hits[ln].update(done)
+
+    translated = {}
+    for uk, ln in group:
+        if uk in errors or any(p not in hits[ln] for p in paragraphs):
+            errors.setdefault(uk, "Gemini 번역 실패: 번역되지 않은 문단이 있습니다."); continue
+        out = []
+        for i, piece in enumerate(pieces):
+            core = piece.strip()
+            if i % 2 or not needs_translation(piece): out.append(piece); continue
+            # 문단 앞뒤 공백은 원문 그대로 유지
+            start = piece.index(core)
+            out.append(piece[:start] + hits[ln][core] + piece[start + len(core):])
+        translated[uk] = "".join(out)
+    return translated, errors
+
+# 언어 하나의 제목/설명 번역 결과를 화면/보고서용 항목으로 정리
+def metadata_result(ui_key, lang_name, title, title_err, desc, desc_err):
+    # 제목에 포함된 줄바꿈 기호를 띄어쓰기로 강제 치환
+    if title: title = title.replace('\n', ' ').replace('\r', '').strip()
+    status = "실패" if (title_err or desc_err) else "성공"
+    return {
+        "lang_name": lang_name, "ui_key": ui_key, "api": "Gemini", "status": status,
+        "title": title if status == "성공" else f"오류: {title_err}",
+        "desc": desc if status == "성공" else f"오류: {desc_err}"
+    }
+
+# --- 제목/설명 현지화 엔진 ---
+# 제목은 짧으므로 전체 언어를 한 번의 요청으로 받고, 설명은 번역 메모리에 없는 문단만 언어 그룹별로 동시에 요청함 (호출 간격은 공용 속도 제한기가 조절)
+# 영어 계열은 API 호출 없이 원본을 사용 (지역 변형은 철자만 바꿈)
+# languages: [(ui_key, lang_name), ...] / on_result(result)는 언어의 제목과 설명이 모두 준비되는 대로 메인 스레드에서 호출됨
+def localize_video_metadata(title, description, languages, on_result, max_workers=MAX_CONCURRENT_REQUESTS):
+    foreign = [(uk, ln) for uk, ln in languages if not is_english_name(ln)]
+    for uk, ln in languages:
+        if is_english_name(ln):
+            code = language_code(uk)
+            on_result(metadata_result(uk, ln, localize_spelling(title, code), None, localize_spelling(description, code), None))
+    if not foreign: return
+
+    titles, descs = {}, {}  # ui_key -> (번역 결과, 오류)
+    names = dict(foreign)
+    pool = request_pool(max_workers)
+    try:
+        futures = {pool.submit(translate_gemini_multi, title, tuple(foreign), True): ("title", foreign)}
+        for group in group_languages(foreign):
+            futures[pool.submit(translate_description, description, group)] = ("desc", group)
+        for fut in as_completed(futures):
+            kind, group = futures[fut]
+            try: results, errors = fut.result()
+            except Exception as e: results, errors = {}, {uk: f"시스템 오류: {str(e)}" for uk, _ in group}
+            store = titles if kind == "title" else descs
+            for uk, _ in group: store[uk] = (results.get(uk), errors.get(uk))
+            for uk, _ in group:
+                if uk in titles and uk in descs:
+                    on_result(metadata_result(uk, names[uk], *titles[uk], *descs[uk]))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# --- YouTube videos.update용 localizations 본문 (성공한 언어만 포함, YouTube는 필리핀어를 'tl'로 받음) ---
+def youtube_localizations(video_id, results):
+    localizations = {}
+    for r in results:
+        if r["status"] != "성공": continue
+        code = 'tl' if r["ui_key"] == 'fil' else r["ui_key"]
+        localizations[code] = {"title": r["title"], "description": r["desc"]}
+    return {"id": video_id, "localizations": localizations}
+
+# --- 여러 영상 일괄 현지화: 영상마다 localize_video_metadata를 실행해 localizations 본문을 만듦 ---
+# snippets: {video_id: snippet} (youtube.fetch_video_snippets 결과) / on_video_done(video_id, body, results)
+# 반환: [{"id": ..., "localizations": {...}}, ...] (입력 순서)
+def localize_videos(snippets, languages, on_video_done=None, max_workers=MAX_CONCURRENT_REQUESTS):
+    order = list(TARGET_LANGUAGES)
+    bodies = []
+    for video_id, snippet in snippets.items():
+        results = []
+        localize_video_metadata(snippet.get('title', ''), snippet.get('description', ''), languages, results.append, max_workers)
+        results.sort(key=lambda r: order.index(r["ui_key"]) if r["ui_key"] in order else len(order))
+        body = youtube_localizations(video_id, results)
+        bodies.append(body)
+        if on_video_done: on_video_done(video_id, body, results)
+    return bodies
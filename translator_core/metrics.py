@@ -0,0 +1,128 @@
+"""구간별 소요 시간, 토큰/글자 수, 예상 비용을 모으는 실행 지표."""
+import contextvars
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from .config import ELEVENLABS_PRICE_PER_1K_CHARS, GEMINI_PRICE_INPUT_PER_MTOK, GEMINI_PRICE_OUTPUT_PER_MTOK, METRICS_LOG_PATH
+
+# 구간(span)별 호출 수/누적 시간/최대 시간/실패 수와 카운터(Gemini 토큰, ElevenLabs 글자 수, 재시도 등)를 프로세스 전체에서 집계
+# 실행 단위 요약은 metrics.run()으로 호출한 쪽의 문맥(contextvars)에 기록기를 묶어, 그 문맥에서 기록된 값만 따로 모음
+# (다른 세션/작업자 스레드의 값은 섞이지 않음, 작업자 스레드 풀은 bind_runs로 만든 쪽의 기록기를 물려받음)
+# 내보내기: summary() / to_json() (JSON 로그), prometheus() (Prometheus 텍스트 형식)
+
+# 현재 문맥에서 열려 있는 실행 기록기: ((Metrics, 기록기), ...) — 스레드마다 따로이고 중첩된 run()은 바깥 기록기에도 기록
+_active_runs = contextvars.ContextVar("metrics_active_runs", default=())
+
+def active_runs():
+    return _active_runs.get()
+
+# 작업자 스레드 풀의 initializer로 사용: 풀을 만든 스레드의 실행 기록기를 작업자 스레드에 묶음
+def bind_runs(runs):
+    _active_runs.set(runs)
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}     # 이름 -> [호출 수, 누적 초, 최대 초, 실패 수]
+        self.counters = {}  # 이름 -> 값
+        self.started = time.time()
+
+    # 이 지표 자신과 현재 문맥에 묶인 이 지표의 실행 기록기들
+    def _targets(self):
+        return (self, *(recorder for owner, recorder in _active_runs.get() if owner is self))
+
+    def _add_span(self, name, count, seconds, max_seconds, errors):
+        s = self.spans.setdefault(name, [0, 0.0, 0.0, 0])
+        s[0] += count; s[1] += seconds; s[2] = max(s[2], max_seconds); s[3] += errors
+
+    def observe(self, name, seconds, failed=False):
+        with self.lock:
+            for target in self._targets(): target._add_span(name, 1, seconds, seconds, int(failed))
+
+    def count(self, name, value=1):
+        if not value: return
+        with self.lock:
+            for target in self._targets(): target.counters[name] = target.counters.get(name, 0) + value
+
+    # with metrics.span("gemini.request"): ... — 예외로 끝나면 실패로 기록하고 예외는 그대로 전달
+    @contextmanager
+    def span(self, name):
+        started, failed = time.perf_counter(), False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, failed)
+
+    # with metrics.run() as run: ... — 블록 안에서 이 문맥(과 물려받은 작업자 스레드)이 기록한 값만 모으는 실행 단위 기록기
+    @contextmanager
+    def run(self):
+        recorder = Metrics()
+        token = _active_runs.set(_active_runs.get() + ((self, recorder),))
+        try:
+            yield recorder
+        finally:
+            _active_runs.reset(token)
+
+    def snapshot(self):
+        with self.lock: return {"spans": {k: list(v) for k, v in self.spans.items()}, "counters": dict(self.counters)}
+
+    # 다른 프로세스(더빙 믹싱 작업자)에서 모은 snapshot을 합침
+    def merge(self, snap):
+        with self.lock:
+            for target in self._targets():
+                for name, values in snap["spans"].items(): target._add_span(name, *values)
+                for name, value in snap["counters"].items(): target.counters[name] = target.counters.get(name, 0) + value
+
+    def estimated_cost(self):
+        c = self.counters
+        gemini = (c.get("gemini.prompt_tokens", 0) * GEMINI_PRICE_INPUT_PER_MTOK + c.get("gemini.output_tokens", 0) * GEMINI_PRICE_OUTPUT_PER_MTOK) / 1e6
+        elevenlabs = c.get("elevenlabs.characters", 0) / 1000 * ELEVENLABS_PRICE_PER_1K_CHARS
+        return {"gemini_usd": round(gemini, 4), "elevenlabs_usd": round(elevenlabs, 4), "total_usd": round(gemini + elevenlabs, 4)}
+
+    # 화면/로그용 요약 (구간은 누적 시간이 긴 순서)
+    def summary(self):
+        snap = self.snapshot()
+        spans = [{"span": name, "count": n, "total_s": round(total, 3), "avg_s": round(total / n, 3) if n else 0.0,
+                  "max_s": round(mx, 3), "errors": err} for name, (n, total, mx, err) in snap["spans"].items()]
+        spans.sort(key=lambda s: -s["total_s"])
+        return {"elapsed_s": round(time.time() - self.started, 3), "spans": spans, "counters": snap["counters"], "cost": self.estimated_cost()}
+
+    def to_json(self):
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def prometheus(self, prefix="translator"):
+        snap = self.snapshot()
+        lines = [f"# HELP {prefix}_span_seconds 구간별 소요 시간", f"# TYPE {prefix}_span_seconds summary"]
+        for name, (n, total, _, _) in sorted(snap["spans"].items()):
+            lines += [f'{prefix}_span_seconds_count{{span="{name}"}} {n}', f'{prefix}_span_seconds_sum{{span="{name}"}} {total:.6f}']
+        lines += [f"# HELP {prefix}_span_errors_total 예외로 끝난 구간 수", f"# TYPE {prefix}_span_errors_total counter"]
+        lines += [f'{prefix}_span_errors_total{{span="{name}"}} {err}' for name, (_, _, _, err) in sorted(snap["spans"].items())]
+        for name, value in sorted(snap["counters"].items()):
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+# 프로세스 전체에서 공유하는 지표 (gemini_limiter처럼 모듈 전역)
+metrics = Metrics()
+
+# 터미널 출력용 요약 (누적 시간이 긴 구간 상위 top개 + 토큰/글자 수 + 예상 비용)
+def format_summary(summary, top=8):
+    c = summary["counters"]
+    lines = [f"📊 실행 지표 ({summary['elapsed_s']:.1f}s)"]
+    lines += [f"  {s['span']:<24} {s['count']:>6}회  합계 {s['total_s']:>9.2f}s  평균 {s['avg_s']:>7.3f}s  최대 {s['max_s']:>7.3f}s"
+              + (f"  실패 {s['errors']}" if s["errors"] else "") for s in summary["spans"][:top]]
+    lines.append(f"  Gemini 요청 {c.get('gemini.requests', 0)}회 (재시도 {c.get('gemini.retries', 0)}), 입력 토큰 {c.get('gemini.prompt_tokens', 0):,}, 출력 토큰 {c.get('gemini.output_tokens', 0):,}"
+                 f" / ElevenLabs {c.get('elevenlabs.characters', 0):,}자 / 예상 비용 ${summary['cost']['total_usd']:.4f}")
+    return "\n".join(lines)
+
+# 실행 요약을 METRICS_LOG_PATH(또는 path)에 한 줄짜리 JSON으로 덧붙임
+def log_run(kind, summary, path=None, **fields):
+    path = path or METRICS_LOG_PATH
+    if not path: return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "kind": kind, **fields, **summary}, ensure_ascii=False) + "\n")
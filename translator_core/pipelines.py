@@ -0,0 +1,102 @@
+"""다국어 자막 번역과 더빙 작업 흐름 (웹앱의 버튼과 CLI가 같은 함수를 사용)."""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import locales, subtitles
+from .config import MAX_CONCURRENT_REQUESTS
+from .gemini import translate_languages_concurrently
+from .metrics import metrics
+
+# 오디오 모듈(numpy, pydub)은 더빙 함수 안에서 임포트하므로 번역만 할 때는 읽지 않음
+
+# --- 다국어 번역: 자막 하나를 여러 언어로 번역하고 언어가 끝날 때마다 직렬화된 파일을 넘김 ---
+# targets: [(lang_key, lang_name), ...] / on_file_done(lang_name, file_bytes, failed_chunks)는 메인 스레드에서 호출됨
+# 지역 변형 언어(영어 미국/영국/호주 등)는 묶음마다 대표 언어만 번역하고 나머지는 철자 변환으로 만듦
+# source_lang(DeepL 기본 코드, 예: "EN")을 주면 원문과 같은 계열의 언어는 번역 없이 원문에서 바로 만듦
+def translate_subtitle_file(subs, fmt, targets, on_file_done, max_workers=MAX_CONCURRENT_REQUESTS, on_progress=None, source_lang=None):
+    serialize = subtitles.SERIALIZERS[fmt]
+    def emit(lang_name, trans, failed_chunks):
+        with metrics.span("subtitle.serialize"): data = serialize(subs.with_texts(t.strip() for t in trans)).encode('utf-8')
+        on_file_done(lang_name, data, failed_chunks)
+
+    def emit_variants(variants, trans, failed_chunks):
+        for _, lang_name, code in variants:
+            metrics.count("locale.derived_languages")
+            with metrics.span("locale.derive"): derived = [locales.localize_spelling(t, code) for t in trans]
+            emit(lang_name, derived, failed_chunks)
+
+    # 대표가 요청된 언어가 아니면(예: 영국/캐나다만 요청) 대표는 미국식 기준으로만 번역하고 파일로 내보내지 않음
+    requested = {key for key, _ in targets}
+    variants, translate, unrequested = {}, [], set()
+    for (key, name), derived in locales.variant_classes(targets):
+        if locales.is_source_language(key, source_lang):
+            own = [(key, name, locales.language_code(key))] if key in requested else []
+            emit_variants(own + derived, subs.texts, 0); continue
+        translate.append((key, name)); variants[name] = derived
+        if key not in requested: unrequested.add(name)
+
+    def on_language_done(lang_name, trans, failed_chunks):
+        if lang_name not in unrequested: emit(lang_name, trans, failed_chunks)
+        emit_variants(variants[lang_name], trans, failed_chunks)
+    if translate: translate_languages_concurrently(subs.texts, translate, on_language_done, max_workers=max_workers, on_progress=on_progress)
+
+# --- 단일 더빙: 구간을 동시에 합성하고, 끝난 구간은 자기 start_ms 위치의 WAV 타임라인에 바로 배치 ---
+# on_segment(done, total, index, error)는 구간 하나가 끝날 때마다 호출됨 / 반환: 합성 실패 구간 수
+def dub_subtitle(subs, client, voice_id, wav_path, cache=None, on_segment=None):
+    from pydub import AudioSegment
+    from .audio import TimelineMixer, match_target_duration
+    segments = subtitles.merge_pysrt_items(subs)
+    if not segments: raise ValueError("SRT에서 유효한 텍스트를 찾을 수 없습니다.")
+
+    mixer = TimelineMixer(segments[-1]['end_ms'] + 5000, path=wav_path)
+    failed = 0
+    # 이전에 합성한 문장은 캐시에서 가져오므로 수정된 구간만 API를 호출함
+    for done, (i, audio_bytes, tts_err) in enumerate(client.synthesize_many([seg['text'] for seg in segments], voice_id, cache=cache), start=1):
+        seg = segments[i]
+        if tts_err: failed += 1
+        else:
+            with metrics.span("audio.decode"): seg_audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+            # 무음 제거는 match_target_duration 안에서 한 번만 수행
+            with metrics.span("audio.match_duration"): fitted = match_target_duration(seg_audio, seg['end_ms'] - seg['start_ms'])
+            with metrics.span("audio.mix"): mixer.add(fitted, seg['start_ms'])
+        if on_segment: on_segment(done, len(segments), i, tts_err)
+    mixer.close()
+    return failed
+
+# --- 다국어 일괄 더빙: 음성 합성은 스레드로 동시에, 무음 제거/시간 압축/믹싱은 프로세스 풀에서 언어별로 병렬 처리 ---
+# sources: {lang_name: SRT 문자열}, voices: {lang_name: voice_id}
+# on_status(lang_name, 상태 문구)로 진행 상황을 알림 / 반환: {lang_name: workdir 안의 WAV 경로}
+def dub_languages(sources, voices, client, workdir, cache=None, on_status=None, max_processes=None):
+    from .audio import render_dub_track
+    rendered = {}
+    def status(ln, state):
+        if on_status: on_status(ln, state)
+
+    # 작업자 프로세스에서 모은 지표는 결과와 함께 돌려받아 이 프로세스의 지표에 합침
+    def collect(fut, ln):
+        try:
+            rendered[ln], worker_metrics = fut.result()
+            metrics.merge(worker_metrics); status(ln, "✅ 완료")
+        except Exception as e: status(ln, f"❌ 믹싱 실패: {str(e)}")
+
+    # spawn 방식: 스레드가 많은 부모 프로세스(Streamlit 서버 등)를 fork하지 않고 깨끗한 작업자 프로세스를 사용
+    with ProcessPoolExecutor(max_workers=max_processes or os.cpu_count(), mp_context=multiprocessing.get_context("spawn")) as pool:
+        renders = {}
+        for ln, content in sources.items():
+            subs, err = subtitles.load_subtitle(content, "srt")
+            segments = subtitles.merge_pysrt_items(subs) if not err else []
+            if not segments:
+                status(ln, f"❌ {err or 'SRT에서 유효한 텍스트를 찾을 수 없습니다.'}"); continue
+            status(ln, "⏳ 음성 합성 중...")
+            clips = [None] * len(segments)
+            for i, audio_bytes, tts_err in client.synthesize_many([seg['text'] for seg in segments], voices[ln], cache=cache):
+                clips[i] = audio_bytes
+            failed = clips.count(None)
+            # 이 언어의 믹싱은 프로세스 풀에 맡기고, 바로 다음 언어의 음성 합성으로 넘어감
+            out_path = os.path.join(workdir, f"{ln}.wav")
+            renders[pool.submit(render_dub_track, segments, clips, segments[-1]['end_ms'] + 5000, out_path)] = ln
+            status(ln, "⏳ 믹싱 중..." + (f" (합성 실패 {failed}구간 제외)" if failed else ""))
+            for fut in [f for f in renders if f.done()]: collect(fut, renders.pop(fut))
+        for fut in as_completed(renders): collect(fut, renders[fut])
+    return rendered
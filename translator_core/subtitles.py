@@ -0,0 +1,132 @@
+"""SRT/SBV/VTT 자막 파싱과 직렬화, 열 단위 자막 테이블."""
+import html
+import io
+import os
+import re
+import zipfile
+from array import array
+from .metrics import metrics
+
+# 자막을 객체 목록 대신 열(column) 단위로 저장: 시작/끝 시각은 정수 배열, 텍스트는 일반 리스트
+# 번역본은 텍스트 열만 바꿔 끼우고 시각 배열은 원본과 공유하므로 언어마다 객체를 복사하지 않음
+
+# 본문은 빈 줄이나 다음 자막의 (번호 줄 +) 시간 줄 앞에서 끝남 — 본문이 없는 자막이 다음 자막을 삼키지 않도록 본문 자체를 선택으로 둠
+_TIME = r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})'
+_SRT_STOP = r'\n[ \t]*(?:\n|(?:\d+[ \t]*\n[ \t]*)?\d+:\d{1,2}:\d{1,2}[,.]\d{1,3}[ \t]*-->)'
+_SRT_CUE = re.compile(rf'^[ \t]*{_TIME}[ \t]*-->[ \t]*{_TIME}[^\n]*(?:(?!{_SRT_STOP})\n([^\n]*(?:(?!{_SRT_STOP})\n[^\n]*)*))?', re.M)
+_SBV_STOP = r'\n[ \t]*(?:\n|\d+:\d+:\d+\.\d+,\d+:\d+:\d+\.\d+)'
+_SBV_CUE = re.compile(rf'^(\d+):(\d+):(\d+)\.(\d+),(\d+):(\d+):(\d+)\.(\d+)[^\n]*(?:(?!{_SBV_STOP})\n([^\n]*(?:(?!{_SBV_STOP})\n[^\n]*)*))?', re.M)
+_VTT_TIME = r'(?:(\d+):)?(\d{1,2}):(\d{1,2})\.(\d{1,3})'
+_VTT_STOP = r'\n[ \t]*(?:\n|(?:\d+:)?\d{1,2}:\d{1,2}\.\d{1,3}[ \t]*-->)'
+_VTT_CUE = re.compile(rf'^[ \t]*{_VTT_TIME}[ \t]*-->[ \t]*{_VTT_TIME}[^\n]*(?:(?!{_VTT_STOP})\n([^\n]*(?:(?!{_VTT_STOP})\n[^\n]*)*))?', re.M)
+
+
+class SubtitleTable:
+    __slots__ = ("start_ms", "end_ms", "texts")
+
+    def __init__(self, start_ms, end_ms, texts):
+        self.start_ms = start_ms if isinstance(start_ms, array) else array('q', start_ms)
+        self.end_ms = end_ms if isinstance(end_ms, array) else array('q', end_ms)
+        self.texts = list(texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __bool__(self):
+        return bool(self.texts)
+
+    # (start_ms, end_ms, text) 튜플로 순회
+    def rows(self):
+        return zip(self.start_ms, self.end_ms, self.texts)
+
+    # 시각 배열은 그대로 공유하고 텍스트 열만 교체한 새 테이블을 반환
+    def with_texts(self, texts):
+        texts = list(texts)
+        if len(texts) != len(self.texts): raise ValueError("텍스트 개수가 자막 개수와 다릅니다.")
+        return SubtitleTable(self.start_ms, self.end_ms, texts)
+
+
+def _normalize(content):
+    return content.lstrip('\ufeff').replace('\r\n', '\n').replace('\r', '\n')
+
+
+# 정규식으로 뽑은 (h, m, s, ms, h, m, s, ms, text) 튜플 목록을 한 번에 열 배열로 변환
+def _build(groups, unescape=False):
+    nums = list(map(int, (v or 0 for g in groups for v in g[:8])))
+    starts = array('q', [((nums[i] * 60 + nums[i+1]) * 60 + nums[i+2]) * 1000 + nums[i+3] for i in range(0, len(nums), 8)])
+    ends = array('q', [((nums[i] * 60 + nums[i+1]) * 60 + nums[i+2]) * 1000 + nums[i+3] for i in range(4, len(nums), 8)])
+    texts = [g[8].strip() for g in groups]
+    if unescape: texts = [html.unescape(t) if '&' in t else t for t in texts]
+    return SubtitleTable(starts, ends, texts)
+
+
+def parse_srt(content):
+    return _build(_SRT_CUE.findall(_normalize(content)))
+
+
+# SRT는 pysrt처럼 본문이 없는 자막도 빈 텍스트로 유지하고, SBV는 기존 파서처럼 시간 줄만 있는 블록을 건너뜀
+def parse_sbv(content):
+    return _build([g for g in _SBV_CUE.findall(_normalize(content).strip()) if g[8].strip()], unescape=True)
+
+
+def parse_vtt(content):
+    return _build(_VTT_CUE.findall(_normalize(content)))
+
+
+# 밀리초 배열을 한 번에 "HH:MM:SS{sep}mmm" 문자열 목록으로 변환
+def _clocks(values, sep):
+    return [f"{v // 3600000:02d}:{v // 60000 % 60:02d}:{v // 1000 % 60:02d}{sep}{v % 1000:03d}" for v in values]
+
+
+def to_srt(table):
+    starts, ends = _clocks(table.start_ms, ','), _clocks(table.end_ms, ',')
+    return "\n\n".join(f"{i}\n{a} --> {b}\n{t.strip()}" for i, a, b, t in zip(range(1, len(table) + 1), starts, ends, table.texts))
+
+
+def to_sbv(table):
+    starts, ends = _clocks(table.start_ms, '.'), _clocks(table.end_ms, '.')
+    return "\n\n".join(f"{a},{b}\n{html.unescape(t.strip())}" for a, b, t in zip(starts, ends, table.texts))
+
+
+def to_vtt(table):
+    starts, ends = _clocks(table.start_ms, '.'), _clocks(table.end_ms, '.')
+    return "WEBVTT\n\n" + "\n\n".join(f"{a} --> {b}\n{t.strip()}" for a, b, t in zip(starts, ends, table.texts))
+
+
+PARSERS = {"srt": parse_srt, "sbv": parse_sbv, "vtt": parse_vtt}
+SERIALIZERS = {"srt": to_srt, "sbv": to_sbv, "vtt": to_vtt}
+
+
+# 반환: (SubtitleTable, None) 또는 (None, 오류 메시지)
+def load_subtitle(content, fmt):
+    with metrics.span("subtitle.parse"): subs = PARSERS[fmt](content)
+    if not subs: return None, f"{fmt.upper()} 파싱 오류: 유효한 시간/텍스트 블록을 찾을 수 없습니다."
+    return subs, None
+
+
+def load_srt_zip(zip_bytes):
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        return {os.path.splitext(os.path.basename(n))[0]: zf.read(n) for n in zf.namelist() if n.lower().endswith('.srt')}
+
+
+# --- 문장 병합(Sentence Merging) 로직 ---
+def merge_pysrt_items(subs):
+    merged = []
+    if not subs: return merged
+    current_seg = None
+    for start_ms, end_ms, text in subs.rows():
+        text = text.strip().replace('\n', ' ')
+
+        if current_seg is None:
+            current_seg = {'start_ms': start_ms, 'end_ms': end_ms, 'text': text}
+        else:
+            current_seg['text'] += " " + text
+            current_seg['end_ms'] = end_ms
+
+        if re.search(r'[.?!’”"]\s*$', current_seg['text']) or current_seg['text'].endswith('...'):
+            merged.append(current_seg)
+            current_seg = None
+
+    if current_seg is not None:
+        merged.append(current_seg)
+    return merged
@@ -0,0 +1,156 @@
+"""ElevenLabs 음성 합성 클라이언트와 합성 결과 디스크 캐시."""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import active_runs, bind_runs, metrics
+from .config import (ELEVENLABS_BASE_URL, ELEVENLABS_MODEL_ID, TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES,
+                     TTS_MAX_CONCURRENCY, TTS_MAX_RETRIES, VOICE_OPTIONS)
+
+# --- 합성 음성 캐시: 내용 주소 기반 파일 저장 + 크기 제한 LRU 삭제 (파일 수정 시각을 최근 사용 시각으로 사용) ---
+class TTSAudioCache:
+    def __init__(self, directory, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory, self.max_bytes = directory, max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".mp3"): continue
+                path = os.path.join(root, name)
+                try: st_ = os.stat(path)
+                except FileNotFoundError: continue
+                yield path, st_.st_size, st_.st_mtime
+
+    def _path(self, voice_id, model_id, text):
+        key = hashlib.sha256(json.dumps([voice_id, model_id, text], ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".mp3")
+
+    def get(self, voice_id, model_id, text):
+        path = self._path(voice_id, model_id, text)
+        try:
+            with open(path, "rb") as f: data = f.read()
+        except FileNotFoundError:
+            return None
+        try: os.utime(path)
+        except FileNotFoundError: pass
+        return data
+
+    def put(self, voice_id, model_id, text, audio_bytes):
+        path = self._path(voice_id, model_id, text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f: f.write(audio_bytes)
+        # 같은 키를 덮어쓰면 기존 파일 크기를 빼서 total_bytes가 중복 집계되지 않게 함
+        with self.lock:
+            try: old_size = os.path.getsize(path)
+            except FileNotFoundError: old_size = 0
+            os.replace(tmp_path, path)
+            self.total_bytes += len(audio_bytes) - old_size
+            if self.total_bytes > self.max_bytes: self._evict()
+
+    # 전체 크기가 한도의 90% 이하가 될 때까지 가장 오래 사용하지 않은 파일부터 삭제
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.total_bytes <= self.max_bytes * 0.9: break
+            try: os.remove(path)
+            except FileNotFoundError: pass
+            self.total_bytes -= size
+
+@functools.lru_cache(maxsize=None)
+def get_tts_cache(directory=TTS_CACHE_DIR):
+    return TTSAudioCache(directory)
+
+# --- ElevenLabs TTS 클라이언트: 연결 재사용 세션 + 동시 합성 + 429/Retry-After 재시도 ---
+class ElevenLabsClient:
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, api_key, base_url=ELEVENLABS_BASE_URL, max_concurrency=TTS_MAX_CONCURRENCY, max_retries=TTS_MAX_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency, self.max_retries = max_concurrency, max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter); self.session.mount("http://", adapter)
+        self.session.headers.update({"xi-api-key": api_key, "Content-Type": "application/json"})
+
+    @staticmethod
+    def retry_after(res):
+        value = res.headers.get("Retry-After")
+        if not value: return None
+        try: return float(value)
+        except ValueError: pass
+        try: return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError): return None
+
+    # 반환: (mp3 바이트, None) 또는 (None, 오류 메시지)
+    def synthesize(self, text, voice_id, model_id=ELEVENLABS_MODEL_ID):
+        url = f"{self.base_url}/v1/text-to-speech/{voice_id}"
+        err = None
+        for attempt in range(self.max_retries):
+            delay = 2 ** attempt
+            # 글자 수는 요청마다 기록 (ElevenLabs는 실패한 요청의 글자 수를 과금하지 않지만 재시도 비용 추적용)
+            metrics.count("elevenlabs.requests"); metrics.count("elevenlabs.request_characters", len(text))
+            try:
+                with metrics.span("elevenlabs.request"):
+                    res = self.session.post(url, json={"text": text, "model_id": model_id}, timeout=(10, 120))
+            except requests.RequestException as e:
+                err = f"연결 오류: {str(e)}"
+            else:
+                if res.status_code == 200:
+                    metrics.count("elevenlabs.characters", len(text))
+                    return res.content, None
+                err = f"HTTP {res.status_code}: {res.text}"
+                if res.status_code not in self.RETRY_STATUS: return None, err
+                retry_after = self.retry_after(res)
+                # Retry-After: 0은 바로 다시 시도하라는 뜻이므로 헤더가 없을 때만 지수 대기를 사용
+                delay = retry_after if retry_after is not None else delay
+            if attempt < self.max_retries - 1:
+                metrics.count("elevenlabs.retries")
+                with metrics.span("elevenlabs.backoff"): time.sleep(min(delay, 60))
+        return None, err
+
+    def synthesize_cached(self, cache, text, voice_id, model_id=ELEVENLABS_MODEL_ID):
+        audio, err = self.synthesize(text, voice_id, model_id)
+        if audio is not None: cache.put(voice_id, model_id, text, audio)
+        return audio, err
+
+    # 구간들을 동시에 합성하고 끝나는 순서대로 (구간 번호, mp3 바이트, 오류)를 내보냄
+    # cache가 주어지면 캐시에 있는 구간은 API 호출 없이 먼저 내보내고, 새로 합성한 구간은 캐시에 저장
+    # 같은 텍스트는 한 번만 합성하고 결과를 해당 구간 모두에 내보냄
+    def synthesize_many(self, texts, voice_id, model_id=ELEVENLABS_MODEL_ID, cache=None):
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency, initializer=bind_runs, initargs=(active_runs(),))
+        try:
+            pending, futures = {}, {}
+            for i, text in enumerate(texts):
+                if text in pending:
+                    futures[pending[text]].append(i); continue
+                audio = cache.get(voice_id, model_id, text) if cache else None
+                if audio is not None:
+                    metrics.count("tts_cache.hits"); metrics.count("tts_cache.hit_characters", len(text))
+                    yield i, audio, None; continue
+                if cache: fut = pool.submit(self.synthesize_cached, cache, text, voice_id, model_id)
+                else: fut = pool.submit(self.synthesize, text, voice_id, model_id)
+                pending[text], futures[fut] = fut, [i]
+            for fut in as_completed(futures):
+                try: audio, err = fut.result()
+                except Exception as e: audio, err = None, str(e)
+                for i in futures[fut]: yield i, audio, err
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+# --- 다국어 일괄 더빙: 언어 이름으로 기본 성우 추정 (목록에 없는 언어는 다국어 모델의 영어 성우 사용) ---
+def default_voice_label(lang_name):
+    base = lang_name.split("(")[0].strip()
+    for label in VOICE_OPTIONS:
+        if base in label: return label
+    return "영어(세모과)"
@@ -0,0 +1,51 @@
+"""YouTube Data API 영상 정보 조회와 URL/ID 파싱."""
+import functools
+import re
+import threading
+from .config import YOUTUBE_BATCH_SIZE
+
+# google-api-python-client는 호출 시점에 임포트
+
+def extract_video_id(url_or_id):
+    url_or_id = url_or_id.strip()
+    if len(url_or_id) == 11 and not url_or_id.startswith("http"): return url_or_id
+    pattern = r'(?:v=|\/shorts\/|\/embed\/|youtu\.be\/)([a-zA-Z0-9_-]{11})'
+    match = re.search(pattern, url_or_id)
+    if match: return match.group(1)
+    fallback = r'(?:\/)([a-zA-Z0-9_-]{11})(?:[?&/]|$)'
+    match_fb = re.search(fallback, url_or_id)
+    return match_fb.group(1) if match_fb else url_or_id
+
+# 여러 줄/쉼표로 구분된 URL 또는 ID 목록에서 영상 ID를 순서대로, 중복 없이 추출
+def parse_video_ids(text):
+    return list(dict.fromkeys(extract_video_id(token) for token in re.split(r'[\s,]+', text) if token.strip()))
+
+# --- API 클라이언트는 (키, 엔드포인트)마다 한 번만 생성해 재사용 ---
+# 패키지에 포함된 discovery 문서를 사용하므로 네트워크로 discovery 문서를 받지 않음
+# api_endpoint를 지정하면 로컬 테스트 서버 등 다른 주소로 요청을 보냄
+@functools.lru_cache(maxsize=None)
+def get_youtube_client(api_key, api_endpoint=None):
+    from googleapiclient.discovery import build
+    client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+    return build('youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False, client_options=client_options)
+
+# 공유 클라이언트의 HTTP 연결(httplib2)은 스레드 안전하지 않으므로 요청은 한 번에 하나씩 보냄
+_client_lock = threading.Lock()
+
+# videos.list 한 번에 최대 50개 ID씩 조회 / 반환: {video_id: snippet} (찾을 수 없는 영상은 빠짐)
+def fetch_video_snippets(client, video_ids):
+    snippets = {}
+    for i in range(0, len(video_ids), YOUTUBE_BATCH_SIZE):
+        batch = video_ids[i:i + YOUTUBE_BATCH_SIZE]
+        with _client_lock:
+            response = client.videos().list(part="snippet", id=",".join(batch)).execute()
+        snippets.update((item['id'], item['snippet']) for item in response.get('items', []))
+    return snippets
+
+def get_video_details(api_key, video_id, api_endpoint=None):
+    try:
+        snippets = fetch_video_snippets(get_youtube_client(api_key, api_endpoint), [video_id])
+        if video_id not in snippets: return None, "YouTube API 오류: 해당 ID의 영상을 찾을 수 없습니다."
+        return snippets[video_id], None
+    except Exception as e:
+        return None, f"YouTube API 오류: {str(e)}"